@@ -1,6 +1,8 @@
 from .data.const import *
 from .data.dataobject import *
 from .data.mission import *
+from .data.playerindex import *
+from .data.profilecache import *
 from .data.player import *
 from .data.server import *
 from .data.impl.serverimpl import *
@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING, Any, Callable
 
 if TYPE_CHECKING:
     from logging import Logger
-    from psycopg_pool import ConnectionPool
+    from psycopg_pool import ConnectionPool, AsyncConnectionPool
 
 __all__ = [
     "DataObject",
@@ -17,11 +17,13 @@ __all__ = [
 class DataObject:
     node: Any = field(compare=False, repr=False)
     pool: ConnectionPool = field(compare=False, repr=False, init=False)
+    apool: AsyncConnectionPool = field(compare=False, repr=False, init=False)
     log: Logger = field(compare=False, repr=False, init=False)
     config: ConfigParser = field(compare=False, repr=False, init=False)
 
     def __post_init__(self):
         self.pool = self.node.pool
+        self.apool = self.node.apool
         self.log = self.node.log
         self.config = self.node.config
 
@@ -20,10 +20,11 @@ from core.const import SAVED_GAMES
 from discord.ext import tasks
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from psycopg import AsyncCursor
 from psycopg.errors import UndefinedTable, InFailedSqlTransaction, NotNullViolation
 from psycopg.rows import dict_row
 from psycopg.types.json import Json
-from psycopg_pool import ConnectionPool
+from psycopg_pool import ConnectionPool, AsyncConnectionPool
 from typing import Optional, Union, TYPE_CHECKING, Awaitable, Callable, Any, Tuple
 from version import __version__
 
@@ -63,11 +64,27 @@ LOGLEVEL = {
 REPO_URL = "https://api.github.com/repos/Special-K-s-Flightsim-Bots/DCSServerBot/releases"
 
 
+class TimedAsyncCursor(AsyncCursor):
+    # set by NodeImpl.init_db()
+    log: Optional[logging.Logger] = None
+    threshold: float = 1.0
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            if self.log and duration > self.threshold:
+                self.log.warning(f"Slow query ({duration * 1000:.0f} ms): {' '.join(str(query).split())}")
+
+
 class NodeImpl(Node):
 
     def __init__(self, name: str):
         super().__init__(name)
         self.node = self  # to be able to address self.node
+        self.startup = utils.StartupTimer()
         self._public_ip: Optional[str] = None
         self.bot_version = __version__[:__version__.rfind('.')]
         self.sub_version = int(__version__[__version__.rfind('.') + 1:])
@@ -78,7 +95,8 @@ class NodeImpl(Node):
         self.update_pending = False
         self.before_update: dict[str, Callable[[], Awaitable[Any]]] = dict()
         self.after_update: dict[str, Callable[[], Awaitable[Any]]] = dict()
-        self.locals = self.read_locals()
+        with self.startup.measure('Configuration'):
+            self.locals = self.read_locals()
         self.log = self.init_logger()
         if sys.platform == 'win32':
             from os import system
@@ -98,26 +116,31 @@ class NodeImpl(Node):
             self.plugins.append('cloud')
         self.db_version = None
         self.pool = None
+        self.apool = None
         self._master = None
         self.listen_address = self.locals.get('listen_address', '0.0.0.0')
         self.listen_port = self.locals.get('listen_port', 10042)
 
     async def post_init(self):
-        self.pool = self.init_db()
-        try:
-            with self.pool.connection() as conn:
-                with conn.transaction():
-                    conn.execute("""
-                        INSERT INTO nodes (guild_id, node) VALUES (%s, %s) 
-                        ON CONFLICT (guild_id, node) DO UPDATE SET last_seen = NOW() AT TIME ZONE 'UTC'
-                    """, (self.guild_id, self.name))
-            self._master = await self.check_master()
-        except (UndefinedTable, NotNullViolation, InFailedSqlTransaction):
-            # some master tables have changed, so do the update first
-            self._master = True
+        with self.startup.measure('Database connection'):
+            self.pool, self.apool = self.init_db()
+            await self.apool.open()
+            try:
+                with self.pool.connection() as conn:
+                    with conn.transaction():
+                        conn.execute("""
+                            INSERT INTO nodes (guild_id, node) VALUES (%s, %s) 
+                            ON CONFLICT (guild_id, node) DO UPDATE SET last_seen = NOW() AT TIME ZONE 'UTC'
+                        """, (self.guild_id, self.name))
+                self._master = await self.check_master()
+            except (UndefinedTable, NotNullViolation, InFailedSqlTransaction):
+                # some master tables have changed, so do the update first
+                self._master = True
         if self._master:
-            self.update_db()
-        self.init_instances()
+            with self.startup.measure('Database update'):
+                self.update_db()
+        with self.startup.measure('Instances'):
+            self.init_instances()
 
     @property
     def master(self) -> bool:
@@ -167,9 +190,9 @@ class NodeImpl(Node):
         else:
             del self.after_update[name]
 
-    @staticmethod
-    async def shutdown():
+    async def shutdown(self):
         await ServiceRegistry.shutdown()
+        await self.close_db()
         tasks = [t for t in asyncio.all_tasks() if t is not
                  asyncio.current_task()]
         [task.cancel() for task in tasks]
@@ -213,12 +236,18 @@ class NodeImpl(Node):
         log.addHandler(ch)
         return log
 
-    def init_db(self):
-        url = self.config.get("database", self.locals.get('database'))['url']
-        pool_min = self.config.get("database", self.locals.get('database')).get('pool_min', 5)
-        pool_max = self.config.get("database", self.locals.get('database')).get('pool_max', 10)
+    def init_db(self) -> Tuple[ConnectionPool, AsyncConnectionPool]:
+        config = self.config.get("database", self.locals.get('database'))
+        url = config['url']
+        pool_min = config.get('pool_min', 5)
+        pool_max = config.get('pool_max', 10)
         db_pool = ConnectionPool(url, min_size=pool_min, max_size=pool_max)
-        return db_pool
+        TimedAsyncCursor.log = self.log
+        TimedAsyncCursor.threshold = config.get('slow_query', 1.0)
+        # the async pool will be opened in post_init(), as it needs a running event loop
+        db_apool = AsyncConnectionPool(url, min_size=pool_min, max_size=pool_max, open=False,
+                                       kwargs={"cursor_factory": TimedAsyncCursor})
+        return db_pool, db_apool
 
     def init_instances(self):
         for _name, _element in self.locals['instances'].items():
@@ -355,10 +384,9 @@ class NodeImpl(Node):
                 if branch is not None:
                     cmd.append(f"@{branch}")
 
-                process = await asyncio.create_subprocess_exec(
-                    *cmd, startupinfo=startupinfo, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+                process = await asyncio.to_thread(
+                    subprocess.run, cmd, startupinfo=startupinfo, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
                 )
-                await process.wait()
                 return process.returncode
             except Exception as ex:
                 self.log.exception(ex)
@@ -410,10 +438,9 @@ class NodeImpl(Node):
         startupinfo = subprocess.STARTUPINFO()
         startupinfo.dwFlags |= (subprocess.STARTF_USESTDHANDLES | subprocess.STARTF_USESHOWWINDOW)
         startupinfo.wShowWindow = subprocess.SW_HIDE
-        proc = await asyncio.create_subprocess_exec(
-            os.path.join(self.installation, 'bin', 'dcs_updater.exe'),
-            '--quiet', what, module, startupinfo=startupinfo)
-        await proc.wait()
+        await asyncio.to_thread(subprocess.run, [
+            os.path.join(self.installation, 'bin', 'dcs_updater.exe'), '--quiet', what, module
+        ], startupinfo=startupinfo)
 
     async def get_installed_modules(self) -> list[str]:
         with open(os.path.join(self.installation, 'autoupdate.cfg'), encoding='utf8') as cfg:
@@ -471,6 +498,10 @@ class NodeImpl(Node):
             if not self.locals['DCS'].get('cloud', False) or self.master:
                 self.autoupdate.cancel()
 
+    async def close_db(self):
+        if self.apool:
+            await self.apool.close()
+
     async def check_master(self) -> bool:
         def version_string_to_tuple(version_string: str):
             return tuple(map(int, version_string.split(".")))
@@ -507,6 +538,7 @@ class NodeImpl(Node):
                                         conn.execute(
                                             "INSERT INTO intercom (node, data, priority) VALUES (%s, %s, %s)",
                                             (node, Json(data), 2))
+                                        conn.execute("SELECT pg_notify('intercom', %s)", (node, ))
                                     # clear the update flag
                                     cursor.execute(
                                         "UPDATE cluster SET update_pending = FALSE, version = %s WHERE guild_id = %s",
@@ -531,6 +563,7 @@ class NodeImpl(Node):
                             conn.execute(
                                 "INSERT INTO intercom (node, data, priority) VALUES (%s, %s, %s)",
                                 (self.name, Json(data), 2))
+                            conn.execute("SELECT pg_notify('intercom', %s)", (self.name, ))
                             return False
                         elif current_version > db_version:
                             self.log.warning(f"This node is running on version {current_version} where the master "
@@ -573,10 +606,9 @@ class NodeImpl(Node):
 
     async def shell_command(self, cmd: str) -> Optional[Tuple[str, str]]:
         self.log.debug('Running shell-command: ' + cmd)
-        process = await asyncio.create_subprocess_shell(cmd,
-                                                        stdout=asyncio.subprocess.PIPE,
-                                                        stderr=asyncio.subprocess.PIPE)
-        stdout, stderr = await process.communicate()
+        process = await asyncio.to_thread(subprocess.run, cmd, shell=True, stdout=subprocess.PIPE,
+                                          stderr=subprocess.PIPE)
+        stdout, stderr = process.stdout, process.stderr
         return (stdout.decode('cp1252', 'ignore') if stdout else None,
                 stderr.decode('cp1252', 'ignore') if stderr else None)
 
@@ -723,8 +755,9 @@ class NodeImpl(Node):
         settings_path = os.path.join(instance.home, 'Config', 'serverSettings.lua')
         if os.path.exists(settings_path):
             settings = SettingsDict(self, settings_path, root='cfg')
-            settings['port'] = instance.dcs_port
-            settings['name'] = 'n/a'
+            with settings.batch():
+                settings['port'] = instance.dcs_port
+                settings['name'] = 'n/a'
         server: ServerImpl = DataObjectFactory().new(
             Server.__name__, node=self.node, port=instance.bot_port, name='n/a')
         instance.server = server
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import os
 import shutil
 import socket
+import stat
 import subprocess
 
 from contextlib import suppress
@@ -34,6 +36,9 @@ if TYPE_CHECKING:
 
 __all__ = ["ServerImpl"]
 
+# hashes of the lua sources by path: (size, mtime, sha1), shared between all servers of this node
+_lua_hashes: dict[str, tuple[int, int, str]] = {}
+
 
 class MissionFileSystemEventHandler(FileSystemEventHandler):
     def __init__(self, server: Server):
@@ -108,15 +113,16 @@ class ServerImpl(Server):
         if not self._settings:
             path = os.path.join(self.instance.home, 'Config', 'serverSettings.lua')
             self._settings = utils.SettingsDict(self, path, 'cfg')
-            # TODO: can be removed if bug in net.load_next_mission() is fixed
-            if self._settings.get('listLoop', False):
-                self._settings['listLoop'] = True
-            # if someone managed to destroy the mission list, fix it...
-            if 'missionList' not in self._settings:
-                self._settings['missionList'] = []
-            elif isinstance(self._settings['missionList'], dict):
-                self._settings['missionList'] = list(self._settings['missionList'].values())
-            self._settings['missionList'] = [os.path.normpath(x) for x in self._settings['missionList']]
+            with self._settings.batch():
+                # TODO: can be removed if bug in net.load_next_mission() is fixed
+                if self._settings.get('listLoop', False):
+                    self._settings['listLoop'] = True
+                # if someone managed to destroy the mission list, fix it...
+                if 'missionList' not in self._settings:
+                    self._settings['missionList'] = []
+                elif isinstance(self._settings['missionList'], dict):
+                    self._settings['missionList'] = list(self._settings['missionList'].values())
+                self._settings['missionList'] = [os.path.normpath(x) for x in self._settings['missionList']]
         return self._settings
 
     @property
@@ -160,9 +166,36 @@ class ServerImpl(Server):
                         self.log.info(f'  => {self.name}: Auto-scanning for new miz files in Missions-folder disabled.')
             super().set_status(status)
 
+    def _get_lua_sources(self) -> dict[str, str]:
+        # path relative to the Scripts directory of the instance => source path
+        sources: dict[str, str] = {}
+        for root, _, files in os.walk('Scripts'):
+            for name in files:
+                if name != 'DCSServerBotConfig.lua.tmpl':
+                    path = os.path.join(root, name)
+                    sources[os.path.relpath(path, 'Scripts')] = path
+        for plugin_name in self.node.plugins:
+            source_path = os.path.join('plugins', plugin_name, 'lua')
+            for root, _, files in os.walk(source_path):
+                for name in files:
+                    path = os.path.join(root, name)
+                    target = os.path.join('net', 'DCSServerBot', plugin_name, os.path.relpath(path, source_path))
+                    sources[target] = path
+        return sources
+
+    @staticmethod
+    def _get_lua_hash(path: str) -> str:
+        st = os.stat(path)
+        cached = _lua_hashes.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        with open(path, mode='rb') as infile:
+            digest = hashlib.sha1(infile.read()).hexdigest()
+        _lua_hashes[path] = (st.st_size, st.st_mtime_ns, digest)
+        return digest
+
     def _install_luas(self):
         def rmtree(top):
-            import stat
             for root, dirs, files in os.walk(top, topdown=False):
                 for name in files:
                     filename = os.path.join(root, name)
@@ -175,54 +208,93 @@ class ServerImpl(Server):
             os.chmod(top, stat.S_IWUSR)
             os.rmdir(top)
 
-        # Example from pathutils.py
         dcs_path = os.path.join(self.instance.home, 'Scripts')
-        if not os.path.exists(dcs_path):
-            os.mkdir(dcs_path)
-        ignore = None
         bot_home = os.path.join(dcs_path, 'net', 'DCSServerBot')
-        if os.path.exists(bot_home):
+        # the manifest contains the hashes of all files that were installed by the bot
+        manifest_file = os.path.join(bot_home, 'manifest.json')
+        manifest: dict[str, str] = {}
+        if os.path.exists(manifest_file):
+            try:
+                with open(manifest_file, mode='r', encoding='utf-8') as infile:
+                    manifest = json.load(infile)
+            except (OSError, ValueError):
+                self.log.warning(f'  - Manifest of {self.instance.name} is corrupt, re-installing all hooks.')
+        if manifest:
             self.log.debug('  - Updating Hooks ...')
-            rmtree(bot_home)
-            ignore = shutil.ignore_patterns('DCSServerBotConfig.lua.tmpl')
         else:
             self.log.debug('  - Installing Hooks ...')
-        shutil.copytree('Scripts', dcs_path, dirs_exist_ok=True, ignore=ignore)
+            # we don't know which files belong to us, so start from scratch
+            if os.path.exists(bot_home):
+                rmtree(bot_home)
+        copied = removed = skipped = 0
+        installed: dict[str, str] = {}
+        for target, source in self._get_lua_sources().items():
+            digest = self._get_lua_hash(source)
+            installed[target] = digest
+            target_path = os.path.join(dcs_path, target)
+            if manifest.get(target) == digest and os.path.exists(target_path):
+                skipped += 1
+                continue
+            if os.path.exists(target_path):
+                os.chmod(target_path, stat.S_IWUSR | stat.S_IRUSR)
+            else:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            shutil.copy2(source, target_path)
+            copied += 1
+        # remove files that are not part of the bot anymore
+        for target in manifest.keys() - installed.keys():
+            target_path = os.path.join(dcs_path, target)
+            if not os.path.exists(target_path):
+                continue
+            os.chmod(target_path, stat.S_IWUSR)
+            os.remove(target_path)
+            removed += 1
+            dirname = os.path.dirname(target_path)
+            while dirname.startswith(bot_home + os.sep) and not os.listdir(dirname):
+                os.rmdir(dirname)
+                dirname = os.path.dirname(dirname)
         try:
             admin_channel = self.channels.get(Channel.ADMIN)
             if not admin_channel:
                 data = yaml.load(Path('config/services/bot.yaml'))
                 admin_channel = data.get('admin_channel', -1)
             with open(os.path.join('Scripts', 'net', 'DCSServerBot', 'DCSServerBotConfig.lua.tmpl'), 'r') as template:
-                with open(os.path.join(bot_home, 'DCSServerBotConfig.lua'), 'w', encoding='utf-8') as outfile:
-                    for line in template.readlines():
-                        line = utils.format_string(line, node=self.node, instance=self.instance, server=self,
-                                                   admin_channel=admin_channel)
-                        outfile.write(line)
+                config = ''.join(
+                    utils.format_string(line, node=self.node, instance=self.instance, server=self,
+                                        admin_channel=admin_channel)
+                    for line in template.readlines()
+                )
+            # only write the config, if it has changed
+            config_file = os.path.join(bot_home, 'DCSServerBotConfig.lua')
+            if os.path.exists(config_file):
+                with open(config_file, mode='r', encoding='utf-8') as infile:
+                    if infile.read() == config:
+                        config = None
+            if config is not None:
+                with open(config_file, mode='w', encoding='utf-8') as outfile:
+                    outfile.write(config)
         except KeyError as k:
             self.log.error(
                 f'! You must set a value for {k}. See README for help.')
             raise k
         except Exception as ex:
             self.log.exception(ex)
-        self.log.debug(f"  - Installing Plugin luas into {self.instance.name} ...")
-        for plugin_name in self.node.plugins:
-            source_path = f'./plugins/{plugin_name}/lua'
-            if os.path.exists(source_path):
-                target_path = os.path.join(bot_home, f'{plugin_name}')
-                shutil.copytree(source_path, target_path, dirs_exist_ok=True)
-                self.log.debug(f'    => Plugin {plugin_name.capitalize()} installed.')
-        self.log.debug(f'  - Luas installed into {self.instance.name}.')
+        with open(manifest_file, mode='w', encoding='utf-8') as outfile:
+            json.dump(installed, outfile, indent=2)
+        self.log.debug(f'  - Luas installed into {self.instance.name} ({copied} copied, {removed} removed, '
+                       f'{skipped} unchanged).')
 
     def prepare(self):
-        if self.settings['name'] != self.name:
-            self.settings['name'] = self.name
-        if 'serverSettings' in self.locals:
-            for key, value in self.locals['serverSettings'].items():
-                if key == 'advanced':
-                    self.settings['advanced'] = self.settings['advanced'] | value
-                else:
-                    self.settings[key] = value
+        # write serverSettings.lua only once
+        with self.settings.batch():
+            if self.settings['name'] != self.name:
+                self.settings['name'] = self.name
+            if 'serverSettings' in self.locals:
+                for key, value in self.locals['serverSettings'].items():
+                    if key == 'advanced':
+                        self.settings['advanced'] = self.settings['advanced'] | value
+                    else:
+                        self.settings[key] = value
         self._install_luas()
         # enable autoscan for missions changes
         if self.locals.get('autoscan', False):
@@ -1,6 +1,6 @@
 from __future__ import annotations
 import discord
-from core import DataObjectFactory, DataObject, utils
+from core import DataObjectFactory, DataObject, ProfileCache, utils
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -16,15 +16,16 @@ class Member(DataObject):
     banned: bool = field(default=False, init=False)
     _verified: bool = field(default=False, init=False)
 
-    def __post_init__(self):
-        super().__post_init__()
-        with self.pool.connection() as conn:
-            row = conn.execute("""
+    async def load(self):
+        # has to be awaited after the creation of a new member to read the member data from the database
+        async with self.apool.connection() as conn:
+            cursor = await conn.execute("""
                 SELECT p.ucid, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, manual 
                 FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid 
                 WHERE p.discord_id = %s AND p.name IS NOT NULL AND COALESCE(b.banned_until, NOW()) >= NOW()
                 ORDER BY manual DESC LIMIT 1
-            """, (self.member.id, )).fetchone()
+            """, (self.member.id, ))
+            row = await cursor.fetchone()
             if row:
                 self._ucid = row[0] if row[0] and utils.is_ucid(row[0]) else None
                 self.banned = row[1] is True
@@ -41,6 +42,7 @@ class Member(DataObject):
                 conn.execute('UPDATE players SET discord_id = %s WHERE ucid = %s', (self.member.id, ucid))
                 conn.execute('UPDATE players SET discord_id = -1 WHERE ucid = %s AND discord_id = %s',
                              (self._ucid, self.member.id))
+        ProfileCache().invalidate(ucid, self._ucid)
         self._ucid = ucid
 
     @property
@@ -52,6 +54,7 @@ class Member(DataObject):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET manual = %s WHERE ucid = %s', (flag, self._ucid))
+        ProfileCache().invalidate(self._ucid)
         self._verified = flag
 
     def link(self, ucid: str, verified: bool = True):
@@ -61,6 +64,7 @@ class Member(DataObject):
             with conn.transaction():
                 conn.execute('UPDATE players SET discord_id = %s, manual = %s WHERE ucid = %s',
                              (self.member.id, verified, ucid))
+        ProfileCache().invalidate(ucid)
 
     def unlink(self, ucid):
         self._ucid = None
@@ -68,3 +72,4 @@ class Member(DataObject):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET discord_id = -1, manual = FALSE WHERE ucid = %s', (ucid, ))
+        ProfileCache().invalidate(ucid)
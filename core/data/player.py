@@ -1,9 +1,9 @@
 from __future__ import annotations
 import discord
-from contextlib import closing
 from core import utils
 from core.data.dataobject import DataObject, DataObjectFactory
 from core.data.const import Side, Coalition
+from core.data.profilecache import ProfileCache
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Optional
 
@@ -25,7 +25,7 @@ class Player(DataObject):
     active: bool = field(compare=False)
     side: Side = field(compare=False)
     ucid: str
-    banned: bool = field(compare=False, init=False)
+    banned: bool = field(compare=False, init=False, default=False)
     slot: int = field(compare=False, default=0)
     sub_slot: int = field(compare=False, default=0)
     unit_callsign: str = field(compare=False, default='')
@@ -46,37 +46,52 @@ class Player(DataObject):
         self.bot = ServiceRegistry.get("Bot").bot
         if self.id == 1:
             self.active = False
+
+    def __setattr__(self, key, value):
+        # keep the player indexes of the server in sync
+        if key in ('name', 'active', 'slot', '_member') and key in self.__dict__ and self.__dict__[key] != value \
+                and self.server.players.get(self.id) is self:
+            self.server.unindex_player(self)
+            super().__setattr__(key, value)
+            self.server.index_player(self)
+        else:
+            super().__setattr__(key, value)
+
+    async def load(self):
+        # has to be awaited after the creation of a new player to read the player data from the database
+        if self.id == 1:
             return
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                with closing(conn.cursor()) as cursor:
-                    cursor.execute("""
-                        SELECT p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned, 
-                               p.manual, c.coalition, p.watchlist, p.vip 
-                        FROM players p LEFT OUTER JOIN bans b ON p.ucid = b.ucid 
-                        LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid 
-                        WHERE p.ucid = %s AND COALESCE(b.banned_until, NOW()) >= NOW()
-                    """, (self.ucid, ))
-                    # existing member found?
-                    if cursor.rowcount == 1:
-                        row = cursor.fetchone()
-                        if row[0] != -1:
-                            self._member = self.bot.guilds[0].get_member(row[0])
-                            self._verified = row[2]
-                        self.banned = row[1]
-                        if row[3]:
-                            self.coalition = Coalition.RED if row[3] == 'red' else Coalition.BLUE
-                        self._watchlist = row[4]
-                        self._vip = row[5]
-                    cursor.execute("""
+        cache = ProfileCache()
+        profile = (await cache.load(self.apool, [self.ucid])).get(self.ucid)
+        if profile:
+            # existing member found
+            if profile['discord_id'] != -1:
+                self._member = self.bot.guilds[0].get_member(profile['discord_id'])
+                self._verified = profile['manual']
+            self.banned = profile['banned']
+            coalition = profile['coalitions'].get(self.server.name)
+            if coalition:
+                self.coalition = Coalition.RED if coalition == 'red' else Coalition.BLUE
+            self._watchlist = profile['watchlist']
+            self._vip = profile['vip']
+            cache.touch(self.apool, self.ucid, self.name)
+        else:
+            # new players are written immediately, as other plugins rely on them
+            async with self.apool.connection() as conn:
+                async with conn.transaction():
+                    await conn.execute("""
                         INSERT INTO players (ucid, discord_id, name, last_seen) VALUES (%s, -1, %s, NOW()) 
                         ON CONFLICT (ucid) DO UPDATE SET name=excluded.name, last_seen=excluded.last_seen
-                        """, (self.ucid, self.name))
-        # if automatch is enabled, try to match the user
-        if not self.member and self.bot.locals.get('automatch', True):
+                    """, (self.ucid, self.name))
+            profile = cache.new_profile()
+            cache.put(self.ucid, profile)
+        # if automatch is enabled, try to match the user (unless that failed already for this name)
+        if not self.member and self.bot.locals.get('automatch', True) and profile.get('unmatched') != self.name:
             discord_user = self.bot.match_user({"ucid": self.ucid, "name": self.name})
             if discord_user:
                 self.member = discord_user
+            else:
+                profile['unmatched'] = self.name
 
     def is_active(self) -> bool:
         return self.active
@@ -98,6 +113,7 @@ class Player(DataObject):
                 with conn.transaction():
                     conn.execute('UPDATE players SET discord_id = %s WHERE ucid = %s',
                                  (member.id if member else -1, self.ucid))
+            ProfileCache().invalidate(self.ucid)
             self._member = member
             self.server.send_to_dcs({
                 'command': 'uploadUserRoles',
@@ -115,6 +131,7 @@ class Player(DataObject):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET manual = %s WHERE ucid = %s', (verified, self.ucid))
+        ProfileCache().invalidate(self.ucid)
         self._verified = verified
 
     @property
@@ -126,6 +143,7 @@ class Player(DataObject):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET watchlist = %s WHERE ucid = %s', (watchlist, self.ucid))
+        ProfileCache().invalidate(self.ucid)
         self._watchlist = watchlist
 
     @property
@@ -137,6 +155,7 @@ class Player(DataObject):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET vip = %s WHERE ucid = %s', (vip, self.ucid))
+        ProfileCache().invalidate(self.ucid)
         self._vip = vip
 
     @property
@@ -162,40 +181,36 @@ class Player(DataObject):
     def display_name(self) -> str:
         return utils.escape_string(self.name)
 
-    def update(self, data: dict):
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                with closing(conn.cursor()) as cursor:
-                    if 'id' in data:
-                        # if the ID has changed (due to reconnect), we need to update the server list
-                        if self.id != data['id']:
-                            del self.server.players[self.id]
-                            self.server.players[data['id']] = self
-                            self.id = data['id']
-                    if 'active' in data:
-                        self.active = data['active']
-                    if 'name' in data and self.name != data['name']:
-                        self.name = data['name']
-                        cursor.execute('UPDATE players SET name = %s WHERE ucid = %s', (self.name, self.ucid))
-                    if 'side' in data:
-                        self.side = Side(data['side'])
-                    if 'slot' in data:
-                        self.slot = int(data['slot'])
-                    if 'sub_slot' in data:
-                        self.sub_slot = data['sub_slot']
-                    if 'unit_callsign' in data:
-                        self.unit_callsign = data['unit_callsign']
-                    if 'unit_name' in data:
-                        self.unit_name = data['unit_name']
-                    if 'unit_type' in data:
-                        self.unit_type = data['unit_type']
-                    if 'group_name' in data:
-                        self.group_name = data['group_name']
-                    if 'group_id' in data:
-                        self.group_id = data['group_id']
-                    if 'unit_display_name' in data:
-                        self.unit_display_name = data['unit_display_name']
-                    cursor.execute('UPDATE players SET last_seen = NOW() WHERE ucid = %s', (self.ucid, ))
+    async def update(self, data: dict):
+        if 'id' in data:
+            # if the ID has changed (due to reconnect), we need to update the server list
+            if self.id != data['id']:
+                self.server.remove_player(self)
+                self.id = data['id']
+                self.server.add_player(self)
+        if 'active' in data:
+            self.active = data['active']
+        if 'name' in data and self.name != data['name']:
+            self.name = data['name']
+        if 'side' in data:
+            self.side = Side(data['side'])
+        if 'slot' in data:
+            self.slot = int(data['slot'])
+        if 'sub_slot' in data:
+            self.sub_slot = data['sub_slot']
+        if 'unit_callsign' in data:
+            self.unit_callsign = data['unit_callsign']
+        if 'unit_name' in data:
+            self.unit_name = data['unit_name']
+        if 'unit_type' in data:
+            self.unit_type = data['unit_type']
+        if 'group_name' in data:
+            self.group_name = data['group_name']
+        if 'group_id' in data:
+            self.group_id = data['group_id']
+        if 'unit_display_name' in data:
+            self.unit_display_name = data['unit_display_name']
+        ProfileCache().touch(self.apool, self.ucid, self.name)
 
     def has_discord_roles(self, roles: list[str]) -> bool:
         valid_roles = []
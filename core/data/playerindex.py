@@ -0,0 +1,252 @@
+from __future__ import annotations
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+
+from itertools import islice
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+__all__ = ["PlayerIndex"]
+
+LINKED = 1
+WATCHLIST = 2
+VIP = 4
+DELETED = 128
+
+
+# In-memory search index over the names and ucids of all players, used by the autocompletion. Names are indexed by
+# their trigrams, shorter search strings are answered by a prefix search over the sorted names. Changes to the players
+# table are fed in by the ProfileCache (touch() and invalidate()), changed players are re-read before the next search.
+class PlayerIndex:
+    _instance = None
+
+    def __new__(cls) -> PlayerIndex:
+        if cls._instance is None:
+            self = super(PlayerIndex, cls).__new__(cls)
+            self.log = logging.getLogger(__name__)
+            # full reloads, to catch changes of other nodes
+            self.ttl = 3600
+            self.loaded: Optional[float] = None
+            self.load_task: Optional[asyncio.Task] = None
+            self.dirty: set[str] = set()
+            self._clear()
+            cls._instance = self
+        return cls._instance
+
+    def _clear(self):
+        self.ucids: list[str] = []
+        self.names: list[str] = []
+        self.folded: list[str] = []
+        self.flags = bytearray()
+        self.discord_ids: list[int] = []
+        # number of players that are linked to a discord member
+        self.links: dict[int, int] = {}
+        self.positions: dict[str, int] = {}
+        self.trigrams: dict[str, set[int]] = {}
+        # sorted (folded name, position) and ucid lists for the prefix search
+        self.sorted_names: list[tuple[str, int]] = []
+        self.sorted_ucids: list[str] = []
+
+    @staticmethod
+    def _trigrams(folded: str) -> set[str]:
+        return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+    @staticmethod
+    def _flags(discord_id: int, watchlist: bool, vip: bool) -> int:
+        return (LINKED if discord_id != -1 else 0) | (WATCHLIST if watchlist else 0) | (VIP if vip else 0)
+
+    def _link(self, discord_id: int, count: int):
+        if discord_id == -1:
+            return
+        self.links[discord_id] = self.links.get(discord_id, 0) + count
+        if not self.links[discord_id]:
+            del self.links[discord_id]
+
+    def _add(self, ucid: str, name: Optional[str], discord_id: int, flags: int):
+        name = name or ''
+        folded = name.casefold()
+        pos = self.positions.get(ucid)
+        if pos is None:
+            pos = len(self.ucids)
+            self.positions[ucid] = pos
+            self.ucids.append(ucid)
+            self.names.append(name)
+            self.folded.append(folded)
+            self.flags.append(flags)
+            self.discord_ids.append(discord_id)
+            self._link(discord_id, 1)
+            bisect.insort(self.sorted_ucids, ucid)
+        else:
+            self.flags[pos] = flags
+            self._link(self.discord_ids[pos], -1)
+            self.discord_ids[pos] = discord_id
+            self._link(discord_id, 1)
+            if self.folded[pos] == folded:
+                self.names[pos] = name
+                return
+            self._remove_name(pos)
+            self.names[pos] = name
+            self.folded[pos] = folded
+        for trigram in self._trigrams(folded):
+            self.trigrams.setdefault(trigram, set()).add(pos)
+        bisect.insort(self.sorted_names, (folded, pos))
+
+    def _remove_name(self, pos: int):
+        folded = self.folded[pos]
+        for trigram in self._trigrams(folded):
+            postings = self.trigrams.get(trigram)
+            if postings:
+                postings.discard(pos)
+        idx = bisect.bisect_left(self.sorted_names, (folded, pos))
+        if idx < len(self.sorted_names) and self.sorted_names[idx] == (folded, pos):
+            del self.sorted_names[idx]
+
+    async def load(self, apool: AsyncConnectionPool):
+        async with apool.connection() as conn:
+            cursor = await conn.execute("""
+                SELECT ucid, name, discord_id, watchlist, vip FROM players WHERE length(ucid) = 32 
+                ORDER BY last_seen NULLS FIRST
+            """)
+            rows = await cursor.fetchall()
+        # changes that happen during the load are re-read afterward (see refresh())
+        self._clear()
+        for ucid, name, discord_id, watchlist, vip in rows:
+            pos = len(self.ucids)
+            folded = (name or '').casefold()
+            self.positions[ucid] = pos
+            self.ucids.append(ucid)
+            self.names.append(name or '')
+            self.folded.append(folded)
+            self.flags.append(self._flags(discord_id, watchlist, vip))
+            self.discord_ids.append(discord_id)
+            self._link(discord_id, 1)
+            for trigram in self._trigrams(folded):
+                self.trigrams.setdefault(trigram, set()).add(pos)
+        self.sorted_names = sorted(zip(self.folded, range(len(self.folded))))
+        self.sorted_ucids = sorted(self.ucids)
+        self.loaded = time.monotonic()
+        self.log.debug(f"Player index loaded with {len(self.ucids)} players.")
+
+    async def _load_dirty(self, apool: AsyncConnectionPool):
+        dirty = list(self.dirty)
+        self.dirty.clear()
+        async with apool.connection() as conn:
+            cursor = await conn.execute("""
+                SELECT ucid, name, discord_id, watchlist, vip FROM players WHERE ucid = ANY(%s)
+            """, (dirty, ))
+            rows = {row[0]: row for row in await cursor.fetchall()}
+        for ucid in dirty:
+            row = rows.get(ucid)
+            if row:
+                self._add(ucid, row[1], row[2], self._flags(row[2], row[3], row[4]))
+            elif ucid in self.positions:
+                pos = self.positions[ucid]
+                self.flags[pos] = DELETED
+                self._link(self.discord_ids[pos], -1)
+                self.discord_ids[pos] = -1
+
+    @property
+    def loading(self) -> bool:
+        return self.load_task is not None and not self.load_task.done()
+
+    async def refresh(self, apool: AsyncConnectionPool):
+        if self.loaded is None:
+            if not self.loading:
+                self.load_task = asyncio.create_task(self.load(apool))
+            await asyncio.shield(self.load_task)
+        elif time.monotonic() - self.loaded > self.ttl and not self.loading:
+            # reload in the background, the old index is used in the meantime
+            self.load_task = asyncio.create_task(self.load(apool))
+        if self.dirty and not self.loading:
+            await self._load_dirty(apool)
+
+    def touch(self, ucid: str, name: str):
+        if self.loaded is None or len(ucid) != 32:
+            return
+        elif self.loading:
+            # the index is being reloaded
+            self.dirty.add(ucid)
+            return
+        pos = self.positions.get(ucid)
+        if pos is not None:
+            self._add(ucid, name, self.discord_ids[pos], self.flags[pos] & ~DELETED)
+        else:
+            self._add(ucid, name, -1, 0)
+
+    def invalidate(self, *ucids: str):
+        # invalidate() without parameters reloads the whole index
+        if not ucids:
+            self.loaded = None
+            self.dirty.clear()
+        elif self.loaded is not None:
+            self.dirty.update(x for x in ucids if x and len(x) == 32)
+
+    async def get_linked(self, apool: AsyncConnectionPool) -> list[int]:
+        await self.refresh(apool)
+        return list(self.links.keys())
+
+    async def search(self, apool: AsyncConnectionPool, current: Optional[str], *, linked: Optional[bool] = None,
+                     watchlist: Optional[bool] = None, vip: Optional[bool] = None,
+                     limit: int = 25) -> list[tuple[str, str]]:
+        await self.refresh(apool)
+        required = (WATCHLIST if watchlist else 0) | (VIP if vip else 0)
+
+        def matches(pos: int) -> bool:
+            flags = self.flags[pos]
+            if flags & DELETED or flags & required != required:
+                return False
+            return linked is None or bool(flags & LINKED) == linked
+
+        if not current:
+            # latest players first
+            positions = (pos for pos in range(len(self.ucids) - 1, -1, -1) if matches(pos))
+            return [(self.ucids[pos], self.names[pos]) for pos in islice(positions, limit)]
+        current = current.casefold()
+        # score: 0 = exact match, 1 = prefix, 2 = prefix of a word, 3 = substring, 4 = ucid prefix
+        scores: dict[int, tuple[int, int]] = {}
+        idx = bisect.bisect_left(self.sorted_names, (current, -1))
+        while idx < len(self.sorted_names) and len(scores) < limit:
+            folded, pos = self.sorted_names[idx]
+            if not folded.startswith(current):
+                break
+            if matches(pos):
+                scores[pos] = (0 if folded == current else 1, len(folded))
+            idx += 1
+        if len(current) >= 3:
+            trigrams = sorted((self.trigrams.get(x, set()) for x in self._trigrams(current)), key=len)
+            candidates = set.intersection(*trigrams) if trigrams else set()
+            for pos in candidates:
+                if pos in scores or not matches(pos):
+                    continue
+                folded = self.folded[pos]
+                idx = folded.find(current)
+                if idx < 0:
+                    continue
+                scores[pos] = (1 if idx == 0 else 2 if not folded[idx - 1].isalnum() else 3, len(folded))
+        elif len(scores) < limit:
+            # short search strings don't have trigrams, so the names have to be scanned
+            for pos, folded in enumerate(self.folded):
+                if current in folded and pos not in scores and matches(pos):
+                    scores[pos] = (3, len(folded))
+                    if len(scores) >= limit:
+                        break
+        if len(scores) < limit and current.isalnum():
+            idx = bisect.bisect_left(self.sorted_ucids, current)
+            while idx < len(self.sorted_ucids) and len(scores) < limit:
+                ucid = self.sorted_ucids[idx]
+                if not ucid.startswith(current):
+                    break
+                pos = self.positions[ucid]
+                if pos not in scores and matches(pos):
+                    scores[pos] = (4, 0)
+                idx += 1
+        return [
+            (self.ucids[pos], self.names[pos])
+            for pos in heapq.nsmallest(limit, scores.keys(), key=lambda x: scores[x])
+        ]
+
@@ -0,0 +1,137 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+
+from collections import OrderedDict
+from psycopg.rows import dict_row
+
+from .playerindex import PlayerIndex
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+__all__ = ["ProfileCache"]
+
+
+# Caches the player profiles (discord link, ban-, watchlist- and VIP-status, coalitions) for a while, to avoid
+# database round trips on every (re-)connect of a player. Writes to the players table have to invalidate the
+# respective profile, which also updates the player search index.
+class ProfileCache:
+    _instance = None
+
+    def __new__(cls) -> ProfileCache:
+        if cls._instance is None:
+            self = super(ProfileCache, cls).__new__(cls)
+            self.log = logging.getLogger(__name__)
+            self.ttl = 300
+            self.max_size = 5000
+            self.flush_delay = 5
+            self.profiles: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+            self.pending: dict[str, str] = dict()
+            self.apool: Optional[AsyncConnectionPool] = None
+            self.flush_task: Optional[asyncio.Task] = None
+            cls._instance = self
+        return cls._instance
+
+    @staticmethod
+    def new_profile() -> dict:
+        return {
+            "discord_id": -1,
+            "banned": False,
+            "manual": False,
+            "coalitions": {},
+            "watchlist": False,
+            "vip": False
+        }
+
+    def get(self, ucid: str) -> Optional[dict]:
+        entry = self.profiles.get(ucid)
+        if not entry:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self.profiles[ucid]
+            return None
+        self.profiles.move_to_end(ucid)
+        return entry[1]
+
+    def put(self, ucid: str, profile: dict):
+        self.profiles[ucid] = (time.monotonic(), profile)
+        self.profiles.move_to_end(ucid)
+        while len(self.profiles) > self.max_size:
+            self.profiles.popitem(last=False)
+
+    def invalidate(self, *ucids: str):
+        # invalidate() without parameters clears the whole cache
+        if not ucids:
+            self.profiles.clear()
+        for ucid in ucids:
+            self.profiles.pop(ucid, None)
+        PlayerIndex().invalidate(*ucids)
+
+    async def load(self, apool: AsyncConnectionPool, ucids: list[str]) -> dict[str, dict]:
+        profiles = {}
+        missing = []
+        for ucid in ucids:
+            profile = self.get(ucid)
+            if profile:
+                profiles[ucid] = profile
+            else:
+                missing.append(ucid)
+        if not missing:
+            return profiles
+        async with apool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute("""
+                    SELECT p.ucid, p.discord_id, CASE WHEN b.ucid IS NOT NULL THEN TRUE ELSE FALSE END AS banned,
+                           p.manual, c.server_name, c.coalition, p.watchlist, p.vip
+                    FROM players p LEFT OUTER JOIN bans b ON (p.ucid = b.ucid AND b.banned_until >= NOW())
+                    LEFT OUTER JOIN coalitions c ON p.ucid = c.player_ucid
+                    WHERE p.ucid = ANY(%s)
+                """, (missing, ))
+                async for row in cursor:
+                    profile = profiles.get(row['ucid'])
+                    if not profile:
+                        profile = profiles[row['ucid']] = {
+                            "discord_id": row['discord_id'],
+                            "banned": row['banned'],
+                            "manual": row['manual'],
+                            "coalitions": {},
+                            "watchlist": row['watchlist'],
+                            "vip": row['vip']
+                        }
+                        self.put(row['ucid'], profile)
+                    if row['coalition']:
+                        profile['coalitions'][row['server_name']] = row['coalition']
+        return profiles
+
+    def touch(self, apool: AsyncConnectionPool, ucid: str, name: str):
+        # name and last_seen are written with a short delay, to combine the updates of many players
+        self.apool = apool
+        self.pending[ucid] = name
+        PlayerIndex().touch(ucid, name)
+        if not self.flush_task or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self):
+        if not self.pending or not self.apool:
+            return
+        pending = self.pending
+        self.pending = {}
+        try:
+            async with self.apool.connection() as conn:
+                async with conn.transaction():
+                    async with conn.cursor() as cursor:
+                        await cursor.executemany("""
+                            INSERT INTO players (ucid, discord_id, name, last_seen) VALUES (%s, -1, %s, NOW())
+                            ON CONFLICT (ucid) DO UPDATE SET name=excluded.name, last_seen=excluded.last_seen
+                        """, list(pending.items()))
+        except Exception as ex:
+            self.log.exception(ex)
+            # newer updates win
+            self.pending = pending | self.pending
@@ -19,6 +19,7 @@ class NodeProxy(Node):
         super().__init__(name)
         self.local_node = local_node
         self.pool = self.local_node.pool
+        self.apool = self.local_node.apool
         self.log = self.local_node.log
         self._public_ip = public_ip
         self.locals = self.read_locals()
@@ -47,6 +47,16 @@ class Server(DataObject):
     current_mission: Mission = field(default=None, compare=False)
     mission_id: int = field(default=-1, compare=False)
     players: dict[int, Player] = field(default_factory=dict, compare=False)
+    # player indexes, maintained by add_player(), remove_player() and index_player()
+    # a ucid, name or discord id can belong to more than one player (reconnects, same names), so they map to the ids
+    _players_by_ucid: dict[str, dict[int, Player]] = field(default_factory=dict, compare=False, init=False,
+                                                           repr=False)
+    _players_by_name: dict[str, dict[int, Player]] = field(default_factory=dict, compare=False, init=False,
+                                                           repr=False)
+    _players_by_discord_id: dict[int, dict[int, Player]] = field(default_factory=dict, compare=False, init=False,
+                                                                 repr=False)
+    _active_players: dict[int, Player] = field(default_factory=dict, compare=False, init=False, repr=False)
+    _crews: dict[int, dict[int, Player]] = field(default_factory=dict, compare=False, init=False, repr=False)
     process: Optional[Process] = field(default=None, compare=False)
     _maintenance: bool = field(compare=False, default=False)
     restart_pending: bool = field(default=False, compare=False)
@@ -173,41 +183,85 @@ class Server(DataObject):
         ...
 
     def add_player(self, player: Player):
+        old = self.players.get(player.id)
+        if old:
+            self.unindex_player(old)
         self.players[player.id] = player
+        self.index_player(player)
+
+    def remove_player(self, player: Player):
+        if self.players.get(player.id) is player:
+            self.unindex_player(player)
+            del self.players[player.id]
+
+    def clear_players(self):
+        self.players.clear()
+        self._players_by_ucid.clear()
+        self._players_by_name.clear()
+        self._players_by_discord_id.clear()
+        self._active_players.clear()
+        self._crews.clear()
+
+    def index_player(self, player: Player):
+        # the server user (id 1) is only available by id
+        if player.id == 1:
+            return
+        self._players_by_ucid.setdefault(player.ucid, {})[player.id] = player
+        self._players_by_name.setdefault(player.name, {})[player.id] = player
+        if player.member:
+            self._players_by_discord_id.setdefault(player.member.id, {})[player.id] = player
+        if player.active:
+            self._active_players[player.id] = player
+            self._crews.setdefault(player.slot, {})[player.id] = player
+
+    def unindex_player(self, player: Player):
+        if player.id == 1:
+            return
+        for index, key in [(self._players_by_ucid, player.ucid), (self._players_by_name, player.name),
+                           (self._players_by_discord_id, player.member.id if player.member else None)]:
+            players = index.get(key)
+            if players and players.get(player.id) is player:
+                del players[player.id]
+                if not players:
+                    del index[key]
+        if self._active_players.get(player.id) is player:
+            del self._active_players[player.id]
+        crew = self._crews.get(player.slot)
+        if crew and crew.get(player.id) is player:
+            del crew[player.id]
+            if not crew:
+                del self._crews[player.slot]
 
     def get_player(self, **kwargs) -> Optional[Player]:
         if 'id' in kwargs:
             return self.players.get(kwargs['id'])
-        for player in self.players.values():
-            if player.id == 1:
-                continue
-            if 'active' in kwargs and player.active != kwargs['active']:
-                continue
-            if 'ucid' in kwargs and player.ucid == kwargs['ucid']:
-                return player
-            if 'name' in kwargs and player.name == kwargs['name']:
-                return player
-            if 'discord_id' in kwargs and player.member and player.member.id == kwargs['discord_id']:
+        if 'ucid' in kwargs:
+            players = self._players_by_ucid.get(kwargs['ucid'])
+        elif 'name' in kwargs:
+            players = self._players_by_name.get(kwargs['name'])
+        elif 'discord_id' in kwargs:
+            players = self._players_by_discord_id.get(kwargs['discord_id'])
+        else:
+            return None
+        # the lowest id wins, as players are added in the order of their ids
+        for _, player in sorted((players or {}).items()):
+            if 'active' not in kwargs or player.active == kwargs['active']:
                 return player
         return None
 
     def get_active_players(self) -> list[Player]:
-        return [x for x in self.players.values() if x.active]
+        return list(self._active_players.values())
 
     def get_crew_members(self, pilot: Player):
-        members = []
-        if pilot:
-            # now find players that have the same slot
-            for player in self.players.values():
-                if player.active and player.slot == pilot.slot:
-                    members.append(player)
-        return members
+        if not pilot:
+            return []
+        return list(self._crews.get(pilot.slot, {}).values())
 
     def is_populated(self) -> bool:
         if self.status != Status.RUNNING:
             return False
-        for player in self.players.values():
-            if player.active and player.side != Side.SPECTATOR:
+        for player in self._active_players.values():
+            if player.side != Side.SPECTATOR:
                 return True
         return False
 
@@ -1,5 +1,4 @@
 from __future__ import annotations
-import io
 import shutil
 
 import luadata
@@ -32,10 +31,10 @@ class MizFile:
         try:
             with zipfile.ZipFile(self.filename, 'r') as miz:
                 with miz.open('mission') as mission:
-                    self.mission = luadata.unserialize(io.TextIOWrapper(mission, encoding='utf-8').read(), 'utf-8')
+                    self.mission = luadata.unserialize(mission.read(), 'utf-8')
                 try:
                     with miz.open('options') as options:
-                        self.options = luadata.unserialize(io.TextIOWrapper(options, encoding='utf-8').read(), 'utf-8')
+                        self.options = luadata.unserialize(options.read(), 'utf-8')
                 except FileNotFoundError:
                     pass
         except Exception:
@@ -232,6 +232,7 @@ class Plugin(commands.Cog):
         self.bus: ServiceBus = ServiceRegistry.get("ServiceBus")
         self.log = self.bot.log
         self.pool = self.bot.pool
+        self.apool = self.bot.apool
         self.loop = self.bot.loop
         self.locals = self.read_locals()
         if self.plugin_name != 'commands' and 'commands' in self.locals:
@@ -279,7 +280,8 @@ class Plugin(commands.Cog):
                     break
 
     async def install(self) -> bool:
-        if self._init_db():
+        # plugins are installed in parallel on startup, so the database work runs in a thread
+        if await asyncio.to_thread(self._init_db):
             # create report directories for convenience
             source_path = f'./plugins/{self.plugin_name}/reports'
             if path.exists(source_path):
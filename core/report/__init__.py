@@ -2,3 +2,4 @@ from .env import *
 from .elements import *
 from .errors import *
 from .base import *
+from .renderer import *
@@ -1,13 +1,17 @@
 import asyncio
+import inspect
+
 from contextlib import closing
 from core import utils
 from core.report.errors import ValueNotInRange
+from functools import lru_cache
 from psycopg.rows import dict_row
 from typing import Any, Tuple
 
 __all__ = [
     "parse_params",
-    "parse_input"
+    "parse_input",
+    "get_parameters"
 ]
 
 
@@ -55,3 +59,8 @@ async def parse_input(self, kwargs: dict, params: list[Any]):
             except (TimeoutError, asyncio.TimeoutError):
                 new_args[param['callback']] = None
     return new_args
+
+
+@lru_cache(maxsize=None)
+def get_parameters(func) -> frozenset[str]:
+    return frozenset(inspect.signature(func).parameters.keys())
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import discord
-import inspect
+import hashlib
 import json
 import os
 import sys
+import time
 
 from abc import ABC, abstractmethod
 from core import utils, Channel
@@ -18,7 +19,7 @@ from typing import Tuple, Optional, TYPE_CHECKING, Any, cast, Union
 from .elements import ReportElement
 from .env import ReportEnv
 from .errors import UnknownReportElement, ClassNotFound
-from .__utils import parse_input, parse_params
+from .__utils import parse_input, parse_params, get_parameters
 
 if TYPE_CHECKING:
     from core import Server
@@ -31,6 +32,21 @@ __all__ = [
     "PersistentReport"
 ]
 
+# parsed report definitions by filename: (mtime, definition)
+_definitions: dict[str, tuple[float, dict]] = {}
+
+
+def load_definition(filename: str) -> dict:
+    # the definitions are shared between all reports, so they must not be changed
+    mtime = os.path.getmtime(filename)
+    cached = _definitions.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(filename, encoding='utf-8') as file:
+        report_def = json.load(file)
+    _definitions[filename] = (mtime, report_def)
+    return report_def
+
 
 class Report:
 
@@ -47,8 +63,7 @@ class Report:
             self.filename = default
         else:
             raise FileNotFoundError(filename)
-        with open(self.filename, encoding='utf-8') as file:
-            self.report_def = json.load(file)
+        self.report_def = load_definition(self.filename)
 
     async def render(self, *args, **kwargs) -> ReportEnv:
         if 'input' in self.report_def:
@@ -97,12 +112,12 @@ class Report:
                         raise UnknownReportElement(str(element))
                     if element_class:
                         # remove parameters, that are not in the class __init__ signature
-                        signature = inspect.signature(element_class.__init__).parameters.keys()
+                        signature = get_parameters(element_class.__init__)
                         class_args = {name: value for name, value in element_args.items() if name in signature}
                         element_class = element_class(self.env, **class_args)
                         if isinstance(element_class, ReportElement):
                             # remove parameters, that are not in the render classes signature
-                            signature = inspect.signature(element_class.render).parameters.keys()
+                            signature = get_parameters(type(element_class).render)
                             render_args = {name: value for name, value in element_args.items() if name in signature}
                             try:
                                 await element_class.render(**render_args)
@@ -302,25 +317,65 @@ class PaginationReport(Report):
 
 
 class PersistentReport(Report):
+    # last output per embed: (input key, content hash, timestamp)
+    _outputs: dict[tuple[str, str, str], tuple[Optional[str], str, float]] = {}
+    # re-send unchanged embeds after a while, in case the message was deleted
+    max_age = 86400
 
     def __init__(self, bot: DCSServerBot, plugin: str, filename: str, *, embed_name: str,
-                 channel_id: Optional[Union[Channel, int]] = Channel.STATUS, server: Optional[Server] = None):
+                 channel_id: Optional[Union[Channel, int]] = Channel.STATUS, server: Optional[Server] = None,
+                 version: Optional[Any] = None):
         super().__init__(bot, plugin, filename)
         self.server = server
         self.embed_name: str = embed_name
         self.channel_id: Union[Channel, int] = channel_id
-
-    async def render(self, *args, **kwargs) -> ReportEnv:
+        # if a data version is given, the report is not rendered again, as long as the version and params don't change
+        self.version = version
+
+    def get_input_key(self, kwargs: dict) -> Optional[str]:
+        if self.version is None:
+            return None
+
+        def default(obj: Any) -> str:
+            return getattr(obj, 'name', None) or getattr(obj, '__name__', None) or repr(obj)
+
+        data = json.dumps([self.filename, os.path.getmtime(self.filename), self.version, kwargs],
+                          sort_keys=True, default=default)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_content_hash(env: ReportEnv) -> str:
+        digest = hashlib.sha1(json.dumps(env.embed.to_dict(), sort_keys=True, default=str).encode('utf-8'))
+        if env.buffer:
+            digest.update(env.buffer.getvalue())
+        elif env.filename and path.exists(env.filename):
+            with open(env.filename, mode='rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    async def render(self, *args, **kwargs) -> Optional[ReportEnv]:
         env = None
+        key = (self.server.name if self.server else 'Master', self.embed_name, str(self.channel_id))
         try:
+            input_key = self.get_input_key(kwargs)
+            last = self._outputs.get(key)
+            if input_key and last and last[0] == input_key and time.time() - last[2] < self.max_age:
+                return None
             env = await super().render(*args, **kwargs)
+            content_hash = self.get_content_hash(env)
+            if last and last[1] == content_hash and time.time() - last[2] < self.max_age:
+                # nothing has changed, so we don't need to update the message
+                self._outputs[key] = (input_key, content_hash, last[2])
+                return env
             file = discord.File(fp=env.buffer or env.filename, filename=os.path.basename(env.filename)) if env.filename else MISSING
-            await self.bot.setEmbed(embed_name=self.embed_name, embed=env.embed, channel_id=self.channel_id,
-                                    file=file, server=self.server)
+            if await self.bot.setEmbed(embed_name=self.embed_name, embed=env.embed, channel_id=self.channel_id,
+                                       file=file, server=self.server):
+                self._outputs[key] = (input_key, content_hash, time.time())
             return env
         except Exception as ex:
             self.log.exception(ex)
         finally:
             if env and env.filename:
-                env.buffer.close()
+                if env.buffer:
+                    env.buffer.close()
                 env.filename = None
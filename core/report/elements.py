@@ -2,8 +2,6 @@ from __future__ import annotations
 
 import asyncio
 import discord
-import inspect
-import numpy as np
 import os
 import sys
 import uuid
@@ -11,19 +9,20 @@ import uuid
 from abc import ABC, abstractmethod
 from contextlib import closing
 from core import utils
-from datetime import timedelta, datetime
+from datetime import datetime
 from discord import ButtonStyle, Interaction
 from io import BytesIO
-from matplotlib import pyplot as plt
 from psycopg.rows import dict_row
 from typing import Optional, Any, TYPE_CHECKING, Union
 
 from .env import ReportEnv
 from .errors import UnknownGraphElement, ClassNotFound, TooManyElements, UnknownValue, NothingToPlot
-from .__utils import parse_params
+from .renderer import AxesRecorder, FACECOLOR, PieLabel, Renderer, setup_matplotlib
+from .__utils import parse_params, get_parameters
 
 
 if TYPE_CHECKING:
+    from matplotlib.figure import Figure
     from services import DCSServerBot
 
 __all__ = [
@@ -140,10 +139,19 @@ class Button(ReportElement):
 
 
 class GraphElement(ReportElement):
+    # Elements that only call methods on their axes without using the results can set this to True. Graphs that
+    # consist of such elements only are rendered in a separate process (see Renderer).
+    remote_capable = False
+
     def __init__(self, env: ReportEnv, rows: int, cols: int, row: int, col: int,
                  colspan: Optional[int] = 1, rowspan: Optional[int] = 1):
         super().__init__(env)
-        self.axes = plt.subplot2grid((rows, cols), (row, col), colspan=colspan, rowspan=rowspan, fig=self.env.figure)
+        grid = (rows, cols, row, col, rowspan, colspan)
+        if not self.env.figure:
+            self.axes = AxesRecorder(grid)
+        else:
+            axes = _add_subplot(self.env.figure, grid)
+            self.axes = AxesRecorder(grid, axes) if self.remote_capable else axes
 
     @abstractmethod
     async def render(self, **kwargs):
@@ -151,6 +159,8 @@ class GraphElement(ReportElement):
 
 
 class MultiGraphElement(ReportElement):
+    remote_capable = False
+
     def __init__(self, env: ReportEnv, rows: int, cols: int, params: list[dict]):
         super().__init__(env)
         self.axes = []
@@ -158,61 +168,77 @@ class MultiGraphElement(ReportElement):
             colspan = params[i]['colspan'] if 'colspan' in params[i] else 1
             rowspan = params[i]['rowspan'] if 'rowspan' in params[i] else 1
             sharex = params[i]['sharex'] if 'sharex' in params[i] else False
-            self.axes.append(plt.subplot2grid((rows, cols), (params[i]['row'], params[i]['col']), colspan=colspan,
-                                              rowspan=rowspan, fig=self.env.figure,
-                                              sharex=self.axes[-1] if sharex else None))
+            self.axes.append(_add_subplot(self.env.figure,
+                                          (rows, cols, params[i]['row'], params[i]['col'], rowspan, colspan),
+                                          sharex=self.axes[-1] if sharex else None))
 
     @abstractmethod
     async def render(self, **kwargs):
         ...
 
 
+def _add_subplot(figure: Figure, grid: tuple[int, int, int, int, int, int], **kwargs):
+    rows, cols, row, col, rowspan, colspan = grid
+    return figure.add_subplot(figure.add_gridspec(rows, cols)[row:row + rowspan, col:col + colspan], **kwargs)
+
+
 class Graph(ReportElement):
+    _style_applied = False
+
     def __init__(self, env: ReportEnv):
         super().__init__(env)
-        plt.switch_backend('agg')
+        # the style is applied once for graphs that are rendered in the bot process
+        if not Graph._style_applied:
+            setup_matplotlib(Renderer().rc)
+            Graph._style_applied = True
 
     def _plot(self):
-        plt.subplots_adjust(hspace=0.5, wspace=0.5)
+        self.env.figure.subplots_adjust(hspace=0.5, wspace=0.5)
         self.env.filename = f'{uuid.uuid4()}.png'
         self.env.buffer = BytesIO()
-        self.env.figure.savefig(self.env.buffer, format='png', bbox_inches='tight', facecolor='#2C2F33')
+        self.env.figure.savefig(self.env.buffer, format='png', bbox_inches='tight', facecolor=FACECOLOR)
         self.env.buffer.seek(0)
 
     async def render(self, width: int, height: int, cols: int, rows: int, elements: list[dict],
                      facecolor: Optional[str] = None):
-        plt.style.use('dark_background')
-        plt.rcParams['axes.facecolor'] = '2C2F33'
-        if 'cjk_font' in self.bot.locals.get('reports', {}):
-            plt.rcParams['font.family'] = [f"Noto Sans {self.bot.locals['reports']['cjk_font']}", 'sans-serif']
-        self.env.figure = plt.figure(figsize=(width, height))
-        try:
+        classes = []
+        for element in elements:
+            element_class = utils.str_to_class(element['class']) if 'class' in element else None
+            if not element_class and 'type' in element:
+                element_class = getattr(sys.modules[__name__], element['type'])
+            if not element_class:
+                raise ClassNotFound(element['class'])
+            elif not issubclass(element_class, (GraphElement, MultiGraphElement)):
+                raise UnknownGraphElement(element['class'])
+            classes.append(element_class)
+        remote = all(x.remote_capable for x in classes)
+        if not remote:
+            # matplotlib is only imported when the first graph is rendered in the bot process
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            self.env.figure = Figure(figsize=(width, height))
+            FigureCanvasAgg(self.env.figure)
             if facecolor:
                 self.env.figure.set_facecolor(facecolor)
+        try:
+            instances = []
             tasks = []
-            for element in elements:
+            for element, element_class in zip(elements, classes):
                 if 'params' in element:
                     element_args = parse_params(self.env.params, element['params'])
                 else:
                     element_args = self.env.params.copy()
-                element_class = utils.str_to_class(element['class']) if 'class' in element else None
-                if not element_class and 'type' in element:
-                    element_class = getattr(sys.modules[__name__], element['type'])
-                if element_class:
-                    # remove parameters, that are not in the class __init__ signature
-                    signature = inspect.signature(element_class.__init__).parameters.keys()
-                    class_args = {name: value for name, value in element_args.items() if name in signature}
-                    # instantiate the class
-                    element_class = element_class(self.env, rows, cols, **class_args)
-                    if isinstance(element_class, (GraphElement, MultiGraphElement)):
-                        # remove parameters, that are not in the render methods signature
-                        signature = inspect.signature(element_class.render).parameters.keys()
-                        render_args = {name: value for name, value in element_args.items() if name in signature}
-                        tasks.append(asyncio.create_task(element_class.render(**render_args)))
-                    else:
-                        raise UnknownGraphElement(element['class'])
-                else:
-                    raise ClassNotFound(element['class'])
+                # remove parameters, that are not in the class __init__ signature
+                signature = get_parameters(element_class.__init__)
+                class_args = {name: value for name, value in element_args.items() if name in signature}
+                # instantiate the class
+                instance = element_class(self.env, rows, cols, **class_args)
+                instances.append(instance)
+                # remove parameters, that are not in the render methods signature
+                signature = get_parameters(element_class.render)
+                render_args = {name: value for name, value in element_args.items() if name in signature}
+                tasks.append(asyncio.create_task(instance.render(**render_args)))
             # check for any exceptions and raise them
             try:
                 await asyncio.gather(*tasks)
@@ -220,7 +246,19 @@ class Graph(ReportElement):
                 return
             # only render the graph, if we don't have a rendered graph already attached as a file (image)
             if not self.env.filename:
-                await asyncio.create_task(asyncio.to_thread(self._plot))
+                if remote:
+                    image = await Renderer().render({
+                        "width": width,
+                        "height": height,
+                        "rows": rows,
+                        "cols": cols,
+                        "facecolor": facecolor,
+                        "axes": [x.axes.to_spec() for x in instances]
+                    })
+                    self.env.filename = f'{uuid.uuid4()}.png'
+                    self.env.buffer = BytesIO(image)
+                else:
+                    await asyncio.to_thread(self._plot)
             self.env.embed.set_image(url='attachment://' + os.path.basename(self.env.filename))
             footer = self.env.embed.footer.text or ''
             if footer is None:
@@ -229,9 +267,8 @@ class Graph(ReportElement):
                 footer += '\nClick on the image to zoom in.'
             self.env.embed.set_footer(text=footer)
         finally:
-            if self.env.figure:
-                plt.close(self.env.figure)
-                self.env.figure = None
+            self.env.figure = None
+
 
 def _display_no_data(element: EmbedElement, no_data: Union[str, dict], inline: bool):
     if isinstance(no_data, str):
@@ -293,6 +330,8 @@ class SQLTable(EmbedElement):
 
 
 class BarChart(GraphElement):
+    remote_capable = True
+
     def __init__(self, env: ReportEnv, rows: int, cols: int, row: int, col: int, colspan: Optional[int] = 1,
                  rowspan: Optional[int] = 1, title: Optional[str] = '', color: Optional[str] = None,
                  rotate_labels: Optional[int] = 0, bar_labels: Optional[bool] = False, is_time: Optional[bool] = False,
@@ -320,12 +359,9 @@ class BarChart(GraphElement):
                 raise UnknownValue('orientation', self.orientation)
             self.axes.set_title(self.title, color='white', fontsize=25)
             if self.rotate_labels > 0:
-                for label in self.axes.get_xticklabels():
-                    label.set_rotation(self.rotate_labels)
-                    label.set_ha('right')
+                self.axes.rotate_xticklabels(self.rotate_labels, ha='right')
             if self.bar_labels:
-                for c in self.axes.containers:
-                    self.axes.bar_label(c, fmt='%.1f h' if self.is_time else '%.1f', label_type='edge', padding=2)
+                self.axes.bar_labels(fmt='%.1f h' if self.is_time else '%.1f', label_type='edge', padding=2)
                 # increase the padding by 10% to allow the texts
                 self.axes.margins(x=0.1)
             if len(values) == 0:
@@ -353,6 +389,8 @@ class SQLBarChart(BarChart):
 
 
 class PieChart(GraphElement):
+    remote_capable = True
+
     def __init__(self, env: ReportEnv, rows: int, cols: int, row: int, col: int, colspan: Optional[int] = 1,
                  rowspan: Optional[int] = 1, title: Optional[str] = '', colors: Optional[list[str]] = None,
                  is_time: Optional[bool] = False, show_no_data: Optional[bool] = True,
@@ -364,23 +402,16 @@ class PieChart(GraphElement):
         self.is_time = is_time
         self.show_no_data = show_no_data
 
-    def func(self, pct, allvals):
-        absolute = int(round(pct / 100. * np.sum(allvals)))
-        if self.is_time:
-            return '{:.1f}%\n({:s}h)'.format(pct, str(timedelta(seconds=absolute)))
-        else:
-            return '{:.1f}%\n({:d})'.format(pct, absolute)
-
     async def render(self, values: dict[str, Any]):
         values = {k: v for k, v in values.copy().items() if v}
         if len(values) or self.show_no_data:
-            labels = values.keys()
+            labels = list(values.keys())
             values = list(values.values())
-            patches, texts, pcts = self.axes.pie(
-                values, labels=labels, autopct=lambda pct: self.func(pct, values), colors=self.colors,
-                wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True
+            self.axes.pie(
+                values, labels=labels, autopct=PieLabel(values, self.is_time), colors=self.colors,
+                wedgeprops={'linewidth': 3.0, 'edgecolor': 'black'}, normalize=True,
+                autotextprops={'color': self.textcolor, 'fontweight': 'bold'}
             )
-            plt.setp(pcts, color=self.textcolor, fontweight='bold')
             self.axes.set_title(self.title, color='white', fontsize=25)
             self.axes.axis('equal')
             if len(values) == 0:
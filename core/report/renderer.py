@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import pickle
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import BytesIO
+from typing import Any, Optional
+
+__all__ = [
+    "Renderer",
+    "AxesRecorder",
+    "PieLabel"
+]
+
+FACECOLOR = '#2C2F33'
+
+
+class PieLabel:
+    # picklable replacement for the autopct lambda of pie charts
+    def __init__(self, values: list, is_time: bool = False):
+        self.total = sum(float(x) for x in values)
+        self.is_time = is_time
+
+    def __call__(self, pct: float) -> str:
+        absolute = int(round(pct / 100. * self.total))
+        if self.is_time:
+            return '{:.1f}%\n({:s}h)'.format(pct, str(timedelta(seconds=absolute)))
+        else:
+            return '{:.1f}%\n({:d})'.format(pct, absolute)
+
+
+def apply_call(ax, method: str, args: tuple, kwargs: dict):
+    # some calls need the result of a former call, these are combined into pseudo-methods
+    if method == 'bar_labels':
+        for c in ax.containers:
+            ax.bar_label(c, *args, **kwargs)
+    elif method == 'rotate_xticklabels':
+        for label in ax.get_xticklabels():
+            label.set_rotation(args[0])
+            label.set_ha(kwargs.get('ha', 'right'))
+    elif method == 'pie':
+        kwargs = kwargs.copy()
+        props = kwargs.pop('autotextprops', None)
+        result = ax.pie(*args, **kwargs)
+        if props and len(result) == 3:
+            for text in result[2]:
+                text.set(**props)
+    else:
+        getattr(ax, method)(*args, **kwargs)
+
+
+# Stands in for a matplotlib Axes. All method calls are either recorded to be replayed in a render process later on,
+# or applied to a real Axes instantly. Return values of the calls are not available.
+class AxesRecorder:
+    def __init__(self, grid: tuple[int, int, int, int, int, int], axes: Optional[Any] = None):
+        self.grid = grid
+        self.axes = axes
+        self.calls: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, method: str):
+        def record(*args, **kwargs):
+            if self.axes is not None:
+                apply_call(self.axes, method, args, kwargs)
+            else:
+                self.calls.append((method, args, kwargs))
+        return record
+
+    def to_spec(self) -> dict:
+        return {"grid": self.grid, "calls": self.calls}
+
+
+def setup_matplotlib(rc: dict, font_dir: Optional[str] = None):
+    import matplotlib
+
+    matplotlib.use('agg')
+    from matplotlib import font_manager, style
+
+    if font_dir and os.path.exists(font_dir):
+        for f in font_manager.findSystemFonts(font_dir):
+            font_manager.fontManager.addfont(f)
+    style.use('dark_background')
+    matplotlib.rcParams.update(rc)
+    # resolve the fonts once, so that the first render does not have to
+    font_manager.findfont(matplotlib.rcParams['font.family'][0])
+
+
+def render_spec(spec: dict) -> bytes:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(spec['width'], spec['height']))
+    FigureCanvasAgg(figure)
+    if spec.get('facecolor'):
+        figure.set_facecolor(spec['facecolor'])
+    grid = figure.add_gridspec(spec['rows'], spec['cols'])
+    for axes in spec['axes']:
+        _, _, row, col, rowspan, colspan = axes['grid']
+        ax = figure.add_subplot(grid[row:row + rowspan, col:col + colspan])
+        for method, args, kwargs in axes['calls']:
+            apply_call(ax, method, args, kwargs)
+    figure.subplots_adjust(hspace=0.5, wspace=0.5)
+    buffer = BytesIO()
+    figure.savefig(buffer, format='png', bbox_inches='tight', facecolor=FACECOLOR)
+    return buffer.getvalue()
+
+
+# Renders graph specifications (see AxesRecorder) in a pool of worker processes, using the object-oriented Figure
+# API of matplotlib. Rendered images are cached by the hash of their specification.
+class Renderer:
+    _instance = None
+
+    def __new__(cls) -> Renderer:
+        if cls._instance is None:
+            self = super(Renderer, cls).__new__(cls)
+            self.log = logging.getLogger(__name__)
+            self.executor: Optional[ProcessPoolExecutor] = None
+            self.num_workers = 4
+            self.timeout = 60
+            self.cache_size = 50
+            self.rc = {'axes.facecolor': FACECOLOR}
+            self.cache: OrderedDict[str, bytes] = OrderedDict()
+            cls._instance = self
+        return cls._instance
+
+    def start(self, config: dict):
+        self.num_workers = config.get('num_workers', 4)
+        self.timeout = config.get('render_timeout', 60)
+        self.cache_size = config.get('image_cache', 50)
+        self.rc = {'axes.facecolor': FACECOLOR}
+        if 'cjk_font' in config:
+            self.rc['font.family'] = [f"Noto Sans {config['cjk_font']}", 'sans-serif']
+        self._start_executor()
+
+    def _start_executor(self):
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=setup_matplotlib,
+                                            initargs=(self.rc, 'fonts'))
+        # start all workers upfront, so that the first reports don't have to wait for them
+        for _ in range(self.num_workers):
+            self.executor.submit(os.getpid)
+
+    def _restart_executor(self):
+        executor = self.executor
+        self.executor = None
+        if executor:
+            # terminate hanging workers, otherwise shutdown() would wait for them
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._start_executor()
+
+    def stop(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def render(self, spec: dict) -> bytes:
+        key = hashlib.sha1(pickle.dumps(spec)).hexdigest()
+        image = self.cache.get(key)
+        if image:
+            self.cache.move_to_end(key)
+            return image
+        if not self.executor:
+            self._start_executor()
+        try:
+            image = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(self.executor, render_spec, spec),
+                                           timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.log.error(f"Rendering of a graph took longer than {self.timeout} seconds, restarting the renderer.")
+            self._restart_executor()
+            raise
+        except BrokenProcessPool:
+            self.log.warning("Renderer process died, restarting the renderer.")
+            self._restart_executor()
+            raise
+        self.cache[key] = image
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return image
@@ -1,5 +1,7 @@
 from __future__ import annotations
 import discord
+import time
+
 from contextlib import closing
 from typing import TYPE_CHECKING, Tuple, Any, Optional
 from discord import app_commands
@@ -11,31 +13,50 @@ if TYPE_CHECKING:
 
 __all__ = [
     "get_running_campaign",
+    "invalidate_running_campaign",
     "get_all_campaigns",
     "get_campaign",
     "campaign_autocomplete"
 ]
 
 
+# running campaign per server name (None = any server): (id, name, valid until)
+_running_campaigns: dict[Optional[str], Tuple[Any, Any, float]] = {}
+# campaigns might get started by time or on other nodes
+CAMPAIGN_CACHE_TTL = 60
+
+
 def get_running_campaign(bot: DCSServerBot, server: Optional[Server] = None) -> Tuple[Any, Any]:
+    key = server.name if server else None
+    cached = _running_campaigns.get(key)
+    if cached and cached[2] > time.monotonic():
+        return cached[0], cached[1]
     with bot.pool.connection() as conn:
         with closing(conn.cursor()) as cursor:
             if server:
                 cursor.execute("""
-                    SELECT id, name FROM campaigns c, campaigns_servers s 
+                    SELECT id, name, EXTRACT(EPOCH FROM (c.stop - NOW())) FROM campaigns c, campaigns_servers s 
                     WHERE c.id = s.campaign_id AND s.server_name = %s 
                     AND NOW() BETWEEN c.start AND COALESCE(c.stop, NOW())
                 """, (server.name,))
             else:
                 cursor.execute("""
-                    SELECT id, name FROM campaigns
+                    SELECT id, name, EXTRACT(EPOCH FROM (stop - NOW())) FROM campaigns
                     WHERE NOW() BETWEEN start AND COALESCE(stop, NOW())
                 """)
             if cursor.rowcount == 1:
-                row = cursor.fetchone()
-                return row[0], row[1]
+                campaign_id, name, remaining = cursor.fetchone()
             else:
-                return None, None
+                campaign_id = name = remaining = None
+    # a running campaign is only valid until it ends
+    ttl = min(CAMPAIGN_CACHE_TTL, float(remaining)) if remaining is not None else CAMPAIGN_CACHE_TTL
+    _running_campaigns[key] = (campaign_id, name, time.monotonic() + ttl)
+    return campaign_id, name
+
+
+def invalidate_running_campaign():
+    # has to be called on every change of the campaigns or campaigns_servers tables
+    _running_campaigns.clear()
 
 
 def get_all_campaigns(self) -> list[str]:
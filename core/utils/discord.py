@@ -15,7 +15,14 @@ from enum import Enum, auto
 from fuzzywuzzy import fuzz
 from typing import Optional, cast, Union, TYPE_CHECKING, Iterable, Any
 
-from .helper import get_all_players, is_ucid, format_string
+from .helper import is_ucid, format_string
+from ..data.playerindex import PlayerIndex
+
+# rapidfuzz is optional, but much faster
+try:
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:
+    rf_fuzz = rf_process = None
 
 if TYPE_CHECKING:
     from core import Server, Player, Node, Instance
@@ -41,6 +48,7 @@ __all__ = [
     "embed_to_text",
     "embed_to_simpletext",
     "escape_string",
+    "MemberIndex",
     "match",
     "get_interaction_param",
     "get_all_linked_members",
@@ -715,6 +723,91 @@ def normalize_name(name: Optional[str] = None) -> Optional[str]:
     return name.strip().lower()
 
 
+# we do not want to match the DCS standard names
+DCS_DEFAULT_NAMES = ['Player', 'Joueur', 'Spieler', 'Игрок', 'Jugador', '玩家', 'Hráč', '플레이어']
+
+
+class MemberIndex:
+    """
+    An index of the normalized names of discord members, to match DCS player names against them.
+
+    Names are stored in buckets by their length. As fuzz.ratio() can not reach min_score for names that differ too much
+    in their length, only the names in the matching buckets need to be scored.
+    """
+    # the attributes in order of their priority, if two names have the same score
+    ATTRIBUTES = ['display_name', 'global_name', 'name']
+
+    def __init__(self, members: Optional[Iterable[discord.Member]] = None):
+        self.members: dict[int, discord.Member] = {}
+        self.names: dict[int, list[str]] = {}
+        # length => normalized name => [(priority, member id)]
+        self.buckets: dict[int, dict[str, list[tuple[int, int]]]] = {}
+        for member in members or []:
+            self.add(member)
+
+    def add(self, member: discord.Member):
+        if member.id in self.members:
+            self.remove(member)
+        self.members[member.id] = member
+        self.names[member.id] = []
+        for priority, attr in enumerate(self.ATTRIBUTES):
+            name = normalize_name(getattr(member, attr))
+            if not name:
+                continue
+            self.names[member.id].append(name)
+            self.buckets.setdefault(len(name), {}).setdefault(name, []).append((priority, member.id))
+
+    def remove(self, member: Union[discord.Member, discord.User]):
+        self.members.pop(member.id, None)
+        for name in self.names.pop(member.id, []):
+            bucket = self.buckets.get(len(name), {})
+            if name not in bucket:
+                continue
+            bucket[name] = [x for x in bucket[name] if x[1] != member.id]
+            if not bucket[name]:
+                del bucket[name]
+
+    def candidates(self, name: str, min_score: int) -> list[str]:
+        # fuzz.ratio() is 200 * matches / (len(a) + len(b)) and matches can't exceed the length of the shorter name,
+        # so only names of a similar length can reach min_score (the score is rounded, so the bounds are one lower)
+        score = min_score - 1
+        if score <= 0:
+            return [x for bucket in self.buckets.values() for x in bucket.keys()]
+        min_len = int(len(name) * score / (200 - score))
+        max_len = int(len(name) * (200 - score) / score) + 1
+        candidates = []
+        for length in range(max(min_len, 1), max_len + 1):
+            candidates.extend(self.buckets.get(length, {}).keys())
+        return candidates
+
+    def match(self, name: str, min_score: Optional[int] = 70) -> Optional[discord.Member]:
+        if name in DCS_DEFAULT_NAMES:
+            return None
+        name = normalize_name(name)
+        if not name:
+            return None
+        if rf_process:
+            candidates = self.candidates(name, min_score)
+            results = rf_process.extract(name, candidates, scorer=rf_fuzz.ratio, score_cutoff=min_score - 0.5,
+                                         limit=None)
+            if not results:
+                return None
+            max_score = round(results[0][1])
+            best = [x[0] for x in results if round(x[1]) == max_score]
+        else:
+            candidates = self.candidates(name, min_score)
+            if not candidates:
+                return None
+            scores = {x: fuzz.ratio(name, x) for x in candidates}
+            max_score = max(scores.values())
+            if max_score < min_score:
+                return None
+            best = [x for x, score in scores.items() if score == max_score]
+        # names with the same score: display_name wins over global_name over name
+        _, member_id = min(entry for x in best for entry in self.buckets[len(x)][x])
+        return self.members[member_id]
+
+
 def match(name: str, member_list: list[discord.Member], min_score: Optional[int] = 70) -> Optional[discord.Member]:
     """
     Match the given name with members in the member_list based on fuzzy string matching.
@@ -724,36 +817,7 @@ def match(name: str, member_list: list[discord.Member], min_score: Optional[int]
     :param min_score: The minimum score required for a match. Defaults to 70.
     :return: The discord.Member object with the best match, or None if no match is found.
     """
-    # we do not want to match the DCS standard names
-    if name in [
-        'Player',
-        'Joueur',
-        'Spieler',
-        'Игрок',
-        'Jugador',
-        '玩家',
-        'Hráč',
-        '플레이어'
-    ]:
-        return None
-
-    name = normalize_name(name)
-    weights = [3, 2, 1]
-    user_lists = [
-        [normalize_name(getattr(member, attr)) for member in member_list]
-        for attr in ['display_name', 'global_name', 'name']
-    ]
-    max_score = 0
-    best_match_index = None
-
-    for user_list, weight in zip(user_lists, weights):
-        for idx, user in enumerate(user_list):
-            score = fuzz.ratio(name, user)
-            if score > max_score:
-                best_match_index = idx if score >= min_score else None
-                max_score = score if score >= min_score else 0
-
-    return member_list[best_match_index] if best_match_index else None
+    return MemberIndex(member_list).match(name, min_score)
 
 
 def get_interaction_param(interaction: discord.Interaction, name: str) -> Optional[Any]:
@@ -981,20 +1045,22 @@ class UserTransformer(app_commands.Transformer):
             return []
         # only Admin and DCS Admin should be allowed to see ucids at all
         show_ucid = utils.check_roles(interaction.client.roles['DCS Admin'], interaction.user)
+        index = PlayerIndex()
         ret = []
         if self.sel_type in [PlayerType.ALL, PlayerType.PLAYER]:
             ret.extend([
                 app_commands.Choice(name='✈ ' + name + (' (' + ucid + ')' if show_ucid else ''),
                                     value=ucid)
-                for ucid, name in get_all_players(interaction.client, self.linked)
-                if not current or current.casefold() in name.casefold() or current.casefold() in ucid
+                for ucid, name in await index.search(interaction.client.apool, current, linked=self.linked)
             ])
         if (self.linked is None or self.linked) and self.sel_type in [PlayerType.ALL, PlayerType.MEMBER]:
-            ret.extend([
-                app_commands.Choice(name='@' + member.display_name, value=str(member.id))
-                for member in get_all_linked_members(interaction.client)
-                if not current or current.casefold() in member.display_name.casefold()
-            ])
+            guild = interaction.client.guilds[0]
+            for discord_id in await index.get_linked(interaction.client.apool):
+                member = guild.get_member(discord_id)
+                if member and (not current or current.casefold() in member.display_name.casefold()):
+                    ret.append(app_commands.Choice(name='@' + member.display_name, value=str(member.id)))
+                    if len(ret) >= 25:
+                        break
         return ret[:25]
 
 
@@ -1030,8 +1096,8 @@ class PlayerTransformer(app_commands.Transformer):
             else:
                 choices = [
                     app_commands.Choice(name=f"{ucid} ({name})", value=ucid)
-                    for ucid, name in get_all_players(interaction.client, self.watchlist, self.vip)
-                    if not current or current.casefold() in name.casefold() or current.casefold() in ucid
+                    for ucid, name in await PlayerIndex().search(interaction.client.apool, current,
+                                                                 watchlist=self.watchlist, vip=self.vip)
                 ]
             return choices[:25]
         except Exception as ex:
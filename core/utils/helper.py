@@ -3,9 +3,11 @@ from __future__ import annotations
 import builtins
 import importlib
 import json
+import logging
 import time
 import luadata
 import os
+import psutil
 import re
 import shutil
 import string
@@ -16,10 +18,12 @@ import unicodedata
 import random
 import math
 
+from contextlib import contextmanager
+from copy import deepcopy
 from croniter import croniter
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Union, TYPE_CHECKING, Tuple, Generator, Iterable
+from typing import Optional, Union, TYPE_CHECKING, Tuple, Generator, Iterable, Any
 from urllib.parse import urlparse
 
 # ruamel YAML support
@@ -53,8 +57,12 @@ __all__ = [
     "matches_cron",
     "SettingsDict",
     "RemoteSettingsDict",
+    "ReadOnlyDict",
+    "ReadOnlyList",
+    "freeze",
     "evaluate",
     "for_each",
+    "StartupTimer",
     "YAMLError"
 ]
 
@@ -340,17 +348,23 @@ def matches_cron(datetime_obj: datetime, cron_string: str):
 
 
 class SettingsDict(dict):
-    def __init__(self, obj: DataObject, path: str, root: str):
+    def __init__(self, obj: DataObject, path: str, root: str, check_interval: Optional[float] = 1.0):
         super().__init__()
         self.path = path
         self.root = root
         self.mtime = 0
+        # don't stat the file more than once per check_interval seconds
+        self.check_interval = check_interval
+        self.last_check = 0
+        self.batch_level = 0
+        self.dirty = False
         self.obj = obj
         self.log = obj.log
         self.read_file()
 
     def read_file(self):
         self.mtime = os.path.getmtime(self.path)
+        self.last_check = time.monotonic()
         if self.path.lower().endswith('.lua'):
             try:
                 data = luadata.read(self.path, encoding='utf-8')
@@ -382,21 +396,56 @@ class SettingsDict(dict):
                 yaml.dump(self, outfile)
         shutil.copy2(tmpname, self.path)
         self.mtime = os.path.getmtime(self.path)
+        self.last_check = time.monotonic()
+        self.dirty = False
 
-    def __setitem__(self, key, value):
+    def check_file(self, force: Optional[bool] = False):
+        # pending changes of a batch must not be overwritten
+        if self.batch_level:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
         if self.mtime < os.path.getmtime(self.path):
             self.log.debug(f'{self.path} changed, re-reading from disk.')
             self.read_file()
+
+    @contextmanager
+    def batch(self):
+        # collects all changes and writes the file only once at the end, rolls back on exceptions
+        if not self.batch_level:
+            self.check_file(force=True)
+            backup = deepcopy(dict(self))
+        self.batch_level += 1
+        try:
+            yield self
+        except Exception:
+            if self.batch_level == 1:
+                self.clear()
+                self.update(backup)
+                self.dirty = False
+            raise
+        finally:
+            self.batch_level -= 1
+        if not self.batch_level and self.dirty:
+            if len(self):
+                self.write_file()
+            else:
+                self.log.error("- Writing of {} aborted due to empty set.".format(os.path.basename(self.path)))
+
+    def __setitem__(self, key, value):
+        self.check_file(force=True)
         super().__setitem__(key, value)
-        if len(self):
+        if self.batch_level:
+            self.dirty = True
+        elif len(self):
             self.write_file()
         else:
             self.log.error("- Writing of {} aborted due to empty set.".format(os.path.basename(self.path)))
 
     def __getitem__(self, item):
-        if self.mtime < os.path.getmtime(self.path):
-            self.log.debug(f'{self.path} changed, re-reading from disk.')
-            self.read_file()
+        self.check_file()
         return super().__getitem__(item)
 
 
@@ -407,6 +456,11 @@ class RemoteSettingsDict(dict):
         if data:
             super().__init__(data)
 
+    @contextmanager
+    def batch(self):
+        # remote settings are written key by key on the remote node
+        yield self
+
     def __setitem__(self, key, value):
         super().__setitem__(key, value)
         msg = {
@@ -421,6 +475,47 @@ class RemoteSettingsDict(dict):
         self.server.send_to_dcs(msg)
 
 
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only, use deepcopy() to get a writable copy")
+
+
+class ReadOnlyDict(dict):
+    # dict that can be shared between event listeners, deepcopy() returns a writable dict
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {deepcopy(key, memo): deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self), )
+
+
+class ReadOnlyList(list):
+    # list that can be shared between event listeners, deepcopy() returns a writable list
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = extend = insert = pop = remove = reverse = \
+        sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return list, (list(self), )
+
+
+def freeze(data: Any) -> Any:
+    if isinstance(data, dict):
+        return ReadOnlyDict((key, freeze(value)) for key, value in data.items())
+    elif isinstance(data, list):
+        return ReadOnlyList(freeze(value) for value in data)
+    return data
+
+
 def evaluate(value: Union[str, int, float, bool], **kwargs) -> Union[str, int, float, bool]:
     if isinstance(value, (int, float, bool)) or not value.startswith('$'):
         return value
@@ -498,6 +593,39 @@ def for_each(data: dict, search: list[str], depth: Optional[int] = 0, *,
             yield None
 
 
+# Measures the duration of the startup phases. The time until the timer was created (python startup and imports) is
+# taken from the process creation time. The results are logged as a table once the startup is complete.
+class StartupTimer:
+    def __init__(self):
+        self.start = time.time()
+        self.phases: dict[str, float] = {
+            "Python startup & imports": max(self.start - psutil.Process().create_time(), 0.0)
+        }
+        self.reported = False
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, phase: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def report(self, log: logging.Logger):
+        if self.reported:
+            return
+        self.reported = True
+        width = max(len(x) for x in self.phases) + 2
+        log.info('- Startup timings:')
+        for phase, seconds in self.phases.items():
+            log.info(f'  {phase:<{width}}{seconds:>7.2f}s')
+        total = time.time() - self.start + self.phases["Python startup & imports"]
+        log.info(f'  {"Total (wall clock)":<{width}}{total:>7.2f}s')
+
+
 class YAMLError(Exception):
     def __init__(self, file: str, ex: Union[ParserError, ScannerError]):
         super().__init__(f"Error in {file}, " + ex.__str__().replace('"<unicode string>"', file))
@@ -92,9 +92,7 @@ class Lardoon(Extension):
                 path = TACVIEW_DEFAULT_DIR
             cmd = os.path.expandvars(self.config['cmd'])
             out = subprocess.DEVNULL if not self.config.get('debug', False) else None
-            proc = await asyncio.create_subprocess_exec(cmd,  "import", "-p", path, stdout=out, stderr=out)
-            await proc.wait()
-            proc = await asyncio.create_subprocess_exec(cmd, "prune",  "--no-dry-run", stdout=out, stderr=out)
-            await proc.wait()
+            await asyncio.to_thread(subprocess.run, [cmd, "import", "-p", path], stdout=out, stderr=out)
+            await asyncio.to_thread(subprocess.run, [cmd, "prune", "--no-dry-run"], stdout=out, stderr=out)
         except Exception as ex:
             self.log.exception(ex)
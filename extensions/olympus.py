@@ -104,8 +104,8 @@ class Olympus(Extension):
         await super().startup()
         out = subprocess.DEVNULL if not self.config.get('debug', False) else None
         try:
-            self.process = await asyncio.create_subprocess_exec(
-                self.nodejs, r".\bin\www", cwd=os.path.join(self.home, "client"), stdout=out, stderr=out
+            self.process = subprocess.Popen(
+                [self.nodejs, r".\bin\www"], cwd=os.path.join(self.home, "client"), stdout=out, stderr=out
             )
         except OSError as ex:
             self.log.error("Error while starting Olympus: " + str(ex))
@@ -127,9 +127,9 @@ class Olympus(Extension):
         return utils.is_open(server_ip, self.locals.get('client', {}).get('port', 3000))
 
     async def shutdown(self) -> bool:
-        if self.process is not None and self.process.returncode is None:
+        if self.process is not None and self.process.poll() is None:
             await super().shutdown()
             self.process.terminate()
-            await self.process.wait()
+            await asyncio.to_thread(self.process.wait)
             self.process = None
         return True
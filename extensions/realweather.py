@@ -2,6 +2,7 @@ import asyncio
 import json
 import os
 import shutil
+import subprocess
 import tempfile
 
 from core import Extension, MizFile, utils, DEFAULT_TAG
@@ -45,11 +46,10 @@ class RealWeather(Extension):
         cwd = await self.server.get_missions_dir()
         with open(os.path.join(cwd, 'config.json'), 'w') as outfile:
             json.dump(cfg, outfile, indent=2)
-        out = asyncio.subprocess.DEVNULL if not self.config.get('debug', False) else None
-        proc = await asyncio.create_subprocess_exec(os.path.join(rw_home, 'realweather.exe'), cwd=cwd,
-                                                    stdout=out, stderr=out)
-        rc = await proc.wait()
-        if rc != 0:
+        out = subprocess.DEVNULL if not self.config.get('debug', False) else None
+        proc = await asyncio.to_thread(subprocess.run, [os.path.join(rw_home, 'realweather.exe')], cwd=cwd,
+                                       stdout=out, stderr=out)
+        if proc.returncode != 0:
             raise RealWeatherException(f"Error in RealWeather. Enable debug in your extension to see more.")
         # check if DCS Real Weather corrupted the miz file
         # (as the original author does not see any reason to do that on his own)
@@ -1,5 +1,4 @@
 import aiohttp
-import asyncio
 import certifi
 import os
 import shutil
@@ -110,11 +109,11 @@ class SRS(Extension):
                 info.wShowWindow = win32con.SW_MINIMIZE
             else:
                 info = None
-            out = asyncio.subprocess.DEVNULL if not self.config.get('debug', False) else None
-            self.process = await asyncio.create_subprocess_exec(
+            out = subprocess.DEVNULL if not self.config.get('debug', False) else None
+            self.process = subprocess.Popen([
                 self.get_exe_path(),
-                '-cfg={}'.format(os.path.expandvars(self.config['config'])),
-                startupinfo=info, stdout=out, stderr=out)
+                '-cfg={}'.format(os.path.expandvars(self.config['config']))
+            ], startupinfo=info, stdout=out, stderr=out)
         return self.is_running()
 
     async def shutdown(self):
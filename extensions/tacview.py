@@ -4,8 +4,7 @@ import re
 import shutil
 
 from core import Extension, utils, ServiceRegistry, Server
-from discord.ext import tasks
-from services import ServiceBus
+from services import ServiceBus, LogTailService
 from typing import Optional, cast
 
 TACVIEW_DEFAULT_DIR = os.path.normpath(os.path.expandvars(os.path.join('%USERPROFILE%', 'Documents', 'Tacview')))
@@ -18,15 +17,30 @@ class Tacview(Extension):
     def __init__(self, server: Server, config: dict):
         super().__init__(server, config)
         self.bus: ServiceBus = cast(ServiceBus, ServiceRegistry.get('ServiceBus'))
-        self.log_pos = -1
-        self.exp = re.compile(r'TACVIEW.DLL \(Main\): Successfully saved (?P<filename>.*)')
+        self.exp = re.compile(r'TACVIEW.DLL \(Main\): (?:Successfully saved (?P<filename>.*)|'
+                              r'(?P<end>End of flight data recorder\.))')
+        self.log_handler = None
+        self.stopping = False
 
     async def startup(self) -> bool:
         await super().startup()
-        if self.config.get('target') and not self.check_log.is_running():
-            self.check_log.start()
+        self.stopping = False
+        if self.config.get('target') and not self.log_handler:
+            logtail = cast(LogTailService, ServiceRegistry.get('LogTail'))
+            self.log_handler = logtail.register(self.server.instance, self.exp, self.check_log)
         return True
 
+    async def shutdown(self) -> bool:
+        # Tacview saves the recording when the mission stops, so the log is followed until the recorder ends
+        self.stopping = True
+        return await super().shutdown()
+
+    def unregister_log_handler(self):
+        if self.log_handler:
+            logtail = cast(LogTailService, ServiceRegistry.get('LogTail'))
+            logtail.unregister(self.server.instance, self.log_handler)
+            self.log_handler = None
+
     def load_config(self) -> Optional[dict]:
         if self.server.options['plugins']:
             options = self.server.options['plugins']
@@ -155,28 +169,13 @@ class Tacview(Extension):
             return False
         return True
 
-    @tasks.loop(seconds=1)
-    async def check_log(self):
+    async def check_log(self, match: re.Match):
+        if match.group('end'):
+            if self.stopping:
+                self.unregister_log_handler()
+            return
         try:
-            logfile = os.path.join(self.server.instance.home, 'Logs', 'dcs.log')
-            if not os.path.exists(logfile):
-                self.log_pos = 0
-                return
-            with open(logfile, encoding='utf-8', errors='ignore') as file:
-                # if we were started with an existing logfile, seek to the file end, else seek to the last position
-                if self.log_pos == -1:
-                    file.seek(0, 2)
-                else:
-                    file.seek(self.log_pos, 0)
-                for line in file.readlines():
-                    if 'TACVIEW.DLL (Main): End of flight data recorder.' in line:
-                        self.check_log.cancel()
-                        self.log_pos = -1
-                        return
-                    match = self.exp.search(line)
-                    if match:
-                        await self.send_tacview_file(match.group('filename')[1:-1])
-                self.log_pos = file.tell()
+            await self.send_tacview_file(match.group('filename')[1:-1])
         except Exception as ex:
             self.log.exception(ex)
 
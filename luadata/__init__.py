@@ -1,5 +1,5 @@
 from luadata.serializer.serialize import serialize
-from luadata.serializer.unserialize import unserialize
+from luadata.serializer.unserialize import unserialize, unserialize_stream
 from luadata.io.read import read
 from luadata.io.write import write
 
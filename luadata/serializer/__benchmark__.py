@@ -0,0 +1,94 @@
+"""Benchmark for the lua table parser.
+
+Usage:
+    python __benchmark__.py [file.miz | file.lua ...]
+
+For .miz files, the "mission" and "options" files inside the archive are parsed. Without any arguments, a synthetic
+mission of about 20 MB is generated.
+"""
+import io
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from luadata.serializer.serialize import serialize
+from luadata.serializer.unserialize import unserialize, unserialize_stream
+
+
+def synthetic_mission(countries=150, groups=20, units=8):
+    return {
+        "coalition": {
+            "blue": {
+                "country": [
+                    {
+                        "id": c,
+                        "name": f"Country {c}",
+                        "plane": {
+                            "group": [
+                                {
+                                    "groupId": c * groups + g,
+                                    "name": f"Group {c}-{g}",
+                                    "route": {"points": [{"x": p * 1.5, "y": -p * 2.25, "alt": 2000} for p in range(10)]},
+                                    "units": [
+                                        {
+                                            "unitId": u,
+                                            "name": f"Unit {c}-{g}-{u}",
+                                            "type": "FA-18C_hornet",
+                                            "x": u * 100.125,
+                                            "y": u * -50.5,
+                                            "payload": {"pylons": {p: {"CLSID": "{AIM-9X}"} for p in range(1, 10)}},
+                                        }
+                                        for u in range(1, units + 1)
+                                    ],
+                                }
+                                for g in range(groups)
+                            ]
+                        },
+                    }
+                    for c in range(countries)
+                ]
+            }
+        },
+        "trig": {"flag": [True] * 20000},
+    }
+
+
+def sources(args):
+    if not args:
+        yield "synthetic", ("mission = " + serialize(synthetic_mission(), indent="\t")).encode("utf-8")
+        return
+    for path in args:
+        if path.lower().endswith(".miz"):
+            with zipfile.ZipFile(path) as miz:
+                for name in ["mission", "options"]:
+                    if name in miz.namelist():
+                        yield f"{os.path.basename(path)}:{name}", miz.read(name)
+        else:
+            with open(path, "rb") as file:
+                yield os.path.basename(path), file.read()
+
+
+def bench(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    print(f"{'File':40} {'Size':>10} {'unserialize':>12} {'stream':>12} {'MB/s':>8}")
+    for name, raw in sources(args):
+        size = len(raw) / 1024 / 1024
+        data, t1 = bench(lambda: unserialize(raw, "utf-8"))
+        data2, t2 = bench(lambda: unserialize_stream(io.BytesIO(raw), "utf-8"))
+        if data != data2:
+            print(f"{name}: results of unserialize() and unserialize_stream() differ!")
+        if unserialize(serialize(data, indent="\t")) != data:
+            print(f"{name}: round trip failed!")
+        print(f"{name[-40:]:40} {size:8.2f}MB {t1:11.3f}s {t2:11.3f}s {size / t1:8.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
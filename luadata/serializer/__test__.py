@@ -92,6 +92,12 @@ class TestUnserializeMethods(unittest.TestCase):
             unserialize("..1")
         with self.assertRaises(Exception):
             unserialize("1.1.")
+        with self.assertRaises(Exception):
+            unserialize("return 0x10")
+        with self.assertRaises(Exception):
+            unserialize("1e5x")
+        with self.assertRaises(Exception):
+            unserialize("1..2", multival=True)
         self.assertEqual(unserialize(".1"), 0.1)
         self.assertEqual(unserialize("0.1"), 0.1)
         self.assertEqual(unserialize("100"), 100)
@@ -143,6 +149,17 @@ class TestUnserializeMethods(unittest.TestCase):
     def test_dict(self):
         self.assertEqual(unserialize('{1,2,["3"]="3"}'), {1: 1, 2: 2, "3": "3"})
 
+    def test_dict_float_key(self):
+        self.assertEqual(unserialize("{[1.0]=3}"), [3])
+        self.assertEqual(unserialize("{[2.0]=3,1}"), [1, 3])
+        self.assertEqual(unserialize("{[1.5]=3}"), {1.5: 3})
+
+    def test_nil(self):
+        self.assertEqual(unserialize("{1,nil,3}"), {1: 1, 3: 3})
+        self.assertEqual(unserialize("{nil,2}"), {2: 2})
+        self.assertEqual(unserialize("{1,nil}"), [1])
+        self.assertEqual(unserialize('{["x"]=1,nil,3}'), {2: 3, "x": 1})
+
     def test_dict_indent(self):
         self.assertEqual(
             unserialize('{\n  1,\n  2,\n  ["3"] = "3",\n}'),
@@ -1,11 +1,289 @@
-import math
+import re
+
+from functools import partial
+
+# leading whitespace is consumed together with the next token, the "end" group matches trailing whitespace
+_TOKEN = re.compile(
+    rb"""\s*(?:
+        (?P<comment>--\[\[.*?(?:\]\]|\Z)|--[^\n]*)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?(?![A-Za-z0-9_.]))
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<punct>[{}\[\]=,;])
+      | (?P<end>\Z)
+      | (?P<error>.)
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+
+_STRING = 1
+_NUMBER = 2
+_NAME = 3
+_PUNCT = 4
+_KINDS = {"string": _STRING, "number": _NUMBER, "name": _NAME, "punct": _PUNCT}
+
+_LITERALS = {"true": True, "false": False, "nil": None}
+
+_LOOKAHEAD = 64
+
+
+class _Error(Exception):
+    def __init__(self, pos, errmsg):
+        super().__init__(errmsg)
+        self.pos = pos
+        self.errmsg = errmsg
+
+
+def _token(match, encoding):
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind == "string":
+        value = (
+            value[1:-1]
+            .replace(b"\\\n", b"\n")
+            .replace(b'\\"', b'"')
+            .replace(b"\\\\", b"\\")
+            .decode(encoding)
+        )
+    elif kind == "number":
+        if b"." in value or b"e" in value or b"E" in value:
+            value = float(value)
+        else:
+            value = int(value)
+    else:
+        value = value.decode("ascii")
+    return _KINDS[kind], value, match.start(kind)
+
+
+def _no_match_error(sbins, pos):
+    if sbins[pos: pos + 1] in (b'"', b"'"):
+        return _Error(pos, "unexpected string ending: missing close quote.")
+    elif sbins[pos: pos + 1] == b".":
+        return _Error(pos, "unexpected dot.")
+    return _Error(pos, "unexpected character.")
+
+
+def _tokenize(sbins, encoding):
+    # same as _token(), but inlined as this is the hot path
+    for m in _TOKEN.finditer(sbins):
+        kind = m.lastgroup
+        if kind == "name":
+            yield _NAME, m.group(kind).decode("ascii"), m.start(kind)
+        elif kind == "punct":
+            yield _PUNCT, m.group(kind).decode("ascii"), m.start(kind)
+        elif kind == "string":
+            yield _STRING, m.group(kind)[1:-1].replace(b"\\\n", b"\n").replace(b'\\"', b'"').replace(
+                b"\\\\", b"\\").decode(encoding), m.start(kind)
+        elif kind == "number":
+            value = m.group(kind)
+            if b"." in value or b"e" in value or b"E" in value:
+                yield _NUMBER, float(value), m.start(kind)
+            else:
+                yield _NUMBER, int(value), m.start(kind)
+        elif kind == "end":
+            return
+        elif kind == "error":
+            raise _no_match_error(sbins, m.start(kind))
+
+
+def _tokenize_stream(fp, encoding, chunk_size):
+    match = _TOKEN.match
+    sbins = b""
+    offset = 0
+    pos = 0
+    eof = False
+    while True:
+        m = match(sbins, pos)
+        # a token close to the end of the buffer might continue in the next chunk (like 1e|-05)
+        if not eof and (m.lastgroup == "error" or len(sbins) - m.end() < _LOOKAHEAD):
+            chunk = fp.read(chunk_size)
+            if isinstance(chunk, str):
+                chunk = chunk.encode(encoding)
+            if not chunk:
+                eof = True
+            sbins = sbins[pos:] + chunk
+            offset += pos
+            pos = 0
+            continue
+        kind = m.lastgroup
+        if kind == "end":
+            return
+        elif kind == "error":
+            err = _no_match_error(sbins, m.start(kind))
+            err.pos += offset
+            raise err
+        pos = m.end()
+        if kind != "comment":
+            token = _token(m, encoding)
+            yield token[0], token[1], token[2] + offset
+
+
+class _Parser:
+    def __init__(self, tokens, verbose=False):
+        if verbose:
+            self.next = self._next_verbose
+            self.tokens = tokens
+        else:
+            self.next = partial(next, tokens, None)
+
+    def _next_verbose(self):
+        token = next(self.tokens, None)
+        print("[token]", token)
+        return token
+
+    def value(self, token):
+        kind, value, pos = token
+        if kind == _STRING or kind == _NUMBER:
+            return value
+        elif kind == _PUNCT and value == "{":
+            return self.table()
+        elif kind == _NAME and value in _LITERALS:
+            return _LITERALS[value]
+        raise _Error(pos, "unexpected character.")
+
+    def key_expression(self):
+        token = self.next()
+        if token is None:
+            raise _Error(None, "key expression expected.")
+        kind, key, pos = token
+        if kind == _NAME and key in ("true", "false"):
+            raise _Error(pos, "python do not support bool as dict key.")
+        elif kind == _PUNCT and key == "{":
+            raise _Error(pos, "python do not support lua table variable as dict key.")
+        elif kind != _STRING and kind != _NUMBER:
+            raise _Error(pos, "key expression expected.")
+        # like lua, float keys with an integral value are converted to integers
+        if type(key) is float and key.is_integer():
+            key = int(key)
+        token = self.next()
+        if token is None or token[0] != _PUNCT or token[1] != "]":
+            raise _Error(None, 'unexpected character, "]" expected.')
+        token = self.next()
+        if token is None or token[0] != _PUNCT or token[1] != "=":
+            raise _Error(None, 'unexpected character, "=" expected.')
+        return key
+
+    def table(self):
+        entries = []
+        int_keys = set()
+        lualen = 0
+        # index of the positional values, nil values count as well
+        index = 0
+        token = self.next()
+        while True:
+            if token is None:
+                raise _Error(None, 'unexpected end of table, "}" expected.')
+            kind, value, pos = token
+            pending = None
+            if kind == _PUNCT and value == "}":
+                break
+            elif kind == _PUNCT and value == "[":
+                key = self.key_expression()
+                token = self.next()
+                if token is None:
+                    raise _Error(None, "unexpected empty value.")
+                value = self.value(token)
+            elif kind == _NAME:
+                pending = self.next()
+                if pending is not None and pending[0] == _PUNCT and pending[1] == "=":
+                    pending = None
+                    key = value
+                    token = self.next()
+                    if token is None:
+                        raise _Error(None, "unexpected empty value.")
+                    value = self.value(token)
+                elif value in _LITERALS:
+                    key = None
+                    value = _LITERALS[value]
+                else:
+                    raise _Error(pos, "invalid table simple key character.")
+            else:
+                key = None
+                value = self.value(token)
+            if key is None:
+                index += 1
+                key = index
+            # nil values don't create table entries
+            if value is not None:
+                entries.append((key, value))
+                if type(key) is int:
+                    int_keys.add(key)
+                    if key == lualen + 1:
+                        lualen += 1
+                        while lualen + 1 in int_keys:
+                            lualen += 1
+            token = pending or self.next()
+            if token is None:
+                continue
+            if token[0] == _PUNCT and token[1] in (",", ";"):
+                token = self.next()
+            elif token[0] != _PUNCT or token[1] != "}":
+                raise _Error(token[2], "unexpected character.")
+
+        # keys 1..n without gaps or duplicates make a list
+        if len(entries) == lualen:
+            lst = [None] * lualen
+            for key, value in entries:
+                lst[key - 1] = value
+            return lst
+        int_entries = []
+        other_entries = []
+        for entry in entries:
+            if type(entry[0]) is int:
+                int_entries.append(entry)
+            else:
+                other_entries.append(entry)
+        int_entries.sort(key=lambda kv: kv[0])
+        return dict(int_entries + other_entries)
+
+    def root(self):
+        values = []
+        while True:
+            token = self.next()
+            if token is None:
+                return values
+            kind, value, pos = token
+            if kind == _NAME:
+                # skip assignments like "return" or "mission ="
+                if value in ("true", "false"):
+                    values.append(_LITERALS[value])
+            elif kind == _PUNCT:
+                if value == "{":
+                    values.append(self.table())
+                elif value in ("}", "[", "]"):
+                    raise _Error(pos, "unexpected table closing, no matching opening braces found.")
+            else:
+                values.append(value)
+
+
+def _parse(tokens, sbins, encoding, multival, verbose):
+    parser = _Parser(tokens, verbose)
+    try:
+        res = parser.root()
+        if len(res) == 0:
+            raise _Error(None, "nothing can be unserialized from input string.")
+    except _Error as ex:
+        if sbins is None:
+            raise Exception(f"Unserialize luadata failed on pos {ex.pos or 'EOF'}:\n    {ex.errmsg}")
+        # errors without a position occurred at the end of the input
+        pos = len(sbins) if ex.pos is None else min(ex.pos, len(sbins))
+        start_pos = max(0, pos - 4)
+        end_pos = min(pos + 10, len(sbins))
+        err_parts = sbins[start_pos:end_pos].decode(encoding, errors="replace")
+        err_indent = " " * (pos - start_pos)
+        raise Exception(
+            f"Unserialize luadata failed on pos {pos}:\n    {err_parts}\n    {err_indent}^\n    {ex.errmsg}"
+        )
+    if multival:
+        return tuple(res)
+    return res[0]
 
 
 def unserialize(raw, encoding="utf-8", multival=False, verbose=False):
     """Unserialize stringified lua data to python data
 
     Args:
-        raw (str): raw lua data string
+        raw (str | bytes): raw lua data string
         encoding (str, optional): string encoding. Defaults to "utf-8".
         multival (bool, optional): returns tuple for supporting multiple lua values likes "return 1, 2". Defaults to False.
         verbose (bool, optional): show more verbose debug information. Defaults to False.
@@ -16,334 +294,24 @@ def unserialize(raw, encoding="utf-8", multival=False, verbose=False):
     Returns:
         tuple([*]): unserialized data
     """
-    sbins = raw.encode(encoding)
-    root = {"entries": [], "lualen": 0, "is_root": True}
-    node = root
-    stack = []
-    state = "SEEK_CHILD"
-    pos = 0
-    slen = len(sbins)
-    byte_quoting_char = None
-    key = None
-    escaping = False
-    comment = None
-    component_name = None
-    errmsg = None
-
-    def sorter(kv):
-        if isinstance(kv[0], int):
-            return kv[0]
-        return math.inf
-
-    def node_entries_append(node, key, val):
-        node["entries"].append([key, val])
-        node["entries"].sort(key=sorter)
-        lualen = 0
-        for kv in node["entries"]:
-            if kv[0] == lualen + 1:
-                lualen = lualen + 1
-        node["lualen"] = lualen
-
-    def node_to_table(node):
-        if len(node["entries"]) == node["lualen"]:
-            lst = []
-            for kv in node["entries"]:
-                lst.append(kv[1])
-            return lst
-        else:
-            dct = {}
-            for kv in node["entries"]:
-                dct[kv[0]] = kv[1]
-            return dct
-
-    while pos <= slen:
-        byte_current = None
-        byte_current_is_space = False
-        if pos < slen:
-            byte_current = sbins[pos: pos + 1]
-            byte_current_is_space = (
-                byte_current == b" "
-                or byte_current == b"\r"
-                or byte_current == b"\n"
-                or byte_current == b"\t"
-            )
-        if verbose:
-            print("[step] pos", pos, byte_current, state, comment, key, node)
-
-        if comment == "MULTILINE":
-            if byte_current == b"]" and sbins[pos: pos + 2] == b"]]":
-                comment = None
-                pos = pos + 1
-        elif comment == "INLINE":
-            if byte_current == b"\n":
-                comment = None
-        elif state == "SEEK_CHILD":
-            if byte_current is None:
-                break
-            if byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif not node["is_root"] and (
-                (b"A" <= byte_current <= b"Z")
-                or (b"a" <= byte_current <= b"z")
-                or byte_current == b"_"
-            ):
-                state = "KEY_SIMPLE"
-                pos1 = pos
-            elif not node["is_root"] and byte_current == b"[":
-                state = "KEY_EXPRESSION_OPEN"
-            elif byte_current == b"}":
-                if len(stack) == 0:
-                    errmsg = (
-                        "unexpected table closing, no matching opening braces found."
-                    )
-                    break
-                prev_env = stack.pop()
-                if prev_env["state"] == "KEY_EXPRESSION_OPEN":
-                    key = node_to_table(node)
-                    state = "KEY_END"
-                elif prev_env["state"] == "VALUE":
-                    node_entries_append(
-                        prev_env["node"],
-                        prev_env["key"],
-                        node_to_table(node),
-                    )
-                    state = "VALUE_END"
-                    key = None
-                node = prev_env["node"]
-            elif not byte_current_is_space:
-                key = node["lualen"] + 1
-                state = "VALUE"
-                pos = pos - 1
-        elif state == "VALUE":
-            if byte_current is None:
-                errmsg = "unexpected empty value."
-                break
-            elif byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif byte_current == b'"' or byte_current == b"'":
-                state = "TEXT"
-                component_name = "VALUE"
-                pos1 = pos + 1
-                byte_quoting_char = byte_current
-            elif byte_current == b"-" or (b"0" <= byte_current <= b"9"):
-                state = "INT"
-                component_name = "VALUE"
-                pos1 = pos
-            elif byte_current == b".":
-                state = "FLOAT"
-                component_name = "VALUE"
-                pos1 = pos
-            elif byte_current == b"t" and sbins[pos: pos + 4] == b"true":
-                node_entries_append(node, key, True)
-                state = "VALUE_END"
-                key = None
-                pos = pos + 3
-            elif byte_current == b"f" and sbins[pos: pos + 5] == b"false":
-                node_entries_append(node, key, False)
-                state = "VALUE_END"
-                key = None
-                pos = pos + 4
-            elif byte_current == b"{":
-                stack.append({"node": node, "state": state, "key": key})
-                state = "SEEK_CHILD"
-                node = {"entries": [], "lualen": 0, "is_root": False}
-        elif state == "TEXT":
-            if byte_current is None:
-                errmsg = "unexpected string ending: missing close quote."
-                break
-            if escaping:
-                escaping = False
-            elif byte_current == b"\\":
-                escaping = True
-            elif byte_current == byte_quoting_char:
-                data = (
-                    sbins[pos1:pos]
-                    .replace(b"\\\n", b"\n")
-                    .replace(b'\\"', b'"')
-                    .replace(b"\\\\", b"\\")
-                    .decode(encoding)
-                )
-                if component_name == "KEY":
-                    key = data
-                    state = "KEY_EXPRESSION_FINISH"
-                elif component_name == "VALUE":
-                    node_entries_append(node, key, data)
-                    state = "VALUE_END"
-                    key = None
-        elif state == "INT":
-            if byte_current == b"." or byte_current == b"e":
-                state = "FLOAT"
-            elif byte_current is None or byte_current < b"0" or byte_current > b"9":
-                data = int(sbins[pos1:pos].decode(encoding))
-                if component_name == "KEY":
-                    key = data
-                    state = "KEY_EXPRESSION_FINISH"
-                    pos = pos - 1
-                elif component_name == "VALUE":
-                    node_entries_append(node, key, data)
-                    state = "VALUE_END"
-                    key = None
-                    pos = pos - 1
-        elif state == "FLOAT":
-            if byte_current == b"e" or byte_current == b"-" or byte_current == b"+":
-                pass
-            elif byte_current is None or byte_current < b"0" or byte_current > b"9":
-                if pos == pos1 + 1 and sbins[pos1:pos] == b".":
-                    errmsg = "unexpected dot."
-                    break
-                else:
-                    data = float(sbins[pos1:pos].decode(encoding))
-                    if component_name == "KEY":
-                        key = data
-                        state = "KEY_EXPRESSION_FINISH"
-                        pos = pos - 1
-                    elif component_name == "VALUE":
-                        node_entries_append(node, key, data)
-                        state = "VALUE_END"
-                        key = None
-                        pos = pos - 1
-        elif state == "VALUE_END":
-            if byte_current is None:
-                pass
-            elif byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif byte_current == b",":
-                state = "SEEK_CHILD"
-            elif byte_current == b"}":
-                state = "SEEK_CHILD"
-                pos = pos - 1
-            elif not byte_current_is_space:
-                errmsg = "unexpected character."
-                break
-        elif state == "KEY_EXPRESSION_OPEN":
-            if byte_current is None:
-                errmsg = "key expression expected."
-                break
-            if byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif byte_current == b'"' or byte_current == b"'":
-                state = "TEXT"
-                component_name = "KEY"
-                pos1 = pos + 1
-                byte_quoting_char = byte_current
-            elif byte_current == b"-" or (
-                    b"0" <= byte_current <= b"9"
-            ):
-                state = "INT"
-                component_name = "KEY"
-                pos1 = pos
-            elif byte_current == b".":
-                state = "FLOAT"
-                component_name = "KEY"
-                pos1 = pos
-            elif byte_current == b"t" and sbins[pos: pos + 4] == b"true":
-                errmsg = "python do not support bool as dict key."
-                break
-            elif byte_current == b"f" and sbins[pos: pos + 5] == b"false":
-                errmsg = "python do not support bool variable as dict key."
-                break
-            elif byte_current == b"{":
-                errmsg = "python do not support lua table variable as dict key."
-                break
-        elif state == "KEY_EXPRESSION_FINISH":
-            if byte_current is None:
-                errmsg = 'unexpected end of table key expression, "]" expected.'
-                break
-            if byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif byte_current == b"]":
-                state = "KEY_EXPRESSION_CLOSE"
-            elif not byte_current_is_space:
-                errmsg = 'unexpected character, "]" expected.'
-                break
-        elif state == "KEY_EXPRESSION_CLOSE":
-            if byte_current == b"=":
-                state = "VALUE"
-            elif byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif not byte_current_is_space:
-                errmsg = 'unexpected character, "=" expected.'
-                break
-        elif state == "KEY_SIMPLE":
-            if not (
-                (b"A" <= byte_current <= b"Z")
-                or (b"a" <= byte_current <= b"z")
-                or (b"0" <= byte_current <= b"9")
-                or byte_current == b"_"
-            ):
-                key = sbins[pos1:pos].decode(encoding)
-                state = "KEY_SIMPLE_END"
-                pos = pos - 1
-        elif state == "KEY_SIMPLE_END":
-            if byte_current_is_space:
-                pass
-            elif byte_current == b"-" and sbins[pos: pos + 4] == b"--[[":
-                comment = "MULTILINE"
-                pos = pos + 3
-            elif byte_current == b"-" and sbins[pos: pos + 2] == b"--":
-                comment = "INLINE"
-                pos = pos + 1
-            elif byte_current == b"=":
-                state = "VALUE"
-            elif byte_current == b"," or byte_current == b"}":
-                if key == "true":
-                    node_entries_append(node, node["lualen"] + 1, True)
-                    state = "VALUE_END"
-                    key = None
-                    pos = pos - 1
-                elif key == "false":
-                    node_entries_append(node, node["lualen"] + 1, False)
-                    state = "VALUE_END"
-                    key = None
-                    pos = pos - 1
-                else:
-                    key = None
-                    errmsg = "invalid table simple key character."
-                    break
-        pos += 1
-        if verbose:
-            print("          ", pos, "    ", state, comment, key, node)
-
-    # check if there is any errors
-    if errmsg is None and len(stack) != 0:
-        errmsg = 'unexpected end of table, "}" expected.'
-    if errmsg is None and root["lualen"] == 0:
-        errmsg = "nothing can be unserialized from input string."
-    if errmsg is not None:
-        pos = min(pos, slen)
-        start_pos = max(0, pos - 4)
-        end_pos = min(pos + 10, slen)
-        err_parts = sbins[start_pos:end_pos].decode(encoding)
-        err_indent = " " * (pos - start_pos)
-        raise Exception(f"Unserialize luadata failed on pos {pos}:\n    {err_parts}\n    {err_indent}^\n    {errmsg}")
+    sbins = raw if isinstance(raw, bytes) else raw.encode(encoding)
+    return _parse(_tokenize(sbins, encoding), sbins, encoding, multival, verbose)
 
-    res = []
-    for kv in root["entries"]:
-        res.append(kv[1])
-    if multival:
-        return tuple(res)
-    return res[0]
+
+def unserialize_stream(fp, encoding="utf-8", multival=False, verbose=False, chunk_size=1024 * 1024):
+    """Unserialize lua data from a file-like object without reading it into memory at once
+
+    Args:
+        fp (file): file-like object in binary or text mode
+        encoding (str, optional): string encoding. Defaults to "utf-8".
+        multival (bool, optional): returns tuple for supporting multiple lua values likes "return 1, 2". Defaults to False.
+        verbose (bool, optional): show more verbose debug information. Defaults to False.
+        chunk_size (int, optional): number of bytes / characters to read at once. Defaults to 1 MB.
+
+    Raises:
+        Exception: unserialize errors
+
+    Returns:
+        tuple([*]): unserialized data
+    """
+    return _parse(_tokenize_stream(fp, encoding, chunk_size), None, encoding, multival, verbose)
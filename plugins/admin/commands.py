@@ -4,7 +4,8 @@ import os
 import shutil
 
 from contextlib import closing
-from core import utils, Plugin, Server, command, Node, UploadStatus, Group, Instance, Status, PlayerType
+from core import utils, Plugin, Server, command, Node, UploadStatus, Group, Instance, Status, PlayerType, \
+    ProfileCache
 from datetime import timezone
 from discord import app_commands
 from discord.app_commands import Range
@@ -243,6 +244,7 @@ class Admin(Plugin):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute("UPDATE players SET watchlist = TRUE WHERE ucid = %s", (ucid, ))
+        ProfileCache().invalidate(ucid)
         await interaction.response.send_message(
             "Player {} is now on the watchlist.".format(user.display_name if isinstance(user, discord.Member) else ucid),
             ephemeral=utils.get_ephemeral(interaction))
@@ -274,6 +276,7 @@ class Admin(Plugin):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute("UPDATE players SET watchlist = FALSE WHERE ucid = %s", (ucid, ))
+        ProfileCache().invalidate(ucid)
         await interaction.response.send_message(
             "Player {} removed from the watchlist.".format(user.display_name if isinstance(user, discord.Member) else ucid),
             ephemeral=utils.get_ephemeral(interaction))
@@ -445,17 +448,18 @@ class Admin(Plugin):
             await interaction.followup.send('Aborted.', ephemeral=ephemeral)
             return
 
+        ucids = []
         with self.pool.connection() as conn:
             with conn.transaction():
                 with closing(conn.cursor()) as cursor:
                     if user:
                         for plugin in self.bot.cogs.values():  # type: Plugin
                             await plugin.prune(conn, ucids=[user])
-                            cursor.execute('DELETE FROM players WHERE ucid = %s', (user, ))
-                            cursor.execute('DELETE FROM players_hist WHERE ucid = %s', (user, ))
-                            await interaction.followup.send(f"Data of user {user} deleted.")
-                            return
-                    if view.what in ['users', 'non-members']:
+                        cursor.execute('DELETE FROM players WHERE ucid = %s', (user, ))
+                        cursor.execute('DELETE FROM players_hist WHERE ucid = %s', (user, ))
+                        ucids = [user]
+                        await interaction.followup.send(f"Data of user {user} deleted.")
+                    elif view.what in ['users', 'non-members']:
                         sql = f"SELECT ucid FROM players WHERE last_seen < (DATE(NOW()) - interval '{view.age} days')"
                         if view.what == 'non-members':
                             sql += ' AND discord_id = -1'
@@ -483,6 +487,8 @@ class Admin(Plugin):
                             await plugin.prune(conn, days=days)
                         await interaction.followup.send(f"All data older than {days} days pruned.",
                                                         ephemeral=ephemeral)
+        if ucids:
+            ProfileCache().invalidate(*ucids)
         await self.bot.audit(f'pruned the database', user=interaction.user)
 
     node_group = Group(name="node", description="Commands to manage your nodes")
@@ -1,7 +1,8 @@
+import asyncio
 import discord
 import os
 
-from core import Plugin, ServiceRegistry, command, utils, Node, YAMLError
+from core import Plugin, ServiceRegistry, command, utils, Node, YAMLError, Status
 from discord import app_commands
 from pathlib import Path
 from services import DCSServerBot, BackupService
@@ -28,6 +29,21 @@ async def backup_autocomplete(interaction: discord.Interaction, current: str) ->
         interaction.client.log.exception(ex)
 
 
+async def restore_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    if not await interaction.command._check_can_run(interaction):
+        return []
+    try:
+        service = cast(BackupService, ServiceRegistry.get("Backup"))
+        choices: list[app_commands.Choice[str]] = [
+            app_commands.Choice(name=os.path.basename(x)[:-5], value=os.path.basename(x))
+            for x in await asyncio.to_thread(service.get_manifests)
+            if not current or current.casefold() in os.path.basename(x).casefold()
+        ]
+        return choices[:25]
+    except Exception as ex:
+        interaction.client.log.exception(ex)
+
+
 class Backup(Plugin):
     def __init__(self, bot: DCSServerBot):
         super().__init__(bot)
@@ -63,6 +79,40 @@ class Backup(Plugin):
             await interaction.followup.send(f"Backup of {what} failed. Please check log for details",
                                             ephemeral=ephemeral)
 
+    @command(description='Restore an incremental backup')
+    @app_commands.guild_only()
+    @utils.app_has_role('Admin')
+    @app_commands.autocomplete(backup=restore_autocomplete)
+    async def restore(self, interaction: discord.Interaction, node: app_commands.Transform[Node, utils.NodeTransformer],
+                      backup: str):
+        ephemeral = utils.get_ephemeral(interaction)
+        # don't overwrite the files of a running server
+        for server in self.bus.servers.values():
+            if server.node.name == node.name and backup.startswith(server.instance.name + '_') and \
+                    server.status not in [Status.SHUTDOWN, Status.UNREGISTERED]:
+                await interaction.response.send_message(
+                    f"Server {server.display_name} has to be shut down before its backup can be restored.",
+                    ephemeral=True)
+                return
+        if not await utils.yn_question(interaction, f"Do you want to restore {backup}?\n"
+                                                    "Files of this backup will be overwritten!", ephemeral=ephemeral):
+            await interaction.followup.send("Aborted.", ephemeral=ephemeral)
+            return
+        try:
+            rc = await self.bus.send_to_node_sync({
+                "command": "rpc",
+                "service": "Backup",
+                "method": "restore",
+                "params": {
+                    "manifest": backup
+                }
+            }, node=node.name, timeout=600)
+            assert rc['return'] is True
+            await interaction.followup.send(f"Backup {backup} restored.", ephemeral=ephemeral)
+        except Exception:
+            await interaction.followup.send(f"Restore of {backup} failed. Please check log for details",
+                                            ephemeral=ephemeral)
+
 
 async def setup(bot: DCSServerBot):
     await bot.add_cog(Backup(bot))
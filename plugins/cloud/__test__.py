@@ -0,0 +1,183 @@
+import aiohttp
+import asyncio
+import logging
+import unittest
+
+from aiohttp import web
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from core import ServiceRegistry
+
+# the slash commands of the plugin need a bot to be built
+ServiceRegistry._singletons.setdefault('Bot', SimpleNamespace(
+    bot=SimpleNamespace(node=SimpleNamespace(all_nodes={}), servers={}, locals={})))
+
+from plugins.cloud.commands import CloudHandler  # noqa: E402
+
+
+class MockCloud:
+    """Local stand-in for the cloud service, answering POST /upload/."""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+        self.failures: dict[str, list[int]] = {}
+        self.delay = 0.0
+        self.active = 0
+        self.peak = 0
+
+    async def upload(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        self.requests.append(data)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            statuses = self.failures.get(data['player_ucid'])
+            if statuses:
+                return web.json_response({}, status=statuses.pop(0))
+            return web.json_response({"status": "ok"})
+        finally:
+            self.active -= 1
+
+
+class FakeCursor:
+
+    def __init__(self, results: list[list[dict]]):
+        self.results = results
+
+    def execute(self, *args, **kwargs):
+        return self
+
+    def fetchall(self) -> list[dict]:
+        return self.results.pop(0)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, pool: 'FakePool'):
+        self.pool = pool
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.pool.results)
+
+    @contextmanager
+    def transaction(self):
+        yield
+
+    def execute(self, sql: str, params: tuple):
+        self.pool.updates.append((sql, params))
+
+
+class FakePool:
+
+    def __init__(self, results: list[list[dict]]):
+        self.results = results
+        self.updates: list[tuple] = []
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self)
+
+
+class TestCloudSync(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cloud = MockCloud()
+        app = web.Application()
+        app.router.add_post('/upload/', self.cloud.upload)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.handler = self.create_handler(f"http://127.0.0.1:{port}", {'retries': 2, 'concurrency': 2})
+
+    async def asyncTearDown(self):
+        await self.handler._session.close()
+        await self.runner.cleanup()
+
+    @staticmethod
+    def create_handler(base_url: str, config: dict, timeout: float = 5) -> CloudHandler:
+        handler = CloudHandler.__new__(CloudHandler)
+        handler.base_url = base_url
+        handler.config = config
+        handler.semaphore = asyncio.Semaphore(config.get('concurrency', 5))
+        handler.client = {"guild_id": 1}
+        handler._session = aiohttp.ClientSession(raise_for_status=True,
+                                                 timeout=aiohttp.ClientTimeout(total=timeout))
+        handler.log = logging.getLogger('cloud-test')
+        return handler
+
+    @staticmethod
+    def lines(ucid: str, count: int = 1) -> list[dict]:
+        return [{"player_ucid": ucid, "slot": f"slot{i}"} for i in range(count)]
+
+    async def test_post(self):
+        self.assertEqual(await self.handler.post('upload', self.lines('a')[0]), {"status": "ok"})
+        self.assertEqual(len(self.cloud.requests), 1)
+
+    async def test_retry(self):
+        self.cloud.failures['a'] = [503, 429]
+        with patch('asyncio.sleep', new_callable=AsyncMock):
+            self.assertTrue(await self.handler.upload('a', self.lines('a')))
+        self.assertEqual(len(self.cloud.requests), 3)
+
+    async def test_retry_exhausted(self):
+        self.cloud.failures['a'] = [503, 503, 503]
+        with patch('asyncio.sleep', new_callable=AsyncMock):
+            self.assertFalse(await self.handler.upload('a', self.lines('a')))
+        self.assertEqual(len(self.cloud.requests), 3)
+
+    async def test_no_retry_on_client_error(self):
+        self.cloud.failures['a'] = [400]
+        with patch('asyncio.sleep', new_callable=AsyncMock) as sleep:
+            self.assertFalse(await self.handler.upload('a', self.lines('a')))
+        self.assertEqual(len(self.cloud.requests), 1)
+        sleep.assert_not_awaited()
+
+    async def test_backoff(self):
+        self.cloud.failures['a'] = [503, 502]
+        with patch('asyncio.sleep', new_callable=AsyncMock) as sleep:
+            await self.handler.post('upload', self.lines('a')[0])
+        self.assertEqual([x.args[0] for x in sleep.await_args_list], [1, 2])
+
+    async def test_concurrency(self):
+        self.cloud.delay = 0.05
+        await self.handler.post('upload', self.lines('a', 8))
+        self.assertEqual(len(self.cloud.requests), 8)
+        self.assertEqual(self.cloud.peak, 2)
+
+    async def test_timeout(self):
+        await self.handler._session.close()
+        self.handler = self.create_handler(self.handler.base_url, {'retries': 0}, timeout=0.1)
+        self.cloud.delay = 1
+        self.assertFalse(await self.handler.upload('a', self.lines('a')))
+
+    async def test_synced_flag(self):
+        self.handler.pool = FakePool([
+            [{"ucid": "a"}, {"ucid": "b"}, {"ucid": "c"}],
+            self.lines('a', 2) + self.lines('b') + self.lines('c')
+        ])
+        self.cloud.failures['b'] = [400]
+        await CloudHandler.cloud_sync.coro(self.handler)
+        self.assertEqual(len(self.handler.pool.updates), 1)
+        sql, params = self.handler.pool.updates[0]
+        self.assertIn('synced = TRUE', sql)
+        self.assertEqual(params, (['a', 'c'], ))
+        self.assertTrue(all(x['client'] == {"guild_id": 1} for x in self.cloud.requests))
+
+    async def test_nothing_to_sync(self):
+        self.handler.pool = FakePool([[]])
+        await CloudHandler.cloud_sync.coro(self.handler)
+        self.assertEqual(self.handler.pool.updates, [])
+        self.assertEqual(self.cloud.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
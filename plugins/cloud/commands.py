@@ -3,7 +3,6 @@ import asyncio
 import certifi
 import discord
 import os
-import pandas as pd
 import platform
 import psycopg
 import shutil
@@ -33,6 +32,7 @@ class CloudHandler(Plugin):
         self.base_url = f"{self.config['protocol']}://{self.config['host']}:{self.config['port']}"
         self._session = None
         self.client = None
+        self.semaphore = asyncio.Semaphore(self.config.get('concurrency', 5))
         if self.config.get('dcs-ban', False) or self.config.get('discord-ban', False):
             self.cloud_bans.add_exception_type(IndexError)
             self.cloud_bans.add_exception_type(aiohttp.ClientError)
@@ -101,14 +101,31 @@ class CloudHandler(Plugin):
     async def post(self, request: str, data: Any) -> Any:
         async def send(element: dict):
             url = f"{self.base_url}/{request}/"
-            async with self.session.post(url, json=element) as response:  # type: aiohttp.ClientResponse
-                return await response.json()
+            for retry in range(self.config.get('retries', 3) + 1):
+                try:
+                    async with self.semaphore:
+                        async with self.session.post(url, json=element) as response:  # type: aiohttp.ClientResponse
+                            return await response.json()
+                except aiohttp.ClientResponseError as ex:
+                    # client errors won't go away on a retry
+                    if ex.status < 500 and ex.status != 429:
+                        raise
+                    error = ex
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as ex:
+                    error = ex
+                if retry == self.config.get('retries', 3):
+                    raise error
+                await asyncio.sleep(2 ** retry)
 
         if isinstance(data, list):
-            for line in data:
-                await send(line)
+            # lines are sent in parallel, the number of concurrent requests is limited by the semaphore
+            results = await asyncio.gather(*[send(line) for line in data], return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+            return results
         else:
-            await send(data)
+            return await send(data)
 
     async def update_ucid(self, conn: psycopg.Connection, old_ucid: str, new_ucid: str) -> None:
         # we must not fail due to a cloud unavailability
@@ -188,6 +205,8 @@ class CloudHandler(Plugin):
                 await interaction.followup.send('No cloud-based statistics found for this user.', ephemeral=True)
                 return
             # TODO: support period
+            import pandas as pd
+
             df = pd.DataFrame(response)
             report = PaginationReport(self.bot, interaction, self.plugin_name, 'cloudstats.json')
             await report.render(user=name, data=df, guild=None)
@@ -222,40 +241,63 @@ class CloudHandler(Plugin):
                 reason = next(x['reason'] for x in bans if x['discord_id'] == user.id)
                 await guild.ban(user, reason='DGSA: ' + reason)
 
+    async def upload(self, ucid: str, lines: list[dict]) -> bool:
+        try:
+            await self.post('upload', lines)
+            return True
+        except TypeError as ex:
+            self.log.warning(f"Could not replicate user {ucid}: {ex}")
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            self.log.debug(f"Cloud: user {ucid} could not be synced: {ex!r}")
+            return False
+
     @tasks.loop(seconds=10)
     async def cloud_sync(self):
+        # initializes the session and the client information
+        _ = self.session
+        # the statistics are read upfront, so that no transaction is held open during the uploads
         with self.pool.connection() as conn:
-            with conn.transaction():
-                with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                    for row in cursor.execute("""
-                        SELECT ucid FROM players 
-                        WHERE synced IS FALSE 
-                        ORDER BY last_seen DESC 
-                        LIMIT 10
-                    """).fetchall():
-                        cursor.execute("""
-                            SELECT s.player_ucid, m.mission_theatre, s.slot, 
-                                   SUM(s.kills) as kills, SUM(s.pvp) as pvp, SUM(deaths) as deaths, 
-                                   SUM(ejections) as ejections, SUM(crashes) as crashes, 
-                                   SUM(teamkills) as teamkills, SUM(kills_planes) AS kills_planes, 
-                                   SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS kills_ships, 
-                                   SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, 
-                                   SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, 
-                                   SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships,
-                                   SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, 
-                                   SUM(takeoffs) as takeoffs, SUM(landings) as landings, 
-                                   ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))))::BIGINT AS playtime 
-                            FROM statistics s, missions m 
-                            WHERE s.player_ucid = %s AND s.hop_off IS NOT null AND s.mission_id = m.id 
-                            GROUP BY 1, 2, 3
-                        """, (row['ucid'], ))
-                        for line in cursor.fetchall():
-                            try:
-                                line['client'] = self.client
-                                await self.post('upload', line)
-                            except TypeError as ex:
-                                self.log.warning(f"Could not replicate user {row['ucid']}: {ex}")
-                        cursor.execute('UPDATE players SET synced = TRUE WHERE ucid = %s', (row['ucid'], ))
+            with closing(conn.cursor(row_factory=dict_row)) as cursor:
+                ucids = [x['ucid'] for x in cursor.execute("""
+                    SELECT ucid FROM players 
+                    WHERE synced IS FALSE 
+                    ORDER BY last_seen DESC 
+                    LIMIT %s
+                """, (self.config.get('batch_size', 50), )).fetchall()]
+                if not ucids:
+                    return
+                lines: dict[str, list[dict]] = {ucid: [] for ucid in ucids}
+                for row in cursor.execute("""
+                    SELECT s.player_ucid, m.mission_theatre, s.slot, 
+                           SUM(s.kills) as kills, SUM(s.pvp) as pvp, SUM(deaths) as deaths, 
+                           SUM(ejections) as ejections, SUM(crashes) as crashes, 
+                           SUM(teamkills) as teamkills, SUM(kills_planes) AS kills_planes, 
+                           SUM(kills_helicopters) AS kills_helicopters, SUM(kills_ships) AS kills_ships, 
+                           SUM(kills_sams) AS kills_sams, SUM(kills_ground) AS kills_ground, 
+                           SUM(deaths_pvp) as deaths_pvp, SUM(deaths_planes) AS deaths_planes, 
+                           SUM(deaths_helicopters) AS deaths_helicopters, SUM(deaths_ships) AS deaths_ships,
+                           SUM(deaths_sams) AS deaths_sams, SUM(deaths_ground) AS deaths_ground, 
+                           SUM(takeoffs) as takeoffs, SUM(landings) as landings, 
+                           ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))))::BIGINT AS playtime 
+                    FROM statistics s, missions m 
+                    WHERE s.player_ucid = ANY(%s) AND s.hop_off IS NOT null AND s.mission_id = m.id 
+                    GROUP BY 1, 2, 3
+                """, (ucids, )).fetchall():
+                    row['client'] = self.client
+                    lines[row['player_ucid']].append(row)
+        results = await asyncio.gather(*[self.upload(ucid, lines[ucid]) for ucid in ucids])
+        synced = [ucid for ucid, result in zip(ucids, results) if result]
+        if synced:
+            with self.pool.connection() as conn:
+                with conn.transaction():
+                    conn.execute('UPDATE players SET synced = TRUE WHERE ucid = ANY(%s)', (synced, ))
+        if len(synced) < len(ucids):
+            self.log.warning(f"Cloud: {len(ucids) - len(synced)} users could not be synced, retrying later.")
+
+    @cloud_sync.before_loop
+    async def before_cloud_sync(self):
+        await self.bot.wait_until_ready()
 
     @tasks.loop(hours=1)
     async def register(self):
@@ -1,10 +1,10 @@
-import asyncio.subprocess
-import traceback
-
+import asyncio
 import discord
 import os
 import re
 import shlex
+import subprocess
+import traceback
 
 from core import Plugin, TEventListener, utils, Server, Status, Report, DEFAULT_TAG
 from discord.ext import commands
@@ -34,8 +34,7 @@ class Commands(Plugin):
             cwd = None
         if 'shell' in config:
             try:
-                p = await asyncio.subprocess.create_subprocess_shell(*cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE)
-                stdout, _ = p.communicate()
+                p = await asyncio.to_thread(subprocess.run, cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE)
             except Exception as ex:
                 traceback.print_exc()
                 await ctx.send(ex.__str__())
@@ -56,9 +55,7 @@ class Commands(Plugin):
                 tmp += '```'
                 await ctx.send(tmp)
         else:
-            await asyncio.subprocess.create_subprocess_exec(*cmd, cwd=cwd,
-                                                            stdin=asyncio.subprocess.DEVNULL,
-                                                            stdout=asyncio.subprocess.DEVNULL)
+            subprocess.Popen(cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
             await ctx.send('Done.')
 
     async def event(self, ctx: commands.Context, config: dict, **kwargs) -> list[dict]:
@@ -1,4 +1,6 @@
 from .version import __version__
 from trueskill import TrueSkill
 
+__requires__ = ["missionstats"]
+
 rating = TrueSkill()
@@ -159,8 +159,7 @@ class CompetitiveListener(EventListener):
                 return
             # self-kill
             if data['arg1'] == data['arg4']:
-                data['eventName'] = 'self_kill'
-                await self._onGameEvent(server, data)
+                await self._onGameEvent(server, data | {'eventName': 'self_kill'})
             # Multi-crew - pilot and all crew members gain points
             killers = server.get_crew_members(server.get_player(id=data['arg1']))
             victims = server.get_crew_members(server.get_player(id=data['arg4']))
@@ -4,19 +4,36 @@ import psycopg
 from contextlib import closing
 from datetime import timezone
 from discord import app_commands, SelectOption
-from core import utils, Plugin, PluginRequiredError, Group
+from discord.ext import tasks
+from core import utils, Plugin, PluginRequiredError, Group, TEventListener
 from psycopg.rows import dict_row
 from services import DCSServerBot
-from typing import Optional, cast, Union
+from typing import Optional, cast, Union, Type
 
+from .ledger import CreditLedger
 from .listener import CreditSystemListener
 from .player import CreditPlayer
 
 
 class CreditSystem(Plugin):
 
+    def __init__(self, bot: DCSServerBot, eventlistener: Type[TEventListener] = None):
+        super().__init__(bot, eventlistener)
+        self.ledger = CreditLedger(self.pool)
+        self.flush_ledger.start()
+
+    async def cog_unload(self):
+        self.flush_ledger.cancel()
+        self.ledger.flush()
+        await super().cog_unload()
+
+    @tasks.loop(seconds=5.0)
+    async def flush_ledger(self):
+        self.ledger.flush()
+
     async def prune(self, conn: psycopg.Connection, *, days: int = -1, ucids: list[str] = None):
         self.log.debug('Pruning Creditsystem ...')
+        self.ledger.flush()
         if ucids:
             for ucid in ucids:
                 conn.execute('DELETE FROM credits WHERE player_ucid = %s', (ucid,))
@@ -25,12 +42,15 @@ class CreditSystem(Plugin):
 
     def rename(self, conn: psycopg.Connection, old_name: str, new_name: str):
         conn.execute('UPDATE campaigns_servers SET server_name = %s WHERE server_name = %s', (new_name, old_name))
+        utils.invalidate_running_campaign()
 
     async def update_ucid(self, conn: psycopg.Connection, old_ucid: str, new_ucid: str) -> None:
+        self.ledger.flush()
         conn.execute('UPDATE credits SET player_ucid = %s WHERE player_ucid = %s', (new_ucid, old_ucid))
         conn.execute('UPDATE credits_log SET player_ucid = %s WHERE player_ucid = %s', (new_ucid, old_ucid))
 
     def get_credits(self, ucid: str) -> list[dict]:
+        self.ledger.flush()
         with self.pool.connection() as conn:
             with closing(conn.cursor(row_factory=dict_row)) as cursor:
                 return list(cursor.execute("""
@@ -41,6 +61,7 @@ class CreditSystem(Plugin):
                 """, (ucid, )).fetchall())
 
     def get_credits_log(self, ucid: str) -> list[dict]:
+        self.ledger.flush()
         with self.pool.connection() as conn:
             with closing(conn.cursor(row_factory=dict_row)) as cursor:
                 return list(cursor.execute("""
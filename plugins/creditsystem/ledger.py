@@ -0,0 +1,51 @@
+import logging
+
+from psycopg_pool import ConnectionPool
+
+
+# Collects the changes of credit points and their audit log entries and writes them to the database in batches.
+# Only the latest points per campaign and player are written.
+class CreditLedger:
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.log = logging.getLogger(__name__)
+        self.credits: dict[tuple[int, str], int] = {}
+        self.entries: list[tuple[int, str, str, int, int, str]] = []
+
+    def set_points(self, campaign_id: int, ucid: str, points: int):
+        self.credits[(campaign_id, ucid)] = points
+
+    def get_points(self, campaign_id: int, ucid: str) -> int:
+        # points that are not written yet or -1
+        return self.credits.get((campaign_id, ucid), -1)
+
+    def audit(self, campaign_id: int, event: str, ucid: str, old_points: int, new_points: int, remark: str):
+        self.entries.append((campaign_id, event, ucid, old_points, new_points, remark))
+
+    def flush(self):
+        if not self.credits and not self.entries:
+            return
+        credits, entries = self.credits, self.entries
+        self.credits, self.entries = {}, []
+        try:
+            with self.pool.connection() as conn:
+                with conn.transaction():
+                    with conn.cursor() as cursor:
+                        if credits:
+                            cursor.executemany("""
+                                INSERT INTO credits (campaign_id, player_ucid, points)
+                                VALUES (%s, %s, %s)
+                                ON CONFLICT (campaign_id, player_ucid) DO UPDATE SET points = EXCLUDED.points
+                            """, [(campaign_id, ucid, points) for (campaign_id, ucid), points in credits.items()])
+                        if entries:
+                            cursor.executemany("""
+                                INSERT INTO credits_log (campaign_id, event, player_ucid, old_points, new_points,
+                                                         remark)
+                                VALUES (%s, %s, %s, %s, %s, %s)
+                            """, entries)
+        except Exception as ex:
+            self.log.exception(ex)
+            # newer points win
+            self.credits = credits | self.credits
+            self.entries = entries + self.entries
@@ -164,11 +164,19 @@ class CreditSystemListener(EventListener):
                         player.audit('kill', old_points, f"Killed an enemy {data['arg5']}")
 
         elif data['eventName'] == 'disconnect':
+            self.plugin.ledger.flush()
             server: Server = self.bot.servers[data['server_name']]
             player = cast(CreditPlayer, server.get_player(id=data['arg1']))
             if player:
                 await self.process_achievements(server, player)
 
+        elif data['eventName'] == 'mission_end':
+            self.plugin.ledger.flush()
+
+    @event(name="onSimulationStop")
+    async def onSimulationStop(self, server: Server, data: dict) -> None:
+        self.plugin.ledger.flush()
+
     @chat_command(name="credits", help="displays your credits")
     async def credits(self, server: Server, player: CreditPlayer, params: list[str]):
         message = f"You currently have {player.points} credit points"
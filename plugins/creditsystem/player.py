@@ -2,7 +2,10 @@ from contextlib import closing
 
 from core import Player, DataObjectFactory, utils, Plugin
 from dataclasses import field, dataclass
-from typing import cast
+from typing import cast, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .ledger import CreditLedger
 
 
 @dataclass
@@ -11,27 +14,36 @@ class CreditPlayer(Player):
     _points: int = field(compare=False, default=-1)
     deposit: int = field(compare=False, default=0)
 
+    @property
+    def ledger(self) -> CreditLedger:
+        return self.bot.cogs['CreditSystem'].ledger
+
     @property
     def points(self) -> int:
         if self._points == -1:
-            with self.pool.connection() as conn:
-                with closing(conn.cursor()) as cursor:
-                    # load credit points
-                    campaign_id, _ = utils.get_running_campaign(self.bot, self.server)
-                    if not campaign_id:
-                        return -1
-                    cursor.execute('SELECT points FROM credits WHERE campaign_id = %s AND player_ucid = %s',
-                                   (campaign_id, self.ucid))
-                    if cursor.rowcount == 1:
-                        self._points = cursor.fetchone()[0]
-                        self.server.send_to_dcs({
-                            'command': 'updateUserPoints',
-                            'ucid': self.ucid,
-                            'points': self._points
-                        })
-                    else:
-                        self.log.debug(
-                            f'CreditPlayer: No entry found in credits table for player {self.name}({self.ucid})')
+            campaign_id, _ = utils.get_running_campaign(self.bot, self.server)
+            if not campaign_id:
+                return -1
+            # points that were not written to the database yet
+            points = self.ledger.get_points(campaign_id, self.ucid)
+            if points == -1:
+                with self.pool.connection() as conn:
+                    with closing(conn.cursor()) as cursor:
+                        # load credit points
+                        cursor.execute('SELECT points FROM credits WHERE campaign_id = %s AND player_ucid = %s',
+                                       (campaign_id, self.ucid))
+                        if cursor.rowcount == 1:
+                            points = cursor.fetchone()[0]
+                        else:
+                            self.log.debug(
+                                f'CreditPlayer: No entry found in credits table for player {self.name}({self.ucid})')
+            if points != -1:
+                self._points = points
+                self.server.send_to_dcs({
+                    'command': 'updateUserPoints',
+                    'ucid': self.ucid,
+                    'points': self._points
+                })
         return self._points
 
     @points.setter
@@ -50,26 +62,16 @@ class CreditPlayer(Player):
         campaign_id, _ = utils.get_running_campaign(self.bot, self.server)
         if not campaign_id:
             return
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                conn.execute("""
-                    INSERT INTO credits (campaign_id, player_ucid, points) 
-                    VALUES (%s, %s, %s) 
-                    ON CONFLICT (campaign_id, player_ucid) DO UPDATE SET points = EXCLUDED.points
-                """, (campaign_id, self.ucid, self._points))
-                self.server.send_to_dcs({
-                    'command': 'updateUserPoints',
-                    'ucid': self.ucid,
-                    'points': self._points
-                })
+        # the points are written to the database by the ledger
+        self.ledger.set_points(campaign_id, self.ucid, self._points)
+        self.server.send_to_dcs({
+            'command': 'updateUserPoints',
+            'ucid': self.ucid,
+            'points': self._points
+        })
 
     def audit(self, event: str, old_points: int, remark: str):
         campaign_id, _ = utils.get_running_campaign(self.bot, self.server)
         if not campaign_id:
             return
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                conn.execute("""
-                    INSERT INTO credits_log (campaign_id, event, player_ucid, old_points, new_points, remark) 
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (campaign_id, event, self.ucid, old_points, self._points, remark))
+        self.ledger.audit(campaign_id, event, self.ucid, old_points, self._points, remark)
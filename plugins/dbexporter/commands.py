@@ -1,13 +1,43 @@
+import asyncio
 import discord
+import gzip
 import json
 import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import closing
 from core import Plugin, TEventListener, utils, command
+from datetime import datetime
 from discord import app_commands
 from discord.ext import tasks
 from os import path
+from psycopg import Connection
 from services import DCSServerBot
-from typing import Type
+from typing import Type, Optional, Union
+
+# zstandard and pyarrow are optional and only needed for zstd compression or parquet output
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+EXCLUDED_TABLES = ['pu_events_sdw', 'servers', 'message_persistence']
+HIGHWATER_FILE = path.join('export', '.highwater.json')
+BATCH_SIZE = 10000
+# tables that are only ever inserted into, incremental exports would miss updates on any other table
+APPEND_ONLY_TABLES = ['missionstats', 'players_hist', 'credits_log', 'strafe_runs', 'bomb_runs', 'greenieboard',
+                      'serverstats']
+# ids or timestamps can be assigned before but committed after an export, so rows within this overlap are read again
+OVERLAP = {
+    'id': '1000',
+    'time': "INTERVAL '15 minutes'"
+}
 
 
 class DBExporter(Plugin):
@@ -16,6 +46,12 @@ class DBExporter(Plugin):
         super().__init__(bot, eventlistener)
         if not path.exists('./export'):
             os.makedirs('./export')
+        self.lock = asyncio.Lock()
+        self.state_lock = threading.Lock()
+        self.highwater: dict[str, dict] = {}
+        if path.exists(HIGHWATER_FILE):
+            with open(HIGHWATER_FILE, mode='r', encoding='utf-8') as file:
+                self.highwater = json.load(file)
         if self.get_config().get('autoexport', False):
             self.schedule.start()
 
@@ -24,18 +60,195 @@ class DBExporter(Plugin):
             self.schedule.cancel()
         await super().cog_unload()
 
-    def do_export(self, table_filter: list[str]):
+    def get_tables(self, table_filter: list[str]) -> dict[str, dict[str, str]]:
+        tables: dict[str, dict[str, str]] = {}
         with self.pool.connection() as conn:
-            with closing(conn.cursor()) as cursor:
-                for table in [x[0] for x in cursor.execute("""
-                    SELECT table_name FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name not in ('pu_events_sdw', 'servers', 'message_persistence')
-                """).fetchall() if x[0] not in table_filter]:
-                    rows = cursor.execute(f'SELECT ROW_TO_JSON(t) FROM (SELECT * FROM {table}) t').fetchall()
-                    if rows:
-                        with open(f'export/{table}.json', 'w') as file:
-                            file.writelines([json.dumps(x[0]) + '\n' for x in rows])
+            for table, column, data_type in conn.execute("""
+                SELECT c.table_name, c.column_name, c.data_type
+                FROM information_schema.columns c JOIN information_schema.tables t
+                ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+                WHERE t.table_schema = 'public' AND t.table_type = 'BASE TABLE' AND NOT (t.table_name = ANY(%s))
+                ORDER BY c.table_name, c.ordinal_position
+            """, (EXCLUDED_TABLES + table_filter, )).fetchall():
+                tables.setdefault(table, {})[column] = data_type
+        return tables
+
+    @staticmethod
+    def get_highwater_column(columns: dict[str, str]) -> Optional[str]:
+        # only serial ids or timestamps can be used to find new rows
+        if columns.get('id') in ['integer', 'bigint']:
+            return 'id'
+        elif columns.get('time', '').startswith('timestamp'):
+            return 'time'
+        return None
+
+    @staticmethod
+    def get_row_key(table: str, column: str) -> str:
+        # identifies the rows that were already exported within the overlap
+        return 'id' if column == 'id' else f'MD5(ROW_TO_JSON({table})::TEXT)'
+
+    def get_filename(self, table: str) -> str:
+        config = self.get_config()
+        if config.get('format', 'json') == 'parquet':
+            return f'{table}.parquet'
+        compression = config.get('compression')
+        if compression == 'gzip':
+            return f'{table}.json.gz'
+        elif compression == 'zstd':
+            return f'{table}.json.zst'
+        return f'{table}.json'
+
+    def open_file(self, filename: str, mode: str):
+        if filename.endswith('.gz'):
+            return gzip.open(filename, mode=mode, compresslevel=6)
+        elif filename.endswith('.zst'):
+            # zstd frames can be concatenated like gzip members, so appending works the same way
+            return zstandard.ZstdCompressor(level=3).stream_writer(open(filename, mode=mode))
+        return open(filename, mode=mode)
+
+    def write_json(self, conn: Connection, table: str, where: str, params: tuple, filename: str, append: bool) -> int:
+        count = 0
+        # a server-side cursor streams the rows instead of loading the whole table into memory
+        with closing(conn.cursor(name=f'export_{table}')) as cursor:
+            cursor.execute(f'SELECT ROW_TO_JSON(t)::TEXT FROM (SELECT * FROM {table} {where}) t', params)
+            with self.open_file(filename, 'ab' if append else 'wb') as file:
+                while rows := cursor.fetchmany(BATCH_SIZE):
+                    file.write(''.join(x[0] + '\n' for x in rows).encode('utf-8'))
+                    count += len(rows)
+        return count
+
+    @staticmethod
+    def get_parquet_type(data_type: str):
+        if data_type in ['integer', 'bigint', 'smallint']:
+            return pyarrow.int64(), None
+        elif data_type in ['numeric', 'real', 'double precision']:
+            return pyarrow.float64(), float
+        elif data_type == 'boolean':
+            return pyarrow.bool_(), None
+        elif data_type.startswith('timestamp'):
+            return pyarrow.timestamp('us'), None
+        elif data_type == 'date':
+            return pyarrow.date32(), None
+        elif data_type == 'bytea':
+            return pyarrow.binary(), None
+        elif data_type in ['json', 'jsonb', 'ARRAY']:
+            return pyarrow.string(), lambda x: json.dumps(x, default=str)
+        else:
+            return pyarrow.string(), str
+
+    def write_parquet(self, conn: Connection, table: str, columns: dict[str, str], where: str, params: tuple,
+                      filename: str) -> int:
+        count = 0
+        types = [self.get_parquet_type(x) for x in columns.values()]
+        schema = pyarrow.schema([(name, _type) for name, (_type, _) in zip(columns.keys(), types)])
+        with closing(conn.cursor(name=f'export_{table}')) as cursor:
+            select = ', '.join(f'"{x}"' for x in columns.keys())
+            cursor.execute(f'SELECT {select} FROM {table} {where}', params)
+            with parquet.ParquetWriter(filename, schema, compression='zstd') as writer:
+                while rows := cursor.fetchmany(BATCH_SIZE):
+                    arrays = []
+                    for i, (_type, convert) in enumerate(types):
+                        values = [x[i] for x in rows]
+                        if convert:
+                            values = [convert(x) if x is not None else None for x in values]
+                        arrays.append(pyarrow.array(values, type=_type))
+                    writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+                    count += len(rows)
+        return count
+
+    def export_table(self, table: str, columns: dict[str, str], incremental: bool) -> int:
+        filename = path.join('export', self.get_filename(table))
+        state = self.highwater.get(table, {})
+        column = self.get_highwater_column(columns)
+        with self.pool.connection() as conn:
+            # all queries see the same snapshot, so the high-water mark and the exported rows match
+            conn.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            # take the high-water mark first, rows that are added during the export will be exported next time
+            high = conn.execute(f'SELECT MAX({column})::TEXT FROM {table}').fetchone()[0] if column else None
+            last = state.get('value')
+            append = incremental and column and last is not None and state.get('file') == filename and \
+                path.exists(filename)
+            if append:
+                if high is None:
+                    return 0
+                if 'seen' in state:
+                    where = (f'WHERE {column} > %s::{columns[column]} - {OVERLAP[column]} AND {column} <= %s '
+                             f'AND NOT ({self.get_row_key(table, column)} = ANY(%s))')
+                    params = (last, high, state['seen'])
+                else:
+                    where = f'WHERE {column} > %s AND {column} <= %s'
+                    params = (last, high)
+            elif high is not None:
+                where = f'WHERE {column} <= %s'
+                params = (high, )
+            else:
+                where = ''
+                params = ()
+            if filename.endswith('.parquet'):
+                # parquet files can't be appended, new rows are written into a separate part file
+                if append:
+                    filename = filename.replace(
+                        '.parquet', '.{}.parquet'.format(datetime.now().strftime('%Y%m%d_%H%M%S')))
+                else:
+                    for file in os.listdir('export'):
+                        if file.startswith(f'{table}.') and file.endswith('.parquet'):
+                            os.remove(path.join('export', file))
+                count = self.write_parquet(conn, table, columns, where, params, filename + '.tmp')
+                if count or not append:
+                    os.replace(filename + '.tmp', filename)
+                else:
+                    os.remove(filename + '.tmp')
+            elif append:
+                count = self.write_json(conn, table, where, params, filename, append=True)
+            else:
+                count = self.write_json(conn, table, where, params, filename + '.tmp', append=False)
+                if count:
+                    os.replace(filename + '.tmp', filename)
+                else:
+                    os.remove(filename + '.tmp')
+            if high is not None:
+                seen = [x[0] for x in conn.execute(f"""
+                    SELECT {self.get_row_key(table, column)} FROM {table}
+                    WHERE {column} > %s::{columns[column]} - {OVERLAP[column]} AND {column} <= %s
+                """, (high, high)).fetchall()]
+        with self.state_lock:
+            if high is not None:
+                self.highwater[table] = {
+                    "column": column,
+                    "value": high,
+                    "seen": seen,
+                    "file": path.join('export', self.get_filename(table))
+                }
+            else:
+                self.highwater.pop(table, None)
+        return count
+
+    def do_export(self, table_filter: list[str], incremental: Union[bool, list[str]] = False):
+        config = self.get_config()
+        if config.get('format', 'json') == 'parquet' and not pyarrow:
+            self.log.error("DBExporter: format parquet needs pyarrow to be installed.")
+            return
+        elif config.get('compression') == 'zstd' and not zstandard:
+            self.log.error("DBExporter: compression zstd needs zstandard to be installed.")
+            return
+        tables = self.get_tables(table_filter)
+
+        def export(table: str):
+            try:
+                if isinstance(incremental, bool):
+                    append = incremental and table in APPEND_ONLY_TABLES
+                else:
+                    append = table in incremental
+                count = self.export_table(table, tables[table], append)
+                self.log.debug(f"DBExporter: {count} rows of table {table} exported.")
+            except Exception as ex:
+                self.log.error(f"DBExporter: error while exporting table {table}: {ex}")
+
+        # every worker uses its own database connection
+        with ThreadPoolExecutor(max_workers=config.get('workers', 2), thread_name_prefix='DBExporter') as executor:
+            list(executor.map(export, tables.keys()))
+        with open(HIGHWATER_FILE, mode='w', encoding='utf-8') as file:
+            json.dump(self.highwater, file, indent=2)
 
     @command(description='Exports database tables as json.')
     @app_commands.guild_only()
@@ -43,13 +256,16 @@ class DBExporter(Plugin):
     async def export(self, interaction: discord.Interaction):
         ephemeral = utils.get_ephemeral(interaction)
         await interaction.response.defer(thinking=True, ephemeral=ephemeral)
-        self.do_export([])
+        async with self.lock:
+            await asyncio.to_thread(self.do_export, [])
         await interaction.delete_original_response()
         await interaction.followup.send('Database dumped to ./export', ephemeral=ephemeral)
 
     @tasks.loop(hours=1.0)
     async def schedule(self):
-        self.do_export(self.get_config().get('tablefilter', []))
+        config = self.get_config()
+        async with self.lock:
+            await asyncio.to_thread(self.do_export, config.get('tablefilter', []), config.get('incremental', False))
 
 
 async def setup(bot: DCSServerBot):
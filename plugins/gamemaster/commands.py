@@ -51,10 +51,12 @@ class GameMaster(Plugin):
         self.log.debug('Pruning Gamemaster ...')
         if days > -1:
             conn.execute(f"DELETE FROM campaigns WHERE stop < (DATE(NOW()) - interval '{days} days')")
+            utils.invalidate_running_campaign()
         self.log.debug('Gamemaster pruned.')
 
     def rename(self, conn: psycopg.Connection, old_name: str, new_name: str):
         conn.execute('UPDATE campaigns_servers SET server_name = %s WHERE server_name = %s', (new_name, old_name))
+        utils.invalidate_running_campaign()
 
     async def update_ucid(self, conn: psycopg.Connection, old_ucid: str, new_ucid: str) -> None:
         conn.execute('UPDATE coalitions SET player_ucid = %s WHERE player_ucid = %s', (new_ucid, old_ucid))
@@ -275,6 +277,7 @@ class GameMaster(Plugin):
                         SELECT id, %s FROM campaigns WHERE name = %s 
                         ON CONFLICT DO NOTHING
                         """, (server.name, campaign))
+            utils.invalidate_running_campaign()
             await interaction.response.send_message(f"Server {server.name} added to campaign {campaign}.",
                                                     ephemeral=ephemeral)
         except psycopg.errors.UniqueViolation:
@@ -4,7 +4,7 @@ import logging
 import os
 import psycopg
 from contextlib import closing
-from core import EventListener, Side, Coalition, Channel, utils, event, chat_command
+from core import EventListener, Side, Coalition, Channel, ProfileCache, utils, event, chat_command
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 from typing import Optional, TYPE_CHECKING
@@ -140,6 +140,7 @@ class GameMasterEventListener(EventListener):
                         campaign_id = cursor.fetchone()[0]
                         cursor.execute('DELETE FROM campaigns_servers WHERE campaign_id = %s', (campaign_id,))
                         cursor.execute('DELETE FROM campaigns WHERE id = %s', (campaign_id,))
+        utils.invalidate_running_campaign()
 
     @event(name="startCampaign")
     async def startCampaign(self, server: Server, data: dict) -> None:
@@ -209,6 +210,7 @@ class GameMasterEventListener(EventListener):
                         ON CONFLICT (server_name, player_ucid) DO UPDATE 
                         SET coalition = excluded.coalition, coalition_leave = excluded.coalition_leave
                     """, (server.name, player.ucid, coalition))
+                    ProfileCache().invalidate(player.ucid)
                     player.coalition = Coalition(coalition)
 
         # welcome them in DCS
@@ -257,6 +259,7 @@ class GameMasterEventListener(EventListener):
                                     raise
                         cursor.execute('DELETE FROM coalitions WHERE server_name = %s AND player_ucid = %s',
                                        (server.name, row[0]))
+                        ProfileCache().invalidate(row[0])
                     server.send_to_dcs({"command": "resetUserCoalitions"})
 
     @event(name="resetUserCoalitions")
@@ -3,6 +3,8 @@ from typing import Optional
 from .const import *
 from .version import __version__
 
+__requires__ = ["missionstats"]
+
 
 def get_element(comment: str, element: str) -> Optional[str]:
     if element == 'wire':
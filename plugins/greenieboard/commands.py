@@ -1,12 +1,16 @@
+import asyncio
 import discord
+import os
 import psycopg
 import shutil
 
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import closing
 from core import Plugin, PluginRequiredError, utils, PaginationReport, Report, Group, Server, DEFAULT_TAG
 from datetime import timezone
 from discord import SelectOption, app_commands
 from discord.app_commands import Range
+from pathlib import Path
 from psycopg.rows import dict_row
 from services import DCSServerBot
 from typing import Optional, Union
@@ -133,6 +137,69 @@ class GreenieBoard(Plugin):
         finally:
             await interaction.delete_original_response()
 
+    @traps.command(name='import', description='Imports historical Moose.AIRBOSS trapsheets')
+    @app_commands.guild_only()
+    @utils.app_has_role('Admin')
+    async def _import(self, interaction: discord.Interaction,
+                      server: app_commands.Transform[Server, utils.ServerTransformer]):
+        ephemeral = utils.get_ephemeral(interaction)
+        config = self.get_config(server)
+        if 'Moose.AIRBOSS' not in config:
+            await interaction.response.send_message(
+                'Only trapsheets of Moose.AIRBOSS can be imported.', ephemeral=True)
+            return
+        if server.is_remote:
+            await interaction.response.send_message(
+                'Trapsheets can only be imported from servers on the master node.', ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=ephemeral)
+        dirname = os.path.join(server.instance.home, config['Moose.AIRBOSS']['basedir'])
+        with self.pool.connection() as conn:
+            known = set(x[0] for x in conn.execute(
+                "SELECT trapsheet FROM greenieboard WHERE trapsheet IS NOT NULL").fetchall())
+        files = [str(x) for x in Path(dirname).glob('*.csv') if str(x) not in known]
+        # numpy and matplotlib are only loaded when they are needed
+        from .trapsheet import read_trapsheet_info
+
+        # parse the trapsheets in parallel
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor() as executor:
+            traps = [
+                x for x in await asyncio.gather(*[
+                    loop.run_in_executor(executor, read_trapsheet_info, file) for file in files
+                ]) if x
+            ]
+        if not traps:
+            await interaction.followup.send('No new trapsheets found.', ephemeral=ephemeral)
+            return
+        ratings = config.get('ratings', {})
+        with self.pool.connection() as conn:
+            with conn.transaction():
+                # the player names in the filenames have no punctuation
+                names = {
+                    row[0]: row[1] for row in conn.execute("""
+                        SELECT TRIM(REGEXP_REPLACE(name, '[[:punct:]]', '', 'g')), ucid FROM players
+                        WHERE TRIM(REGEXP_REPLACE(name, '[[:punct:]]', '', 'g')) = ANY(%s) ORDER BY last_seen
+                    """, ([x['name'] for x in traps], )).fetchall()
+                }
+                rows = []
+                for trap in traps:
+                    ucid = names.get(trap['name'])
+                    if not ucid:
+                        continue
+                    grade = GreenieBoardEventListener.normalize_airboss_lso_rating(trap['grade'])
+                    rows.append((ucid, trap['unit_type'], grade, trap['details'], trap['carrier'],
+                                 ratings.get(grade, trap['points']), trap['trapsheet'], trap['time']))
+                with closing(conn.cursor()) as cursor:
+                    cursor.executemany("""
+                        INSERT INTO greenieboard (mission_id, player_ucid, unit_type, grade, comment, place, trapcase, 
+                                                  night, points, trapsheet, time) 
+                        VALUES (-1, %s, %s, %s, %s, %s, 1, FALSE, %s, %s, %s)
+                    """, rows)
+        await self.eventlistener.update_greenieboard(server)
+        await interaction.followup.send(f'{len(rows)} traps imported, {len(traps) - len(rows)} skipped (unknown '
+                                        f'player).', ephemeral=ephemeral)
+
 
 async def setup(bot: DCSServerBot):
     if 'missionstats' not in bot.plugins:
@@ -4,7 +4,6 @@ import string
 import sys
 import uuid
 from core import EventListener, Server, Player, Channel, Side, Plugin, PersistentReport, event
-from matplotlib import pyplot as plt
 from pathlib import Path
 from plugins.creditsystem.player import CreditPlayer
 from plugins.greenieboard import get_element
@@ -150,6 +149,8 @@ class GreenieBoardEventListener(EventListener):
             if not os.path.exists(filepath):
                 os.mkdir(filepath)
             try:
+                from matplotlib import pyplot as plt
+
                 filename = filepath + os.path.sep + f'{uuid.uuid4()}.png'
                 fig, _ = self.funkplot.PlotTrapSheet(data)
                 fig.savefig(filename, bbox_inches='tight', facecolor='#2C2F33')
@@ -176,6 +177,8 @@ class GreenieBoardEventListener(EventListener):
             return
         player: Player = server.get_player(name=data['initiator']['name']) if 'name' in data['initiator'] else None
         if player:
+            # the event data is read-only
+            data = dict(data)
             update = False
             if 'Moose.AIRBOSS' in config:
                 if server.is_remote:
@@ -197,6 +200,8 @@ class GreenieBoardEventListener(EventListener):
         config = self.plugin.get_config(server)
         player: Player = server.get_player(name=data['name']) if 'name' in data else None
         if player:
+            # the event data is read-only
+            data = dict(data)
             self.process_funkman_event(config, server, player, data)
             await self.send_chat_message(player, data)
             await self.update_greenieboard(server)
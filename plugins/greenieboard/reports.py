@@ -1,4 +1,6 @@
+import asyncio
 import discord
+import hashlib
 import os
 import re
 
@@ -110,6 +112,21 @@ class LSORating(report.EmbedElement):
 
 class TrapSheet(report.MultiGraphElement):
 
+    @staticmethod
+    def get_cache_file(trapsheet: str) -> str:
+        # the filename is part of the plot, too (aircraft, SH passes)
+        digest = hashlib.sha1(os.path.basename(trapsheet).encode('utf-8'))
+        with open(trapsheet, mode='rb') as file:
+            digest.update(file.read())
+        return os.path.join(os.path.dirname(trapsheet), 'cache', digest.hexdigest() + '.png')
+
+    def save(self, filename: str):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        self.env.figure.subplots_adjust(hspace=0.5, wspace=0.5)
+        tmp = filename + '.tmp'
+        self.env.figure.savefig(tmp, format='png', bbox_inches='tight', facecolor='#2C2F33')
+        os.replace(tmp, filename)
+
     async def render(self, landing: dict):
         if 'trapsheet' not in landing or not landing['trapsheet']:
             raise NothingToPlot()
@@ -118,9 +135,14 @@ class TrapSheet(report.MultiGraphElement):
             self.log.error(f"Can't read trapsheet {landing['trapsheet']}, file not found.")
             return
         if landing['trapsheet'].endswith('.csv'):
-            ts = read_trapsheet(trapsheet)
-            ps = parse_filename(trapsheet)
-            plot_trapsheet(self.axes, ts, ps, trapsheet)
+            # trapsheets don't change, so they are only plotted once
+            filename = await asyncio.to_thread(self.get_cache_file, trapsheet)
+            if not os.path.exists(filename):
+                ts = await asyncio.to_thread(read_trapsheet, trapsheet)
+                ps = parse_filename(trapsheet)
+                plot_trapsheet(self.axes, ts, ps, trapsheet)
+                await asyncio.to_thread(self.save, filename)
+            self.env.filename = filename
         elif landing['trapsheet'].endswith('.png'):
             self.env.filename = landing['trapsheet']
         else:
@@ -2,37 +2,72 @@ import csv
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+import os
+import re
 
 from datetime import datetime, timezone
 from numpy import ndarray
 from matplotlib.axes import Axes
 from pathlib import Path
+from typing import Optional, Union
 
 ######################################################
 # This file has been taken and amended from HypeMan! #
 ######################################################
 
 
-def read_trapsheet(filename: str) -> dict[str, ndarray]:
-    # read a trap sheet into a dictionary as numpy arrays
-    d = {}
+def read_trapsheet(filename: str) -> dict[str, Union[ndarray, str]]:
+    # read a trap sheet into a dictionary as numpy arrays, non-numeric columns keep their last value only
     with open(filename) as f:
-        reader = csv.DictReader(f)
-
-        for k in reader.fieldnames:
-            d[k] = np.array([])
-
-        for row in reader:
-            for k in reader.fieldnames:
-                svalue = row[k]
-                try:
-                    fvalue = float(svalue)
-                    d[k] = np.append(d[k], fvalue)
-                except ValueError:
-                    d[k] = svalue
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row for row in reader if row]
+    d = {}
+    columns = zip(*rows) if rows else [()] * len(header)
+    for k, column in zip(header, columns):
+        try:
+            d[k] = np.array(column, dtype=float)
+        except ValueError:
+            d[k] = column[-1]
     return d
 
 
+TRAPSHEET_NAME = re.compile(r'(?:.*AIRBOSS-)?(?P<carrier>.+?)_Trapsheet-(?P<name>.+?)_(?P<unit_type>FA-18C_hornet|[^_]+)'
+                            r'-\d+$')
+
+
+def read_trapsheet_info(filename: str) -> Optional[dict]:
+    # read the data of a trap from its trapsheet, used for the import of historical trapsheets
+    match = TRAPSHEET_NAME.match(Path(filename).stem)
+    if not match:
+        return None
+    try:
+        ts = read_trapsheet(filename)
+    except Exception:
+        return None
+    grade = ts.get('Grade')
+    if not isinstance(grade, str) or not grade.strip():
+        return None
+    points = ts.get('Points')
+    if isinstance(points, ndarray):
+        points = float(points[-1]) if len(points) else None
+    else:
+        try:
+            points = float(points)
+        except (TypeError, ValueError):
+            points = None
+    return {
+        "trapsheet": filename,
+        "carrier": match.group('carrier'),
+        "name": match.group('name'),
+        "unit_type": match.group('unit_type'),
+        "grade": grade.strip(),
+        "details": ts['Details'] if isinstance(ts.get('Details'), str) else '',
+        "points": points,
+        "time": datetime.fromtimestamp(os.path.getmtime(filename), tz=timezone.utc).replace(tzinfo=None)
+    }
+
+
 def set_spine(ax, color):
     ax.spines['bottom'].set_color(color)
     ax.spines['top'].set_color(color)
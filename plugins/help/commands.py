@@ -1,6 +1,5 @@
 import discord
 import os
-import pandas as pd
 
 from core import Plugin, Report, ReportEnv, command, Command, utils
 from discord import app_commands
@@ -9,10 +8,13 @@ from discord.ui import View, Select, Button, Modal, TextInput
 from functools import cache
 from io import BytesIO
 from services import DCSServerBot
-from typing import cast, Optional, Literal
+from typing import cast, Optional, Literal, TYPE_CHECKING
 
 from .listener import HelpListener
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @cache
 async def get_commands(interaction: discord.Interaction) -> dict[str, app_commands.Command]:
@@ -245,7 +247,9 @@ class Help(Plugin):
             finally:
                 await interaction.delete_original_response()
 
-    async def discord_commands_to_df(self, interaction: discord.Interaction) -> pd.DataFrame:
+    async def discord_commands_to_df(self, interaction: discord.Interaction) -> "pd.DataFrame":
+        import pandas as pd
+
         df = pd.DataFrame(columns=['Plugin', 'Command', 'Parameter', 'Roles', 'Description'])
         for cmd in sorted((await get_commands(interaction)).values(), key=lambda x: x.qualified_name):
             for check in cmd.checks:
@@ -272,7 +276,9 @@ class Help(Plugin):
                 df = pd.concat([df, data_df], ignore_index=True)
         return df
 
-    async def ingame_commands_to_df(self) -> pd.DataFrame:
+    async def ingame_commands_to_df(self) -> "pd.DataFrame":
+        import pandas as pd
+
         df = pd.DataFrame(columns=['Plugin', 'Command', 'Parameter', 'Roles', 'Description'])
         for listener in self.bot.eventListeners:
             for cmd in listener.chat_commands:
@@ -308,6 +314,8 @@ class Help(Plugin):
                 await interaction.response.defer()
 
         if format == 'xls':
+            import pandas as pd
+
             discord_commands = (await self.discord_commands_to_df(interaction)).sort_values(['Plugin', 'Command'])
             ingame_commands = (await self.ingame_commands_to_df()).sort_values(['Plugin', 'Command'])
             output = BytesIO()
@@ -5,7 +5,7 @@ import psycopg
 import re
 
 from core import utils, Plugin, Report, Status, Server, Coalition, Channel, Player, PluginRequiredError, MizFile, \
-    Group, ReportEnv, UploadStatus
+    Group, ReportEnv, UploadStatus, ProfileCache
 from datetime import datetime
 from discord import Interaction, app_commands
 from discord.app_commands import Range
@@ -108,6 +108,7 @@ class Mission(Plugin):
         conn.execute("""
             UPDATE bans SET ucid = %s WHERE ucid = %s AND NOT EXISTS (SELECT 1 FROM bans WHERE ucid = %s)
         """, (new_ucid, old_ucid, new_ucid))
+        ProfileCache().invalidate(old_ucid, new_ucid)
 
     # New command group "/mission"
     mission = Group(name="mission", description="Commands to manage a DCS mission")
@@ -760,6 +761,7 @@ class Mission(Plugin):
             with conn.transaction():
                 # migrate active bans from the punishment system and migrate them to the new method (fix days only)
                 for row in conn.execute("""SELECT ucid FROM bans WHERE banned_until < NOW()""").fetchall():
+                    ProfileCache().invalidate(row[0])
                     for server in self.bot.servers.values():
                         if server.status not in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
                             continue
@@ -4,9 +4,8 @@ import discord
 import os
 import shlex
 
-from contextlib import closing
 from core import utils, EventListener, PersistentReport, Plugin, Report, Status, Side, Mission, Player, Coalition, \
-    Channel, DataObjectFactory, event, chat_command, ServiceRegistry
+    Channel, DataObjectFactory, event, chat_command, ServiceRegistry, ProfileCache
 from datetime import datetime, timezone
 from discord.ext import tasks
 from psycopg.rows import dict_row
@@ -200,8 +199,7 @@ class MissionEventListener(EventListener):
     @event(name="callback")
     async def callback(self, server: Server, data: dict):
         if data['subcommand'] in ['startMission', 'restartMission', 'pause', 'shutdown']:
-            data['command'] = data['subcommand']
-            server.send_to_dcs(data)
+            server.send_to_dcs(data | {'command': data['subcommand']})
 
     @staticmethod
     def _update_mission(server: Server, data: dict) -> None:
@@ -211,10 +209,11 @@ class MissionEventListener(EventListener):
                 name=data['current_mission'])
         server.current_mission.update(data)
 
-    def _update_bans(self, server: Server):
-        with self.pool.connection() as conn:
-            with closing(conn.cursor(row_factory=dict_row)) as cursor:
-                for ban in cursor.execute('SELECT ucid, reason, banned_until FROM bans WHERE banned_until >= NOW()'):
+    async def _update_bans(self, server: Server):
+        async with self.apool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute('SELECT ucid, reason, banned_until FROM bans WHERE banned_until >= NOW()')
+                async for ban in cursor:
                     if ban['banned_until'].year == 9999:
                         until = 'never'
                     else:
@@ -250,14 +249,14 @@ class MissionEventListener(EventListener):
         # the server is starting up
         # if not data['channel'].startswith('sync-'):
         #    return
-        self._update_bans(server)
+        await self._update_bans(server)
         if 'current_mission' not in data:
             server.status = Status.STOPPED
             return
         self._update_mission(server, data)
         if 'players' not in data:
-            server.players.clear()
-            data['players'] = []
+            server.clear_players()
+            data = data | {'players': []}
             server.status = Status.STOPPED
         elif data['channel'].startswith('sync-'):
             server.status = Status.PAUSED if data['pause'] is True else Status.RUNNING
@@ -265,6 +264,10 @@ class MissionEventListener(EventListener):
         # all players are inactive for now
         for p in server.players.values():
             p.active = False
+        # preload the profiles of all new players at once
+        await ProfileCache().load(self.apool, [
+            p['ucid'] for p in data['players'] if p['id'] != 1 and not server.get_player(ucid=p['ucid'])
+        ])
         for p in data['players']:
             if p['id'] == 1:
                 continue
@@ -276,15 +279,16 @@ class MissionEventListener(EventListener):
                     unit_callsign=p['unit_callsign'], unit_name=p['unit_name'], unit_type=p['unit_type'],
                     unit_display_name=p.get('unit_display_name', p['unit_type']), group_id=p['group_id'],
                     group_name=p['group_name'])
+                await player.load()
                 server.add_player(player)
             else:
-                player.update(p)
+                await player.update(p)
             if Side(p['side']) == Side.SPECTATOR:
                 server.afk[player.ucid] = datetime.now()
         # cleanup inactive players
         for p in list(server.players.values()):
             if not p.active and not p.id == 1:
-                del server.players[p.id]
+                server.remove_player(p)
         self.display_mission_embed(server)
         self.display_player_embed(server)
 
@@ -347,9 +351,10 @@ class MissionEventListener(EventListener):
             player: Player = DataObjectFactory().new(
                 Player.__name__, node=server.node, server=server, id=data['id'], name=data['name'],
                 active=data['active'], side=Side(data['side']), ucid=data['ucid'])
+            await player.load()
             server.add_player(player)
         else:
-            player.update(data)
+            await player.update(data)
         if player.member:
             server.send_to_dcs({
                 'command': 'uploadUserRoles',
@@ -369,9 +374,10 @@ class MissionEventListener(EventListener):
             player = DataObjectFactory().new(
                 Player.__name__, node=server.node, server=server, id=data['id'], name=data['name'],
                 active=data['active'], side=Side(data['side']), ucid=data['ucid'])
+            await player.load()
             server.add_player(player)
         else:
-            player.update(data)
+            await player.update(data)
         # add the player to the afk list
         server.afk[player.ucid] = datetime.now()
         self.display_mission_embed(server)
@@ -411,7 +417,7 @@ class MissionEventListener(EventListener):
                                                                                           data['name']))
         finally:
             if player:
-                player.update(data)
+                await player.update(data)
             self.display_player_embed(server)
 
     @event(name="onGameEvent")
@@ -1,6 +1,12 @@
 import asyncio
+import psycopg
+
+from collections import deque
+from copy import deepcopy
 from core import EventListener, Plugin, PersistentReport, Status, Server, Coalition, Channel, event, Report
+from datetime import datetime, timezone
 from discord.ext import tasks
+from typing import Optional
 
 
 class MissionStatisticsEventListener(EventListener):
@@ -38,14 +44,26 @@ class MissionStatisticsEventListener(EventListener):
         if not self.bot.mission_stats:
             self.bot.mission_stats = dict()
         self.update: dict[str, bool] = dict()
+        # write-behind buffer for the missionstats table
+        config = self.get_config()
+        self.flush_size = config.get('flush_size', 500)
+        self.buffer: deque[tuple] = deque(maxlen=config.get('max_buffer', 10000))
+        self.buffer_lock = asyncio.Lock()
+        self.overflows = 0
+        self.reported_overflows = 0
         self.do_update.start()
+        self.flush_buffer.change_interval(seconds=config.get('flush_interval', 1000) / 1000)
+        self.flush_buffer.start()
 
     async def shutdown(self):
         self.do_update.cancel()
+        self.flush_buffer.cancel()
+        await self.flush()
 
     @event(name="getMissionSituation")
     async def getMissionSituation(self, server: Server, data: dict) -> None:
-        self.bot.mission_stats[server.name] = data
+        # the statistics will be updated by the mission events
+        self.bot.mission_stats[server.name] = deepcopy(data)
 
     def _toggle_mission_stats(self, server: Server):
         if self.plugin.get_config(server).get('enabled', True):
@@ -63,7 +81,7 @@ class MissionStatisticsEventListener(EventListener):
     async def onSimulationStart(self, server: Server, data: dict) -> None:
         self._toggle_mission_stats(server)
 
-    def _update_database(self, server: Server, config: dict, data: dict):
+    def _create_row(self, server: Server, config: dict, data: dict) -> Optional[tuple]:
         def get_value(values: dict, index1, index2):
             if index1 not in values:
                 return None
@@ -72,7 +90,7 @@ class MissionStatisticsEventListener(EventListener):
             return values[index1][index2]
 
         if not config.get('persistence', True) or data['eventName'] in config.get('event_filter', []):
-            return
+            return None
         player = get_value(data, 'initiator', 'name')
         init_player = server.get_player(name=player) if player else None
         init_type = get_value(data, 'initiator', 'type')
@@ -81,37 +99,86 @@ class MissionStatisticsEventListener(EventListener):
         target_type = get_value(data, 'target', 'type')
         if (config.get('persist_ai_statistics', False) or (init_player and init_type == 'UNIT') or
                 (target_player and target_type == 'UNIT')):
-            dataset = {
-                'mission_id': server.mission_id,
-                'event': data['eventName'],
-                'init_id': init_player.ucid if init_player else -1,
-                'init_side': get_value(data, 'initiator', 'coalition'),
-                'init_type': get_value(data, 'initiator', 'unit_type'),
-                'init_cat': self.UNIT_CATEGORY.get(get_value(data, 'initiator', 'category'), 'Unknown'),
-                'target_id': target_player.ucid if target_player else -1,
-                'target_side': get_value(data, 'target', 'coalition'),
-                'target_type': get_value(data, 'target', 'unit_type'),
-                'target_cat': self.UNIT_CATEGORY.get(get_value(data, 'target', 'category'), 'Unknown'),
-                'weapon': get_value(data, 'weapon', 'name'),
-                'place': get_value(data, 'place', 'name'),
-                'comment': data['comment'] if 'comment' in data else ''
-            }
-            with self.pool.connection() as conn:
-                with conn.transaction():
-                    conn.execute("""
-                        INSERT INTO missionstats (mission_id, event, init_id, init_side, init_type, init_cat, 
-                                                  target_id, target_side, target_type, target_cat, weapon, place, 
-                                                  comment) 
-                        VALUES (%(mission_id)s, %(event)s, %(init_id)s, %(init_side)s, %(init_type)s, %(init_cat)s, 
-                                %(target_id)s, %(target_side)s, %(target_type)s, %(target_cat)s, %(weapon)s, 
-                                %(place)s, %(comment)s)
-                    """, dataset)
+            # the order has to match the column list in flush()
+            return (
+                server.mission_id,
+                data['eventName'],
+                init_player.ucid if init_player else -1,
+                get_value(data, 'initiator', 'coalition'),
+                get_value(data, 'initiator', 'unit_type'),
+                self.UNIT_CATEGORY.get(get_value(data, 'initiator', 'category'), 'Unknown'),
+                target_player.ucid if target_player else -1,
+                get_value(data, 'target', 'coalition'),
+                get_value(data, 'target', 'unit_type'),
+                self.UNIT_CATEGORY.get(get_value(data, 'target', 'category'), 'Unknown'),
+                get_value(data, 'weapon', 'name'),
+                get_value(data, 'place', 'name'),
+                data['comment'] if 'comment' in data else '',
+                # the event time, as the rows might be written a while later
+                datetime.now(timezone.utc)
+            )
+        return None
+
+    def _enqueue(self, rows: list[tuple], *, left: bool = False):
+        # the buffer is bounded, the oldest events will be discarded on overflow
+        overflow = len(self.buffer) + len(rows) - self.buffer.maxlen
+        if overflow > 0:
+            self.overflows += overflow
+        if left:
+            # extendleft() would drop the newest events, but the rows that are put back are the oldest ones
+            if overflow > 0:
+                rows = rows[overflow:]
+            self.buffer.extendleft(reversed(rows))
+        else:
+            self.buffer.extend(rows)
+
+    async def _write(self, rows: list[tuple]):
+        async with self.apool.connection() as conn:
+            # the time column holds the local time of the database session, like its default NOW() does
+            tz = conn.info.timezone
+            async with conn.transaction():
+                async with conn.cursor() as cursor:
+                    async with cursor.copy("""
+                        COPY missionstats (mission_id, event, init_id, init_side, init_type, init_cat, 
+                                           target_id, target_side, target_type, target_cat, weapon, place, 
+                                           comment, time) FROM STDIN
+                    """) as copy:
+                        for row in rows:
+                            await copy.write_row(row[:-1] + (row[-1].astimezone(tz).replace(tzinfo=None), ))
+
+    async def flush(self):
+        async with self.buffer_lock:
+            if not self.buffer:
+                return
+            batches = [list(self.buffer)]
+            self.buffer.clear()
+            while batches:
+                rows = batches.pop(0)
+                try:
+                    await self._write(rows)
+                except (psycopg.DataError, psycopg.IntegrityError, psycopg.ProgrammingError) as ex:
+                    # a row got rejected, split the batch to write all other rows and drop the bad one
+                    if len(rows) == 1:
+                        self.log.error(f"MissionStats: dropping event {rows[0]}: {ex}")
+                    else:
+                        half = len(rows) // 2
+                        batches[:0] = [rows[:half], rows[half:]]
+                except Exception as ex:
+                    self.log.exception(ex)
+                    # the database is not available, put the rows back in front of the buffer to retry them on the
+                    # next flush (the buffer is bounded, so the oldest events are dropped if this takes too long)
+                    self._enqueue([row for batch in [rows] + batches for row in batch], left=True)
+                    return
 
     @event(name="onMissionEvent")
     async def onMissionEvent(self, server: Server, data: dict) -> None:
         config = self.plugin.get_config(server)
         if config.get('persistence', True):
-            await asyncio.to_thread(self._update_database, server, config, data)
+            row = self._create_row(server, config, data)
+            if row:
+                self._enqueue([row])
+                if len(self.buffer) >= self.flush_size and not self.buffer_lock.locked():
+                    asyncio.create_task(self.flush())
         if not data['server_name'] in self.bot.mission_stats or not data.get('initiator'):
             return
         stats = self.bot.mission_stats[data['server_name']]
@@ -203,9 +270,14 @@ class MissionStatisticsEventListener(EventListener):
         if update:
             self.update[server.name] = True
 
+    @event(name="onSimulationStop")
+    async def onSimulationStop(self, server: Server, data: dict) -> None:
+        await self.flush()
+
     @event(name="onGameEvent")
     async def onGameEvent(self, server: Server, data: dict) -> None:
         if data['eventName'] == 'mission_end':
+            await self.flush()
             config = self.get_config(server)
             if 'mission_end' in config:
                 title = config['mission_end'].get('title', 'Mission Result')
@@ -238,3 +310,11 @@ class MissionStatisticsEventListener(EventListener):
                         await report.render(stats=stats, mission_id=server.mission_id,
                                             sides=[Coalition.BLUE, Coalition.RED], title='Mission Statistics')
             self.update[server_name] = False
+
+    @tasks.loop(seconds=1)
+    async def flush_buffer(self):
+        await self.flush()
+        if self.overflows > self.reported_overflows:
+            self.log.warning(f"MissionStats: write buffer overflow, {self.overflows - self.reported_overflows} "
+                             f"events discarded (total: {self.overflows}).")
+            self.reported_overflows = self.overflows
@@ -4,7 +4,7 @@ import psycopg
 
 from contextlib import closing, suppress
 from core import Plugin, PluginRequiredError, TEventListener, utils, Player, Server, PluginInstallationError, \
-    command, DEFAULT_TAG, Report
+    command, DEFAULT_TAG, Report, ProfileCache
 from datetime import timezone
 from discord import app_commands
 from discord.app_commands import Range
@@ -22,6 +22,10 @@ class Punishment(Plugin):
         super().__init__(bot, eventlistener)
         if not self.locals:
             raise PluginInstallationError(reason=f"No {self.plugin_name}.yaml file found!", plugin=self.plugin_name)
+        # new punishment events are signalled by the database (see pu_events_insert())
+        self.pu_event = asyncio.Event()
+        self.next_check = 0
+        self.notify_listener = asyncio.create_task(self.listen())
         self.check_punishments.add_exception_type(psycopg.DatabaseError)
         self.check_punishments.start()
         self.decay_config = self.locals.get(DEFAULT_TAG, {}).get('decay')
@@ -31,8 +35,26 @@ class Punishment(Plugin):
     async def cog_unload(self):
         self.decay.cancel()
         self.check_punishments.cancel()
+        self.notify_listener.cancel()
         await super().cog_unload()
 
+    async def listen(self):
+        url = self.node.config.get("database", self.node.locals.get('database'))['url']
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(url, autocommit=True) as conn:
+                    await conn.execute("LISTEN punishment")
+                    # check for events that might have been added while we were not listening
+                    self.pu_event.set()
+                    async for _ in conn.notifies():
+                        self.pu_event.set()
+            except psycopg.OperationalError as ex:
+                self.log.warning(f"Punishment: connection lost ({ex}), reconnecting ...")
+                await asyncio.sleep(5)
+            except Exception as ex:
+                self.log.exception(ex)
+                await asyncio.sleep(5)
+
     def rename(self, conn: psycopg.Connection, old_name: str, new_name: str):
         conn.execute('UPDATE pu_events SET server_name = %s WHERE server_name = %s', (new_name, old_name))
         conn.execute('UPDATE pu_events_sdw SET server_name = %s WHERE server_name = %s', (new_name, old_name))
@@ -101,9 +123,14 @@ class Punishment(Plugin):
         if points:
             player.sendChatMessage(f"Your current punishment points are: {points}")
 
-    # TODO: change to pubsub
-    @tasks.loop(minutes=1.0)
+    @tasks.loop(seconds=1.0)
     async def check_punishments(self):
+        # wait for new events or until the next pending event can't be forgiven anymore
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.pu_event.wait(), timeout=self.next_check)
+        self.pu_event.clear()
+        # polling is a fallback only, in case we missed a notification
+        self.next_check = 300
         async with self.eventlistener.lock:
             with self.pool.connection() as conn:
                 with conn.transaction():
@@ -137,6 +164,14 @@ class Punishment(Plugin):
                                             break
                                 finally:
                                     cursor.execute('DELETE FROM pu_events_sdw WHERE id = %s', (row['id'], ))
+                            # events that are still in their forgive period
+                            due = cursor.execute(f"""
+                                SELECT EXTRACT(EPOCH FROM (MIN(time) + interval '{forgive} seconds' 
+                                                           - timezone('utc', now()))) AS due
+                                FROM pu_events_sdw WHERE server_name = %s
+                            """, (server_name, )).fetchone()['due']
+                            if due is not None:
+                                self.next_check = min(self.next_check, max(float(due), 0) + 1)
 
     @check_punishments.before_loop
     async def before_check(self):
@@ -151,13 +186,14 @@ class Punishment(Plugin):
             self.log.debug('Punishment - Running decay ...')
             with self.pool.connection() as conn:
                 with conn.transaction():
+                    # every event is only decayed once per age bucket, the balance is updated by a trigger
                     for d in self.decay_config:
                         days = d['days']
                         conn.execute(f"""
                             UPDATE pu_events SET points = ROUND((points * %s)::numeric, 2), decay_run = %s 
-                            WHERE time < (timezone('utc', now()) - interval '{days} days') AND decay_run < %s
+                            WHERE decay_run < %s AND time < (timezone('utc', now()) - interval '{days} days')
                         """, (d['weight'], days, days))
-                        conn.execute("DELETE FROM pu_events WHERE points = 0.0")
+                        conn.execute("DELETE FROM pu_events WHERE decay_run = %s AND points = 0.0", (days, ))
 
     @command(name='punish', description='Adds punishment points to a user')
     @utils.app_has_role('DCS Admin')
@@ -212,6 +248,7 @@ class Punishment(Plugin):
                             cursor.execute('DELETE FROM pu_events WHERE init_id = %s', (ucid, ))
                             cursor.execute('DELETE FROM pu_events_sdw WHERE init_id = %s', (ucid, ))
                             cursor.execute("DELETE FROM bans WHERE ucid = %s", (ucid, ))
+                            ProfileCache().invalidate(ucid)
                             for server_name, server in self.bot.servers.items():
                                 server.send_to_dcs({
                                     "command": "unban",
@@ -1,7 +1,12 @@
 CREATE TABLE IF NOT EXISTS pu_events (id SERIAL PRIMARY KEY, init_id TEXT NOT NULL, target_id TEXT, server_name TEXT NOT NULL, event TEXT NOT NULL, points DECIMAL NOT NULL, time TIMESTAMP NOT NULL DEFAULT timezone('utc', now()), decay_run INTEGER NOT NULL DEFAULT -1);
 CREATE INDEX IF NOT EXISTS idx_pu_events_init_id ON pu_events(init_id);
 CREATE INDEX IF NOT EXISTS idx_pu_events_target_id ON pu_events(target_id);
+CREATE INDEX IF NOT EXISTS idx_pu_events_decay ON pu_events(decay_run, time);
 CREATE UNIQUE INDEX idx_pu_events_unique ON pu_events (init_id, COALESCE(target_id, '-1'), event, DATE_TRUNC('minute', time));
 CREATE TABLE IF NOT EXISTS pu_events_sdw (id SERIAL PRIMARY KEY, init_id TEXT NOT NULL, target_id TEXT, server_name TEXT NOT NULL, event TEXT NOT NULL, points DECIMAL NOT NULL, time TIMESTAMP NOT NULL);
-CREATE OR REPLACE FUNCTION pu_events_insert() RETURNS trigger AS $$ BEGIN INSERT INTO pu_events_sdw(init_id, target_id, server_name, event, points, time) SELECT NEW.init_id, NEW.target_id, NEW.server_name, NEW.event, (SELECT SUM(points) FROM pu_events WHERE init_id = NEW.init_id), NEW.time; RETURN NEW; END; $$ LANGUAGE 'plpgsql';
+CREATE TABLE IF NOT EXISTS pu_balance (init_id TEXT PRIMARY KEY, points DECIMAL NOT NULL);
+CREATE OR REPLACE FUNCTION pu_events_insert() RETURNS trigger AS $$ DECLARE total DECIMAL; BEGIN INSERT INTO pu_balance (init_id, points) VALUES (NEW.init_id, NEW.points) ON CONFLICT (init_id) DO UPDATE SET points = pu_balance.points + excluded.points RETURNING points INTO total; INSERT INTO pu_events_sdw(init_id, target_id, server_name, event, points, time) VALUES (NEW.init_id, NEW.target_id, NEW.server_name, NEW.event, total, NEW.time); PERFORM pg_notify('punishment', NEW.server_name); RETURN NEW; END; $$ LANGUAGE 'plpgsql';
+CREATE OR REPLACE FUNCTION pu_events_update() RETURNS trigger AS $$ BEGIN UPDATE pu_balance SET points = points - OLD.points WHERE init_id = OLD.init_id; IF TG_OP = 'UPDATE' THEN INSERT INTO pu_balance (init_id, points) VALUES (NEW.init_id, NEW.points) ON CONFLICT (init_id) DO UPDATE SET points = pu_balance.points + excluded.points; END IF; DELETE FROM pu_balance WHERE init_id = OLD.init_id AND points = 0; RETURN NULL; END; $$ LANGUAGE 'plpgsql';
 CREATE TRIGGER tgr_pu_events_insert AFTER INSERT ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_events_insert();
+CREATE TRIGGER tgr_pu_events_update AFTER UPDATE OF points, init_id ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_events_update();
+CREATE TRIGGER tgr_pu_events_delete AFTER DELETE ON pu_events FOR EACH ROW EXECUTE PROCEDURE pu_events_update();
@@ -29,8 +29,8 @@ class PunishmentEventListener(EventListener):
 
     def _get_punishment_points(self, player: Player) -> int:
         with self.pool.connection() as conn:
-            return conn.execute("SELECT COALESCE(SUM(points), 0) FROM pu_events WHERE init_id = %s",
-                                (player.ucid, )).fetchone()[0]
+            row = conn.execute("SELECT points FROM pu_balance WHERE init_id = %s", (player.ucid, )).fetchone()
+            return row[0] if row else 0
 
     async def _punish(self, data: dict):
         server: Server = self.bot.servers[data['server_name']]
@@ -109,6 +109,8 @@ class PunishmentEventListener(EventListener):
                 if competitive.eventlistener.in_match[server.name].get(player.ucid):
                     return
         if self.plugin.get_config(server) and server.status == Status.RUNNING:
+            # the event data is read-only
+            data = dict(data)
             if data['eventName'] == 'friendly_fire':
                 if data['arg1'] != -1 and data['arg1'] != data['arg3']:
                     initiator = server.get_player(id=data['arg1'])
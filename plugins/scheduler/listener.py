@@ -1,4 +1,6 @@
 import asyncio
+import subprocess
+
 from core import EventListener, utils, Server, Player, Status, event, chat_command
 from os import path
 
@@ -36,7 +38,7 @@ class SchedulerListener(EventListener):
                 }, node=server.node.name)
             else:
                 self.log.debug('Running shell-command: ' + cmd)
-                await asyncio.create_subprocess_shell(cmd)
+                subprocess.Popen(cmd, shell=True)
 
     async def process(self, server: Server, what: dict) -> None:
         if 'shutdown' in what['command']:
@@ -11,21 +11,27 @@ from typing import Optional
 warnings.filterwarnings("ignore", category=UserWarning)
 
 
+def get_rollup(period: Optional[str]) -> tuple[str, str]:
+    # use the daily statistics for a period, the monthly ones otherwise
+    if period:
+        return 'statistics_daily', f"s.day > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
+    return 'statistics_monthly', '1 = 1'
+
+
 class ServerUsage(report.EmbedElement):
 
     async def render(self, server_name: Optional[str], period: Optional[str]):
+        table, where = get_rollup(period)
         sql = f"""
-            SELECT trim(regexp_replace(m.server_name, '{self.bot.filter['server_name']}', '', 'g')) AS server_name, 
-                   ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600) AS playtime, 
+            SELECT trim(regexp_replace(s.server_name, '{self.bot.filter['server_name']}', '', 'g')) AS server_name, 
+                   ROUND(SUM(s.playtime) / 3600) AS playtime, 
                    COUNT(DISTINCT s.player_ucid) AS players, 
                    COUNT(DISTINCT p.discord_id) AS members 
-            FROM missions m, statistics s, players p 
-            WHERE m.id = s.mission_id AND s.player_ucid = p.ucid AND s.hop_off IS NOT NULL
+            FROM {table} s, players p 
+            WHERE s.player_ucid = p.ucid AND {where}
         """
         if server_name:
-            sql += f' AND m.server_name = %s'
-        if period:
-            sql += f" AND DATE(s.hop_on) > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
+            sql += f' AND s.server_name = %s'
         sql += ' GROUP BY 1 ORDER BY 2 DESC'
 
         with self.pool.connection() as conn:
@@ -55,18 +61,17 @@ class TopMissionPerServer(report.EmbedElement):
         sql_left = 'SELECT server_name, mission_name, playtime FROM (SELECT server_name, ' \
                                       'mission_name, playtime, ROW_NUMBER() OVER(PARTITION BY server_name ORDER BY ' \
                                       'playtime DESC) AS rn FROM ('
+        table, where = get_rollup(period)
         sql_inner = f"""
-            SELECT trim(regexp_replace(m.server_name, '{self.bot.filter['server_name']}', '', 'g')) AS server_name, 
-                   trim(regexp_replace(m.mission_name, '{self.bot.filter['mission_name']}', ' ', 'g')) AS mission_name, 
-                   ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600) AS playtime 
-            FROM missions m, statistics s 
-            WHERE m.id = s.mission_id AND s.hop_off IS NOT NULL
+            SELECT trim(regexp_replace(s.server_name, '{self.bot.filter['server_name']}', '', 'g')) AS server_name, 
+                   trim(regexp_replace(s.mission_name, '{self.bot.filter['mission_name']}', ' ', 'g')) AS mission_name, 
+                   ROUND(SUM(s.playtime) / 3600) AS playtime 
+            FROM {table} s 
+            WHERE {where}
         """
         sql_right = ') AS x) AS y WHERE rn {} ORDER BY 3 DESC'
         if server_name:
-            sql_inner += f' AND m.server_name = %s'
-        if period:
-            sql_inner += f" AND DATE(s.hop_on) > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
+            sql_inner += f' AND s.server_name = %s'
         sql_inner += ' GROUP BY 1, 2'
 
         with self.pool.connection() as conn:
@@ -94,24 +99,32 @@ class TopMissionPerServer(report.EmbedElement):
 class TopModulesPerServer(report.EmbedElement):
 
     async def render(self, server_name: Optional[str], period: Optional[str], limit: int):
-        sql = """
-            SELECT s.slot, COUNT(s.slot) AS num_usage, 
-                   COALESCE(ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600),0) AS playtime, 
-                   COUNT(DISTINCT s.player_ucid) AS players 
-            FROM missions m, statistics s 
-            WHERE m.id = s.mission_id
-        """
-        if server_name:
-            sql += ' AND m.server_name = %s'
+        table, where = get_rollup(period)
+        # sorties in progress are not part of the rollups yet, so they are counted from the statistics
+        open_where = 's.hop_off IS NULL'
         if period:
-            sql += f" AND DATE(s.hop_on) > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
-        sql += f" GROUP BY s.slot ORDER BY 3 DESC LIMIT {limit}"
+            open_where += f" AND DATE(s.hop_on) > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
+        if server_name:
+            where += ' AND s.server_name = %s'
+            open_where += ' AND m.server_name = %s'
+        sql = f"""
+            SELECT t.slot, SUM(t.sorties) AS num_usage, 
+                   COALESCE(ROUND(SUM(t.playtime) / 3600),0) AS playtime, 
+                   COUNT(DISTINCT t.player_ucid) AS players 
+            FROM (
+                SELECT s.slot, s.sorties, s.playtime, s.player_ucid FROM {table} s WHERE {where}
+                UNION ALL
+                SELECT s.slot, 1, 0, s.player_ucid FROM statistics s, missions m 
+                WHERE s.mission_id = m.id AND {open_where}
+            ) t 
+            GROUP BY t.slot ORDER BY 3 DESC LIMIT {limit}
+        """
 
         with self.pool.connection() as conn:
             with closing(conn.cursor(row_factory=dict_row)) as cursor:
                 modules = playtimes = players = ''
                 if server_name:
-                    rows = cursor.execute(sql, (server_name, )).fetchall()
+                    rows = cursor.execute(sql, (server_name, server_name)).fetchall()
                 else:
                     rows = cursor.execute(sql).fetchall()
                 for row in rows:
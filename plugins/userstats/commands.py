@@ -5,7 +5,8 @@ import random
 from contextlib import closing
 from copy import deepcopy
 from core import utils, Plugin, PluginRequiredError, Report, PaginationReport, Status, Server, Player, \
-    DataObjectFactory, PersistentReport, Channel, command, DEFAULT_TAG, PlayerType
+    DataObjectFactory, PersistentReport, Channel, command, DEFAULT_TAG, PlayerType, ProfileCache
+from datetime import datetime, timezone
 from discord import app_commands, SelectOption
 from discord.app_commands import Range
 from discord.ext import commands, tasks
@@ -65,6 +66,10 @@ class UserStatistics(Plugin):
             conn.execute(f"DELETE FROM statistics WHERE hop_off < (DATE(NOW()) - interval '{days} days')")
         self.log.debug('Userstats pruned.')
 
+    def rename(self, conn: psycopg.Connection, old_name: str, new_name: str):
+        conn.execute('UPDATE statistics_daily SET server_name = %s WHERE server_name = %s', (new_name, old_name))
+        conn.execute('UPDATE statistics_monthly SET server_name = %s WHERE server_name = %s', (new_name, old_name))
+
     async def update_ucid(self, conn: psycopg.Connection, old_ucid: str, new_ucid: str) -> None:
         conn.execute("UPDATE statistics SET player_ucid = %s WHERE player_ucid = %s", (new_ucid, old_ucid))
 
@@ -113,7 +118,9 @@ class UserStatistics(Plugin):
                                                     ephemeral=ephemeral)
                     await self.bot.audit('reset statistics', user=interaction.user, server=_server)
                 else:
-                    conn.execute("TRUNCATE TABLE statistics")
+                    # TRUNCATE does not fire the triggers that maintain the rollups and the statistics version
+                    conn.execute("TRUNCATE TABLE statistics, statistics_daily, statistics_monthly")
+                    conn.execute("SELECT nextval('statistics_version')")
                     conn.execute("TRUNCATE TABLE missionstats")
                     conn.execute("TRUNCATE TABLE missions")
                     if 'greenieboard' in self.node.plugins:
@@ -209,6 +216,8 @@ class UserStatistics(Plugin):
                 conn.execute('UPDATE players SET discord_id = %s, manual = TRUE WHERE ucid = %s', (member.id, ucid))
                 # delete a token, if one existed
                 conn.execute('DELETE FROM players WHERE discord_id = %s AND LENGTH(ucid) = 4', (member.id, ))
+        # the old mapping is unknown, so invalidate all profiles
+        ProfileCache().invalidate()
         await interaction.followup.send(f'Member {utils.escape_string(member.display_name)} linked to ucid {ucid}',
                                         ephemeral=utils.get_ephemeral(interaction))
         await self.bot.audit(f'linked member {utils.escape_string(member.display_name)} to ucid {ucid}.',
@@ -245,6 +254,7 @@ class UserStatistics(Plugin):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute('UPDATE players SET discord_id = -1, manual = FALSE WHERE ucid = %s', (ucid, ))
+        ProfileCache().invalidate(ucid)
         await interaction.response.send_message(
             f'Member {utils.escape_string(member.display_name)} unlinked from ucid {ucid}.',
             ephemeral=utils.get_ephemeral(interaction))
@@ -370,6 +380,7 @@ class UserStatistics(Plugin):
                 with conn.transaction():
                     conn.execute('UPDATE players SET discord_id = %s, manual = TRUE WHERE ucid = %s',
                                  (unmatched[n]['match'].id, unmatched[n]['ucid']))
+                    ProfileCache().invalidate(unmatched[n]['ucid'])
                     await self.bot.audit(
                         f"linked ucid {unmatched[n]['ucid']} to user {unmatched[n]['match'].display_name}.",
                         user=interaction.user)
@@ -428,6 +439,7 @@ class UserStatistics(Plugin):
                     conn.execute('UPDATE players SET discord_id = %s, manual = %s WHERE ucid = %s',
                                  (suspicious[n]['match'].id if 'match' in suspicious[n] else -1,
                                   'match' in suspicious[n], suspicious[n]['ucid']))
+                    ProfileCache().invalidate(suspicious[n]['ucid'])
                     await self.bot.audit(
                         f"unlinked ucid {suspicious[n]['ucid']} from user {suspicious[n]['mismatch'].display_name}.",
                         user=interaction.user)
@@ -454,6 +466,7 @@ class UserStatistics(Plugin):
 
         await interaction.response.defer(ephemeral=True)
         member = DataObjectFactory().new('Member', node=self.node, member=interaction.user)
+        await member.load()
         if (utils.is_ucid(member.ucid) and member.verified and
                 not await utils.yn_question(interaction,
                                             "You already have a verified DCS account!\n"
@@ -499,6 +512,7 @@ class UserStatistics(Plugin):
                 f'You are not allowed to delete statistics of user {user.display_name}!')
             return
         member = DataObjectFactory().new('Member', node=self.node, member=user)
+        await member.load()
         if not member.verified:
             await interaction.response.send_message(
                 f"User {user.display_name} has non-verified links. Statistics can't be deleted.", ephemeral=True)
@@ -517,10 +531,13 @@ class UserStatistics(Plugin):
     async def expire_token(self):
         with self.pool.connection() as conn:
             with conn.transaction():
-                conn.execute("""
+                ucids = [x[0] for x in conn.execute("""
                     DELETE FROM players 
                     WHERE LENGTH(ucid) = 4 AND last_seen < (DATE(now() AT TIME ZONE 'utc') - interval '2 days')
-                """)
+                    RETURNING ucid
+                """).fetchall()]
+        if ucids:
+            ProfileCache().invalidate(*ucids)
 
     async def render_highscore(self, highscore: Union[dict, list], server: Optional[Server] = None,
                                mission_end: Optional[bool] = False):
@@ -547,7 +564,7 @@ class UserStatistics(Plugin):
         channel_id = highscore.get('channel')
         if not mission_end:
             report = PersistentReport(self.bot, self.plugin_name, file, embed_name=embed_name, server=server,
-                                      channel_id=channel_id or Channel.STATUS)
+                                      channel_id=channel_id or Channel.STATUS, version=self.get_data_version())
             await report.render(interaction=None, server_name=server.name if server else None, flt=flt, **kwargs)
         else:
             report = Report(self.bot, self.plugin_name, file)
@@ -563,6 +580,13 @@ class UserStatistics(Plugin):
                 if env.buffer:
                     env.buffer.close()
 
+    def get_data_version(self) -> tuple:
+        # the statistics_version sequence is increased by every change of the statistics rollups, player names and
+        # campaigns (see tables.sql), the date handles relative periods like "week"
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT last_value, is_called FROM statistics_version").fetchone()
+        return row[0] if row and row[1] else 0, datetime.now(timezone.utc).date().isoformat()
+
     @tasks.loop(hours=1)
     async def persistent_highscore(self):
         try:
@@ -1,2 +1,16 @@
 CREATE TABLE IF NOT EXISTS statistics (mission_id INTEGER NOT NULL, player_ucid TEXT NOT NULL, slot TEXT NOT NULL, side INTEGER DEFAULT 0, kills INTEGER DEFAULT 0, pvp INTEGER DEFAULT 0, deaths INTEGER DEFAULT 0, ejections INTEGER DEFAULT 0, crashes INTEGER DEFAULT 0, teamkills INTEGER DEFAULT 0, kills_planes INTEGER DEFAULT 0, kills_helicopters INTEGER DEFAULT 0, kills_ships INTEGER DEFAULT 0, kills_sams INTEGER DEFAULT 0, kills_ground INTEGER DEFAULT 0, deaths_pvp INTEGER DEFAULT 0, deaths_planes INTEGER DEFAULT 0, deaths_helicopters INTEGER DEFAULT 0, deaths_ships INTEGER DEFAULT 0, deaths_sams INTEGER DEFAULT 0, deaths_ground INTEGER DEFAULT 0, takeoffs INTEGER DEFAULT 0, landings INTEGER DEFAULT 0, hop_on TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'), hop_off TIMESTAMP, PRIMARY KEY (mission_id, player_ucid, slot, hop_on));
 CREATE INDEX IF NOT EXISTS idx_statistics_player_ucid ON statistics(player_ucid);
+CREATE TABLE IF NOT EXISTS statistics_daily (day DATE NOT NULL, player_ucid TEXT NOT NULL, server_name TEXT NOT NULL, mission_name TEXT NOT NULL, mission_theatre TEXT NOT NULL, slot TEXT NOT NULL, side INTEGER NOT NULL DEFAULT 0, sorties INTEGER NOT NULL DEFAULT 0, playtime BIGINT NOT NULL DEFAULT 0, kills INTEGER NOT NULL DEFAULT 0, pvp INTEGER NOT NULL DEFAULT 0, deaths INTEGER NOT NULL DEFAULT 0, ejections INTEGER NOT NULL DEFAULT 0, crashes INTEGER NOT NULL DEFAULT 0, teamkills INTEGER NOT NULL DEFAULT 0, kills_planes INTEGER NOT NULL DEFAULT 0, kills_helicopters INTEGER NOT NULL DEFAULT 0, kills_ships INTEGER NOT NULL DEFAULT 0, kills_sams INTEGER NOT NULL DEFAULT 0, kills_ground INTEGER NOT NULL DEFAULT 0, deaths_pvp INTEGER NOT NULL DEFAULT 0, deaths_planes INTEGER NOT NULL DEFAULT 0, deaths_helicopters INTEGER NOT NULL DEFAULT 0, deaths_ships INTEGER NOT NULL DEFAULT 0, deaths_sams INTEGER NOT NULL DEFAULT 0, deaths_ground INTEGER NOT NULL DEFAULT 0, takeoffs INTEGER NOT NULL DEFAULT 0, landings INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (day, player_ucid, server_name, mission_name, mission_theatre, slot, side));
+CREATE INDEX IF NOT EXISTS idx_statistics_daily_player_ucid ON statistics_daily(player_ucid);
+CREATE TABLE IF NOT EXISTS statistics_monthly (month DATE NOT NULL, player_ucid TEXT NOT NULL, server_name TEXT NOT NULL, mission_name TEXT NOT NULL, mission_theatre TEXT NOT NULL, slot TEXT NOT NULL, side INTEGER NOT NULL DEFAULT 0, sorties INTEGER NOT NULL DEFAULT 0, playtime BIGINT NOT NULL DEFAULT 0, kills INTEGER NOT NULL DEFAULT 0, pvp INTEGER NOT NULL DEFAULT 0, deaths INTEGER NOT NULL DEFAULT 0, ejections INTEGER NOT NULL DEFAULT 0, crashes INTEGER NOT NULL DEFAULT 0, teamkills INTEGER NOT NULL DEFAULT 0, kills_planes INTEGER NOT NULL DEFAULT 0, kills_helicopters INTEGER NOT NULL DEFAULT 0, kills_ships INTEGER NOT NULL DEFAULT 0, kills_sams INTEGER NOT NULL DEFAULT 0, kills_ground INTEGER NOT NULL DEFAULT 0, deaths_pvp INTEGER NOT NULL DEFAULT 0, deaths_planes INTEGER NOT NULL DEFAULT 0, deaths_helicopters INTEGER NOT NULL DEFAULT 0, deaths_ships INTEGER NOT NULL DEFAULT 0, deaths_sams INTEGER NOT NULL DEFAULT 0, deaths_ground INTEGER NOT NULL DEFAULT 0, takeoffs INTEGER NOT NULL DEFAULT 0, landings INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (month, player_ucid, server_name, mission_name, mission_theatre, slot, side));
+CREATE INDEX IF NOT EXISTS idx_statistics_monthly_player_ucid ON statistics_monthly(player_ucid);
+CREATE OR REPLACE FUNCTION statistics_rollup_add(s statistics, sign INTEGER) RETURNS void AS $$ BEGIN INSERT INTO statistics_daily (day, player_ucid, server_name, mission_name, mission_theatre, slot, side, sorties, playtime, kills, pvp, deaths, ejections, crashes, teamkills, kills_planes, kills_helicopters, kills_ships, kills_sams, kills_ground, deaths_pvp, deaths_planes, deaths_helicopters, deaths_ships, deaths_sams, deaths_ground, takeoffs, landings) SELECT DATE(s.hop_on), s.player_ucid, m.server_name, m.mission_name, m.mission_theatre, s.slot, COALESCE(s.side, 0), sign * 1, sign * ROUND(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))), sign * s.kills, sign * s.pvp, sign * s.deaths, sign * s.ejections, sign * s.crashes, sign * s.teamkills, sign * s.kills_planes, sign * s.kills_helicopters, sign * s.kills_ships, sign * s.kills_sams, sign * s.kills_ground, sign * s.deaths_pvp, sign * s.deaths_planes, sign * s.deaths_helicopters, sign * s.deaths_ships, sign * s.deaths_sams, sign * s.deaths_ground, sign * s.takeoffs, sign * s.landings FROM missions m WHERE m.id = s.mission_id ON CONFLICT (day, player_ucid, server_name, mission_name, mission_theatre, slot, side) DO UPDATE SET sorties = statistics_daily.sorties + excluded.sorties, playtime = statistics_daily.playtime + excluded.playtime, kills = statistics_daily.kills + excluded.kills, pvp = statistics_daily.pvp + excluded.pvp, deaths = statistics_daily.deaths + excluded.deaths, ejections = statistics_daily.ejections + excluded.ejections, crashes = statistics_daily.crashes + excluded.crashes, teamkills = statistics_daily.teamkills + excluded.teamkills, kills_planes = statistics_daily.kills_planes + excluded.kills_planes, kills_helicopters = statistics_daily.kills_helicopters + excluded.kills_helicopters, kills_ships = statistics_daily.kills_ships + excluded.kills_ships, kills_sams = statistics_daily.kills_sams + excluded.kills_sams, kills_ground = statistics_daily.kills_ground + excluded.kills_ground, deaths_pvp = statistics_daily.deaths_pvp + excluded.deaths_pvp, deaths_planes = statistics_daily.deaths_planes + excluded.deaths_planes, deaths_helicopters = statistics_daily.deaths_helicopters + excluded.deaths_helicopters, deaths_ships = statistics_daily.deaths_ships + excluded.deaths_ships, deaths_sams = statistics_daily.deaths_sams + excluded.deaths_sams, deaths_ground = statistics_daily.deaths_ground + excluded.deaths_ground, takeoffs = statistics_daily.takeoffs + excluded.takeoffs, landings = statistics_daily.landings + excluded.landings; INSERT INTO statistics_monthly (month, player_ucid, server_name, mission_name, mission_theatre, slot, side, sorties, playtime, kills, pvp, deaths, ejections, crashes, teamkills, kills_planes, kills_helicopters, kills_ships, kills_sams, kills_ground, deaths_pvp, deaths_planes, deaths_helicopters, deaths_ships, deaths_sams, deaths_ground, takeoffs, landings) SELECT DATE_TRUNC('month', s.hop_on)::DATE, s.player_ucid, m.server_name, m.mission_name, m.mission_theatre, s.slot, COALESCE(s.side, 0), sign * 1, sign * ROUND(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))), sign * s.kills, sign * s.pvp, sign * s.deaths, sign * s.ejections, sign * s.crashes, sign * s.teamkills, sign * s.kills_planes, sign * s.kills_helicopters, sign * s.kills_ships, sign * s.kills_sams, sign * s.kills_ground, sign * s.deaths_pvp, sign * s.deaths_planes, sign * s.deaths_helicopters, sign * s.deaths_ships, sign * s.deaths_sams, sign * s.deaths_ground, sign * s.takeoffs, sign * s.landings FROM missions m WHERE m.id = s.mission_id ON CONFLICT (month, player_ucid, server_name, mission_name, mission_theatre, slot, side) DO UPDATE SET sorties = statistics_monthly.sorties + excluded.sorties, playtime = statistics_monthly.playtime + excluded.playtime, kills = statistics_monthly.kills + excluded.kills, pvp = statistics_monthly.pvp + excluded.pvp, deaths = statistics_monthly.deaths + excluded.deaths, ejections = statistics_monthly.ejections + excluded.ejections, crashes = statistics_monthly.crashes + excluded.crashes, teamkills = statistics_monthly.teamkills + excluded.teamkills, kills_planes = statistics_monthly.kills_planes + excluded.kills_planes, kills_helicopters = statistics_monthly.kills_helicopters + excluded.kills_helicopters, kills_ships = statistics_monthly.kills_ships + excluded.kills_ships, kills_sams = statistics_monthly.kills_sams + excluded.kills_sams, kills_ground = statistics_monthly.kills_ground + excluded.kills_ground, deaths_pvp = statistics_monthly.deaths_pvp + excluded.deaths_pvp, deaths_planes = statistics_monthly.deaths_planes + excluded.deaths_planes, deaths_helicopters = statistics_monthly.deaths_helicopters + excluded.deaths_helicopters, deaths_ships = statistics_monthly.deaths_ships + excluded.deaths_ships, deaths_sams = statistics_monthly.deaths_sams + excluded.deaths_sams, deaths_ground = statistics_monthly.deaths_ground + excluded.deaths_ground, takeoffs = statistics_monthly.takeoffs + excluded.takeoffs, landings = statistics_monthly.landings + excluded.landings; IF sign < 0 THEN DELETE FROM statistics_daily WHERE day = DATE(s.hop_on) AND player_ucid = s.player_ucid AND sorties <= 0; DELETE FROM statistics_monthly WHERE month = DATE_TRUNC('month', s.hop_on)::DATE AND player_ucid = s.player_ucid AND sorties <= 0; END IF; END; $$ LANGUAGE 'plpgsql';
+CREATE SEQUENCE IF NOT EXISTS statistics_version;
+CREATE OR REPLACE FUNCTION statistics_rollup() RETURNS trigger AS $$ BEGIN IF TG_OP <> 'INSERT' THEN IF OLD.hop_off IS NOT NULL THEN PERFORM statistics_rollup_add(OLD, -1); END IF; END IF; IF TG_OP <> 'DELETE' THEN IF NEW.hop_off IS NOT NULL THEN PERFORM statistics_rollup_add(NEW, 1); END IF; END IF; PERFORM nextval('statistics_version'); RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_statistics_rollup_insert AFTER INSERT ON statistics FOR EACH ROW WHEN (NEW.hop_off IS NOT NULL) EXECUTE PROCEDURE statistics_rollup();
+CREATE TRIGGER tgr_statistics_rollup_update AFTER UPDATE ON statistics FOR EACH ROW WHEN (OLD.hop_off IS NOT NULL OR NEW.hop_off IS NOT NULL) EXECUTE PROCEDURE statistics_rollup();
+CREATE TRIGGER tgr_statistics_rollup_delete AFTER DELETE ON statistics FOR EACH ROW WHEN (OLD.hop_off IS NOT NULL) EXECUTE PROCEDURE statistics_rollup();
+CREATE OR REPLACE FUNCTION statistics_version_bump() RETURNS trigger AS $$ BEGIN PERFORM nextval('statistics_version'); RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_statistics_version_players AFTER UPDATE OF name ON players FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE PROCEDURE statistics_version_bump();
+CREATE TRIGGER tgr_statistics_version_campaigns AFTER INSERT OR UPDATE OR DELETE ON campaigns FOR EACH STATEMENT EXECUTE PROCEDURE statistics_version_bump();
+CREATE TRIGGER tgr_statistics_version_campaigns_servers AFTER INSERT OR UPDATE OR DELETE ON campaigns_servers FOR EACH STATEMENT EXECUTE PROCEDURE statistics_version_bump();
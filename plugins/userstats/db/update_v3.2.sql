@@ -0,0 +1,6 @@
+CREATE SEQUENCE IF NOT EXISTS statistics_version;
+CREATE OR REPLACE FUNCTION statistics_rollup() RETURNS trigger AS $$ BEGIN IF TG_OP <> 'INSERT' THEN IF OLD.hop_off IS NOT NULL THEN PERFORM statistics_rollup_add(OLD, -1); END IF; END IF; IF TG_OP <> 'DELETE' THEN IF NEW.hop_off IS NOT NULL THEN PERFORM statistics_rollup_add(NEW, 1); END IF; END IF; PERFORM nextval('statistics_version'); RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE OR REPLACE FUNCTION statistics_version_bump() RETURNS trigger AS $$ BEGIN PERFORM nextval('statistics_version'); RETURN NULL; END; $$ LANGUAGE 'plpgsql';
+CREATE TRIGGER tgr_statistics_version_players AFTER UPDATE OF name ON players FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE PROCEDURE statistics_version_bump();
+CREATE TRIGGER tgr_statistics_version_campaigns AFTER INSERT OR UPDATE OR DELETE ON campaigns FOR EACH STATEMENT EXECUTE PROCEDURE statistics_version_bump();
+CREATE TRIGGER tgr_statistics_version_campaigns_servers AFTER INSERT OR UPDATE OR DELETE ON campaigns_servers FOR EACH STATEMENT EXECUTE PROCEDURE statistics_version_bump();
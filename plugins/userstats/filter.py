@@ -21,6 +21,11 @@ class StatisticsFilter(ABC):
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         ...
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[tuple[str, str]]:
+        # returns the rollup table and filter, if the period can be read from the pre-aggregated statistics
+        return None
+
     @staticmethod
     def detect(bot: DCSServerBot, period: str) -> Any:
         if MissionFilter.supports(bot, period):
@@ -57,6 +62,19 @@ class PeriodFilter(StatisticsFilter):
         else:
             return f"DATE(s.hop_on) > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[tuple[str, str]]:
+        if period and period.startswith('period:'):
+            period = period[7:]
+        if period in [None, 'all']:
+            return 'statistics_monthly', '1 = 1'
+        elif period == 'yesterday':
+            return 'statistics_daily', "s.day = current_date - 1"
+        elif period == 'today':
+            return 'statistics_daily', "s.day = current_date"
+        else:
+            return 'statistics_daily', f"s.day > (DATE((now() AT TIME ZONE 'utc')) - interval '1 {period}')"
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         if period and period.startswith('period:'):
@@ -114,6 +132,20 @@ class MixedFilter(StatisticsFilter):
         else:
             return PeriodFilter.filter(bot, period, server_name)
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[tuple[str, str]]:
+        if not server_name and len(bot.servers) == 1:
+            server = list(bot.servers.values())[0]
+        elif server_name in bot.servers:
+            server = bot.servers[server_name]
+        else:
+            return PeriodFilter.rollup(bot, period)
+        _, name = utils.get_running_campaign(bot, server)
+        if name:
+            return None
+        else:
+            return PeriodFilter.rollup(bot, period, server_name)
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         if not server_name and len(bot.servers) == 1:
@@ -183,6 +215,13 @@ class MonthFilter(StatisticsFilter):
         month = MonthFilter.get_month(period[6:].strip())
         return f"DATE_PART('month', s.hop_on) = {month} AND DATE_PART('year', s.hop_on) = DATE_PART('year', CURRENT_DATE)"
 
+    @staticmethod
+    def rollup(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> Optional[tuple[str, str]]:
+        month = MonthFilter.get_month(period[6:].strip())
+        if month == -1:
+            return None
+        return 'statistics_monthly', f"s.month = MAKE_DATE(DATE_PART('year', CURRENT_DATE)::INTEGER, {month}, 1)"
+
     @staticmethod
     def format(bot: DCSServerBot, period: str, server_name: Optional[str] = None) -> str:
         month = MonthFilter.get_month(period[6:].strip())
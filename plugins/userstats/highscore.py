@@ -25,21 +25,30 @@ def get_sides(interaction: discord.Interaction, server: Server) -> list[Side]:
 
 
 class HighscorePlaytime(report.GraphElement):
+    remote_capable = True
 
     async def render(self, interaction: discord.Interaction, server_name: str, period: str, limit: int,
                      flt: StatisticsFilter, bar_labels: Optional[bool] = True):
-        sql = "SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - " \
-              "s.hop_on)))) AS playtime FROM statistics s, players p, missions m WHERE p.ucid = s.player_ucid AND " \
-              "s.hop_off IS NOT NULL AND s.mission_id = m.id "
+        rollup = flt.rollup(self.env.bot, period, server_name)
+        if rollup:
+            table, where = rollup
+            sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, SUM(s.playtime) AS playtime " \
+                  f"FROM {table} s, players p WHERE p.ucid = s.player_ucid "
+        else:
+            where = flt.filter(self.env.bot, period, server_name)
+            sql = "SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, " \
+                  "ROUND(SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on)))) AS playtime " \
+                  "FROM statistics s, players p, missions m WHERE p.ucid = s.player_ucid AND " \
+                  "s.hop_off IS NOT NULL AND s.mission_id = m.id "
         if server_name:
-            sql += "AND m.server_name = %s"
+            sql += "AND s.server_name = %s" if rollup else "AND m.server_name = %s"
             self.env.embed.description = utils.escape_string(server_name)
             if server_name in self.bot.servers:
                 sql += ' AND s.side in (' + ','.join([
                     str(x) for x in get_sides(interaction, self.bot.servers[server_name])
                 ]) + ')'
         self.env.embed.title = flt.format(self.env.bot, period, server_name) + ' ' + self.env.embed.title
-        sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
+        sql += ' AND ' + where
         sql += f' GROUP BY 1, 2 ORDER BY 3 DESC LIMIT {limit}'
 
         with self.pool.connection() as conn:
@@ -58,8 +67,7 @@ class HighscorePlaytime(report.GraphElement):
                 self.axes.barh(labels, values, color=['#CD7F32', 'silver', 'gold'], height=0.75)
                 self.axes.set_xlabel('hours')
                 if bar_labels:
-                    for c in self.axes.containers:
-                        self.axes.bar_label(c, fmt='%d', label_type='edge', padding=2)
+                    self.axes.bar_labels(fmt='%d', label_type='edge', padding=2)
                     self.axes.margins(x=0.1)
                 self.axes.set_title('Longest Playtimes', color='white', fontsize=25)
                 if len(values) == 0:
@@ -69,9 +77,12 @@ class HighscorePlaytime(report.GraphElement):
 
 
 class HighscoreElement(report.GraphElement):
+    remote_capable = True
 
     async def render(self, interaction: discord.Interaction, server_name: str, period: str, limit: int, kill_type: str,
                      flt: StatisticsFilter, bar_labels: Optional[bool] = True):
+        rollup = flt.rollup(self.env.bot, period, server_name)
+        playtime = 's.playtime' if rollup else 'EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))'
         sql_parts = {
             'Air Targets': 'SUM(s.kills_planes+s.kills_helicopters)',
             'Ships': 'SUM(s.kills_ships)',
@@ -82,8 +93,8 @@ class HighscoreElement(report.GraphElement):
                         'deaths_helicopters + deaths_ships + deaths_sams + deaths_ground)::DECIMAL) END',
             'PvP-KD-Ratio': 'CASE WHEN SUM(s.deaths_pvp) = 0 THEN SUM(s.pvp) ELSE SUM(s.pvp::DECIMAL)/SUM('
                             's.deaths_pvp::DECIMAL) END',
-            'Most Efficient Killers': 'SUM(s.kills) / (SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600.0)',
-            'Most Wasteful Pilots': 'SUM(s.crashes) / (SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) / 3600.0)'
+            'Most Efficient Killers': f'SUM(s.kills) / (SUM({playtime}) / 3600.0)',
+            'Most Wasteful Pilots': f'SUM(s.crashes) / (SUM({playtime}) / 3600.0)'
         }
         xlabels = {
             'Air Targets': 'kills',
@@ -96,18 +107,24 @@ class HighscoreElement(report.GraphElement):
             'Most Wasteful Pilots': 'airframes wasted / h'
         }
         colors = ['#CD7F32', 'silver', 'gold']
-        sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
-              f"players p, statistics s, missions m WHERE s.player_ucid = p.ucid AND s.mission_id = m.id "
+        if rollup:
+            table, where = rollup
+            sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
+                  f"players p, {table} s WHERE s.player_ucid = p.ucid "
+        else:
+            where = flt.filter(self.env.bot, period, server_name) + ' AND s.hop_off IS NOT NULL'
+            sql = f"SELECT p.discord_id, COALESCE(p.name, 'Unknown') AS name, {sql_parts[kill_type]} AS value FROM " \
+                  f"players p, statistics s, missions m WHERE s.player_ucid = p.ucid AND s.mission_id = m.id "
         if server_name:
-            sql += "AND m.server_name = %s"
+            sql += "AND s.server_name = %s" if rollup else "AND m.server_name = %s"
             if server_name in self.bot.servers:
                 sql += ' AND s.side in (' + ','.join([
                     str(x) for x in get_sides(interaction, self.bot.servers[server_name])
                 ]) + ')'
-        sql += ' AND ' + flt.filter(self.env.bot, period, server_name)
-        sql += f' AND s.hop_off IS NOT NULL GROUP BY 1, 2 HAVING {sql_parts[kill_type]} > 0'
+        sql += ' AND ' + where
+        sql += f' GROUP BY 1, 2 HAVING {sql_parts[kill_type]} > 0'
         if kill_type in ['Most Efficient Killers', 'Most Wasteful Pilots']:
-            sql += f' AND SUM(EXTRACT(EPOCH FROM (s.hop_off - s.hop_on))) > 1800'
+            sql += f' AND SUM({playtime}) > 1800'
         sql += f' ORDER BY 3 DESC LIMIT {limit}'
 
         with self.pool.connection() as conn:
@@ -125,9 +142,8 @@ class HighscoreElement(report.GraphElement):
                     values.insert(0, row['value'])
                 self.axes.barh(labels, values, color=colors, label=kill_type, height=0.75)
                 if values and bar_labels:
-                    for c in self.axes.containers:
-                        self.axes.bar_label(c, fmt='%.2f' if isinstance(values[0], float) else '%d', label_type='edge',
-                                            padding=2)
+                    self.axes.bar_labels(fmt='%.2f' if isinstance(values[0], float) else '%d', label_type='edge',
+                                         padding=2)
                     self.axes.margins(x=0.125)
                 self.axes.set_title(kill_type, color='white', fontsize=25)
                 self.axes.set_xlabel(xlabels[kill_type])
@@ -139,6 +139,7 @@ class Footer(report.EmbedElement):
         footer = ''
         if isinstance(member, discord.Member):
             _member: Member = DataObjectFactory().new('Member', node=self.node, member=member)
+            await _member.load()
             if _member.ucid:
                 footer += '🔀 Unlink their DCS-account\n'
                 if not _member.verified:
@@ -1,34 +1,41 @@
 import psycopg
 
-from contextlib import closing
+from contextlib import closing, asynccontextmanager
 from core import EventListener, Plugin, Status, Server, Side, Player, event, chat_command, DataObjectFactory
-from typing import Union
+from discord.ext import tasks
+from typing import Union, Optional, AsyncIterator
 
 
 class UserStatisticsEventListener(EventListener):
 
-    SQL_EVENT_UPDATES = {
-        'takeoff': 'UPDATE statistics SET takeoffs = takeoffs + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'landing': 'UPDATE statistics SET landings = landings + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'eject': 'UPDATE statistics SET ejections = ejections + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'crash': 'UPDATE statistics SET crashes = crashes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pilot_death': 'UPDATE statistics SET deaths = deaths + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pvp_planes': 'UPDATE statistics SET kills = kills + 1, pvp = pvp + 1, kills_planes = kills_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'pvp_helicopters': 'UPDATE statistics SET kills = kills + 1, pvp = pvp + 1, kills_helicopters = kills_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'teamkill': 'UPDATE statistics SET teamkills = teamkills + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_planes': 'UPDATE statistics SET kills = kills + 1, kills_planes = kills_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_helicopters': 'UPDATE statistics SET kills = kills + 1, kills_helicopters = kills_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_ships': 'UPDATE statistics SET kills = kills + 1, kills_ships = kills_ships + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_sams': 'UPDATE statistics SET kills = kills + 1, kills_sams = kills_sams + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'kill_ground': 'UPDATE statistics SET kills = kills + 1, kills_ground = kills_ground + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_pvp_planes': 'UPDATE statistics SET deaths_pvp = deaths_pvp + 1, deaths_planes = deaths_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_pvp_helicopters': 'UPDATE statistics SET deaths_pvp = deaths_pvp + 1, deaths_helicopters = deaths_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_planes': 'UPDATE statistics SET deaths_planes = deaths_planes + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_helicopters': 'UPDATE statistics SET deaths_helicopters = deaths_helicopters + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_ships': 'UPDATE statistics SET deaths_ships = deaths_ships + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_sams': 'UPDATE statistics SET deaths_sams = deaths_sams + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL',
-        'deaths_ground': 'UPDATE statistics SET deaths_ground = deaths_ground + 1 WHERE mission_id = %s AND player_ucid = %s AND hop_off IS NULL'
+    # statistics columns that are incremented by the respective event
+    EVENT_COUNTERS = {
+        'takeoff': ['takeoffs'],
+        'landing': ['landings'],
+        'eject': ['ejections'],
+        'crash': ['crashes'],
+        'pilot_death': ['deaths'],
+        'pvp_planes': ['kills', 'pvp', 'kills_planes'],
+        'pvp_helicopters': ['kills', 'pvp', 'kills_helicopters'],
+        'teamkill': ['teamkills'],
+        'kill_planes': ['kills', 'kills_planes'],
+        'kill_helicopters': ['kills', 'kills_helicopters'],
+        'kill_ships': ['kills', 'kills_ships'],
+        'kill_sams': ['kills', 'kills_sams'],
+        'kill_ground': ['kills', 'kills_ground'],
+        'deaths_pvp_planes': ['deaths_pvp', 'deaths_planes'],
+        'deaths_pvp_helicopters': ['deaths_pvp', 'deaths_helicopters'],
+        'deaths_planes': ['deaths_planes'],
+        'deaths_helicopters': ['deaths_helicopters'],
+        'deaths_ships': ['deaths_ships'],
+        'deaths_sams': ['deaths_sams'],
+        'deaths_ground': ['deaths_ground']
     }
+    COUNTER_COLUMNS = [
+        'takeoffs', 'landings', 'ejections', 'crashes', 'deaths', 'kills', 'pvp', 'teamkills', 'kills_planes',
+        'kills_helicopters', 'kills_ships', 'kills_sams', 'kills_ground', 'deaths_pvp', 'deaths_planes',
+        'deaths_helicopters', 'deaths_ships', 'deaths_sams', 'deaths_ground'
+    ]
 
     SQL_MISSION_HANDLING = {
         'start_mission': 'INSERT INTO missions (server_name, mission_name, mission_theatre) VALUES (%s, %s, %s)',
@@ -44,6 +51,16 @@ class UserStatisticsEventListener(EventListener):
     def __init__(self, plugin: Plugin):
         super().__init__(plugin)
         self.statistics = set()
+        # pending counter deltas per (mission_id, ucid)
+        self.counters: dict[tuple[int, str], dict[str, int]] = dict()
+        self.flush_counters.change_interval(seconds=self.get_config().get('flush_interval', 10))
+        self.flush_counters.start()
+
+    async def shutdown(self) -> None:
+        self.flush_counters.cancel()
+        async with self.apool.connection() as conn:
+            async with self.transaction(conn):
+                pass
 
     async def processEvent(self, name: str, server: Server, data: dict) -> None:
         try:
@@ -52,6 +69,45 @@ class UserStatisticsEventListener(EventListener):
         except Exception as ex:
             self.log.exception(ex)
 
+    def count(self, server: Server, ucid: str, event_type: str) -> None:
+        counters = self.counters.setdefault((server.mission_id, ucid), dict())
+        for column in self.EVENT_COUNTERS[event_type]:
+            counters[column] = counters.get(column, 0) + 1
+
+    @asynccontextmanager
+    async def transaction(self, conn: psycopg.AsyncConnection, *, mission_id: Optional[int] = None,
+                          ucid: Optional[str] = None) -> AsyncIterator[None]:
+        # opens a transaction that writes the pending counter deltas first, they are only dropped on commit
+        keys = [
+            key for key in self.counters.keys()
+            if (mission_id is None or key[0] == mission_id) and (ucid is None or key[1] == ucid)
+        ]
+        pending = {key: self.counters.pop(key) for key in keys}
+        try:
+            async with conn.transaction():
+                if pending:
+                    await self.flush(conn, pending)
+                yield
+        except BaseException:
+            # merge the deltas back to not lose them
+            for key, counters in pending.items():
+                current = self.counters.setdefault(key, dict())
+                for column, value in counters.items():
+                    current[column] = current.get(column, 0) + value
+            raise
+
+    async def flush(self, conn: psycopg.AsyncConnection, pending: dict[tuple[int, str], dict[str, int]]) -> None:
+        values = []
+        params = []
+        for (_mission_id, _ucid), counters in pending.items():
+            values.append('(' + ', '.join(['%s'] * (len(self.COUNTER_COLUMNS) + 2)) + ')')
+            params.extend([_mission_id, _ucid] + [counters.get(column, 0) for column in self.COUNTER_COLUMNS])
+        await conn.execute(f"""
+            UPDATE statistics s SET {', '.join([f'{x} = s.{x} + v.{x}' for x in self.COUNTER_COLUMNS])} 
+            FROM (VALUES {', '.join(values)}) AS v(mission_id, player_ucid, {', '.join(self.COUNTER_COLUMNS)}) 
+            WHERE s.mission_id = v.mission_id AND s.player_ucid = v.player_ucid AND s.hop_off IS NULL
+        """, params)
+
     @staticmethod
     def get_unit_type(player: Union[Player, dict]) -> str:
         unit_type: str = player.unit_type if isinstance(player, Player) else player['unit_type']
@@ -61,8 +117,8 @@ class UserStatisticsEventListener(EventListener):
         return unit_type
 
     @staticmethod
-    def close_all_statistics(cursor: psycopg.Cursor, server: Server):
-        cursor.execute("""
+    async def close_all_statistics(conn: psycopg.AsyncConnection, server: Server):
+        await conn.execute("""
             UPDATE missions m1 SET mission_end = (
                 SELECT mission_start - INTERVAL '1 second' FROM missions m2 
                 WHERE m1.server_name = m2.server_name
@@ -70,22 +126,22 @@ class UserStatisticsEventListener(EventListener):
                 ORDER BY 1 LIMIT 1)
             WHERE m1.server_name = %s AND m1.mission_end IS NULL
         """, (server.name,))
-        cursor.execute("""
+        await conn.execute("""
             UPDATE missions SET mission_end = (now() AT TIME ZONE 'utc') WHERE server_name = %s AND mission_end IS NULL
         """, (server.name,))
-
-        for row in cursor.execute("""
+        cursor = await conn.execute("""
             SELECT mission_id, player_ucid, slot 
             FROM statistics 
             WHERE mission_id IN (
                 SELECT id FROM missions WHERE server_name = %s
             ) AND hop_off IS NULL
-        """, (server.name,)).fetchall():
-            cursor.execute("""
+        """, (server.name,))
+        for row in await cursor.fetchall():
+            await conn.execute("""
                 UPDATE statistics SET hop_off = (SELECT mission_end FROM missions WHERE id = %s)
                 WHERE mission_id = %s AND player_ucid = %s AND slot = %s AND hop_off IS NULL
             """, (row[0], row[0], row[1], row[2]))
-        cursor.execute("""
+        await conn.execute("""
             UPDATE statistics SET hop_off = (now() AT TIME ZONE 'utc') WHERE mission_id IN (
                 SELECT id FROM missions WHERE server_name = %s
             ) AND hop_off IS NULL
@@ -100,93 +156,92 @@ class UserStatisticsEventListener(EventListener):
         if server.status == Status.STOPPED or not data['channel'].startswith('sync-') or 'current_mission' not in data:
             return
 
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                with closing(conn.cursor()) as cursor:
-                    mission_id = -1
-                    cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                    if cursor.rowcount == 1:
-                        row = cursor.fetchone()
-                        if row[1] == data['current_mission']:
-                            mission_id = row[0]
-                        else:
-                            self.log.warning('The mission in the database does not match the mission that is live '
-                                             'on this server. Fixing...')
-                    if mission_id == -1:
-                        # close ambiguous missions
-                        if cursor.rowcount >= 1:
-                            self.close_all_statistics(cursor, server)
-                        # create a new mission
-                        cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
+        async with self.apool.connection() as conn:
+            async with self.transaction(conn, mission_id=server.mission_id):
+                mission_id = -1
+                cursor = await conn.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                if cursor.rowcount == 1:
+                    row = await cursor.fetchone()
+                    if row[1] == data['current_mission']:
+                        mission_id = row[0]
+                    else:
+                        self.log.warning('The mission in the database does not match the mission that is live '
+                                         'on this server. Fixing...')
+                if mission_id == -1:
+                    # close ambiguous missions
+                    if cursor.rowcount >= 1:
+                        await self.close_all_statistics(conn, server)
+                    # create a new mission
+                    await conn.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
                                                                                     data['current_mission'],
                                                                                     data['current_map']))
-                        cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                    cursor = await conn.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                    if cursor.rowcount == 1:
+                        mission_id = (await cursor.fetchone())[0]
+                    else:
+                        self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
+                                       'gathered for this session.')
+                server.mission_id = mission_id
+                if mission_id != -1:
+                    # initialize active players
+                    players = server.get_active_players()
+                    ucids = []
+                    for player in players:
+                        ucids.append(player.ucid)
+                        # make sure we get slot changes that might have occurred in the meantime
+                        cursor = await conn.execute(self.SQL_MISSION_HANDLING['check_player'],
+                                                    (mission_id, player.ucid))
+                        player_started = False
                         if cursor.rowcount == 1:
-                            mission_id = cursor.fetchone()[0]
-                        else:
-                            self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
-                                           'gathered for this session.')
-                    server.mission_id = mission_id
-                    if mission_id != -1:
-                        # initialize active players
-                        players = server.get_active_players()
-                        ucids = []
-                        for player in players:
-                            ucids.append(player.ucid)
-                            # make sure we get slot changes that might have occurred in the meantime
-                            cursor.execute(self.SQL_MISSION_HANDLING['check_player'], (mission_id, player.ucid))
-                            player_started = False
-                            if cursor.rowcount == 1:
-                                # the player is there already ...
-                                if cursor.fetchone()[0] != player.unit_type:
-                                    # ... but with a different aircraft, so close the old session
-                                    cursor.execute(self.SQL_MISSION_HANDLING['stop_player'],
+                            # the player is there already ...
+                            if (await cursor.fetchone())[0] != player.unit_type:
+                                # ... but with a different aircraft, so close the old session
+                                await conn.execute(self.SQL_MISSION_HANDLING['stop_player'],
                                                    (mission_id, player.ucid))
-                                else:
-                                    # session will be kept
-                                    player_started = True
-                            if not player_started and player.side != Side.SPECTATOR:
-                                # only warn for unknown users if it is a non-public server and automatch is on
-                                if not player.member and self.bot.locals.get('automatch', True) and \
-                                        len(server.settings['password']) > 0:
-                                    await self.bot.get_admin_channel(server).send(
-                                        f"Player {player.name} (ucid={player.ucid}) can't be matched to a "
-                                        f"discord user.")
-                                cursor.execute(self.SQL_MISSION_HANDLING['start_player'],
+                            else:
+                                # session will be kept
+                                player_started = True
+                        if not player_started and player.side != Side.SPECTATOR:
+                            # only warn for unknown users if it is a non-public server and automatch is on
+                            if not player.member and self.bot.locals.get('automatch', True) and \
+                                    len(server.settings['password']) > 0:
+                                await self.bot.get_admin_channel(server).send(
+                                    f"Player {player.name} (ucid={player.ucid}) can't be matched to a "
+                                    f"discord user.")
+                            await conn.execute(self.SQL_MISSION_HANDLING['start_player'],
                                                (mission_id, player.ucid, self.get_unit_type(player),
                                                 player.side.value))
-                        # close dead entries in the database (if existent)
-                        cursor.execute(self.SQL_MISSION_HANDLING['all_players'], (mission_id, ))
-                        for row in cursor.fetchall():
-                            if row[0] not in ucids:
-                                cursor.execute(self.SQL_MISSION_HANDLING['stop_player'], (mission_id, row[0]))
+                    # close dead entries in the database (if existent)
+                    cursor = await conn.execute(self.SQL_MISSION_HANDLING['all_players'], (mission_id, ))
+                    for row in await cursor.fetchall():
+                        if row[0] not in ucids:
+                            await conn.execute(self.SQL_MISSION_HANDLING['stop_player'], (mission_id, row[0]))
 
     @event(name="onMissionLoadEnd")
     async def onMissionLoadEnd(self, server: Server, data: dict) -> None:
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                with closing(conn.cursor()) as cursor:
-                    self.close_all_statistics(cursor, server)
-                    cursor.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
+        async with self.apool.connection() as conn:
+            async with self.transaction(conn, mission_id=server.mission_id):
+                await self.close_all_statistics(conn, server)
+                await conn.execute(self.SQL_MISSION_HANDLING['start_mission'], (server.name,
                                                                                 data['current_mission'],
                                                                                 data['current_map']))
-                    cursor.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
-                    if cursor.rowcount == 1:
-                        server.mission_id = cursor.fetchone()[0]
-                    else:
-                        server.mission_id = -1
-                        self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
-                                       'gathered for this session.')
+                cursor = await conn.execute(self.SQL_MISSION_HANDLING['current_mission_id'], (server.name,))
+                if cursor.rowcount == 1:
+                    server.mission_id = (await cursor.fetchone())[0]
+                else:
+                    server.mission_id = -1
+                    self.log.error('FATAL: Initialization of mission table failed. Statistics will not be '
+                                   'gathered for this session.')
 
-    def close_mission_stats(self, server: Server):
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                conn.execute(self.SQL_MISSION_HANDLING['close_statistics'], (server.mission_id,))
-                conn.execute(self.SQL_MISSION_HANDLING['close_mission'], (server.mission_id,))
+    async def close_mission_stats(self, server: Server):
+        async with self.apool.connection() as conn:
+            async with self.transaction(conn, mission_id=server.mission_id):
+                await conn.execute(self.SQL_MISSION_HANDLING['close_statistics'], (server.mission_id,))
+                await conn.execute(self.SQL_MISSION_HANDLING['close_mission'], (server.mission_id,))
 
     @event(name="onSimulationStop")
     async def onSimulationStop(self, server: Server, data: dict) -> None:
-        self.close_mission_stats(server)
+        await self.close_mission_stats(server)
 
     @event(name="onPlayerStart")
     async def onPlayerStart(self, server: Server, data: dict) -> None:
@@ -211,17 +266,17 @@ class UserStatisticsEventListener(EventListener):
     async def onPlayerChangeSlot(self, server: Server, data: dict) -> None:
         if 'side' not in data:
             return
-        with self.pool.connection() as conn:
-            with conn.transaction():
-                conn.execute(self.SQL_MISSION_HANDLING['stop_player'], (server.mission_id, data['ucid']))
+        async with self.apool.connection() as conn:
+            async with self.transaction(conn, mission_id=server.mission_id, ucid=data['ucid']):
+                await conn.execute(self.SQL_MISSION_HANDLING['stop_player'], (server.mission_id, data['ucid']))
                 if Side(data['side']) != Side.SPECTATOR:
-                    conn.execute(self.SQL_MISSION_HANDLING['start_player'],
-                                 (server.mission_id, data['ucid'], self.get_unit_type(data), data['side']))
+                    await conn.execute(self.SQL_MISSION_HANDLING['start_player'],
+                                       (server.mission_id, data['ucid'], self.get_unit_type(data), data['side']))
 
     @event(name="disableUserStats")
     async def disableUserStats(self, server: Server, data: dict) -> None:
         self.statistics.discard(server.name)
-        self.close_mission_stats(server)
+        await self.close_mission_stats(server)
 
     @event(name="onGameEvent")
     async def onGameEvent(self, server: Server, data: dict) -> None:
@@ -234,95 +289,91 @@ class UserStatisticsEventListener(EventListener):
                 if not player:
                     self.log.warning(f"Player id={data['arg1']} not found. Can't close their statistics.")
                     return
-                with self.pool.connection() as conn:
-                    with conn.transaction():
-                        conn.execute(self.SQL_MISSION_HANDLING['stop_player'], (server.mission_id, player.ucid))
+                async with self.apool.connection() as conn:
+                    async with self.transaction(conn, mission_id=server.mission_id, ucid=player.ucid):
+                        await conn.execute(self.SQL_MISSION_HANDLING['stop_player'],
+                                           (server.mission_id, player.ucid))
         elif data['eventName'] == 'kill':
-            with self.pool.connection() as conn:
-                with conn.transaction():
-                    # Player is not an AI
-                    if data['arg1'] != -1:
-                        if data['arg4'] != -1:
-                            # selfkill
-                            if data['arg1'] == data['arg4']:
-                                kill_type = 'self_kill'
-                            # teamkills
-                            elif data['arg3'] == data['arg6']:
-                                kill_type = 'teamkill'
-                            # PVP
-                            elif data['victimCategory'] == 'Planes':
-                                kill_type = 'pvp_planes'
-                            elif data['victimCategory'] == 'Helicopters':
-                                kill_type = 'pvp_helicopters'
-                        elif data['victimCategory'] == 'Planes':
-                            kill_type = 'kill_planes'
-                        elif data['victimCategory'] == 'Helicopters':
-                            kill_type = 'kill_helicopters'
-                        elif data['victimCategory'] == 'Ships':
-                            kill_type = 'kill_ships'
-                        elif data['victimCategory'] == 'Air Defence':
-                            kill_type = 'kill_sams'
-                        elif data['victimCategory'] in ['Unarmed', 'Armor', 'Infantry', 'Fortification', 'Artillery',
-                                                        'MissilesSS']:
-                            kill_type = 'kill_ground'
-                        else:
-                            kill_type = 'kill_other'  # Static objects
-                        if kill_type in self.SQL_EVENT_UPDATES.keys():
-                            pilot: Player = server.get_player(id=data['arg1'])
-                            for crew_member in server.get_crew_members(pilot):
-                                conn.execute(self.SQL_EVENT_UPDATES[kill_type], (server.mission_id, crew_member.ucid))
+            # Player is not an AI
+            if data['arg1'] != -1:
+                if data['arg4'] != -1:
+                    # selfkill
+                    if data['arg1'] == data['arg4']:
+                        kill_type = 'self_kill'
+                    # teamkills
+                    elif data['arg3'] == data['arg6']:
+                        kill_type = 'teamkill'
+                    # PVP
+                    elif data['victimCategory'] == 'Planes':
+                        kill_type = 'pvp_planes'
+                    elif data['victimCategory'] == 'Helicopters':
+                        kill_type = 'pvp_helicopters'
+                elif data['victimCategory'] == 'Planes':
+                    kill_type = 'kill_planes'
+                elif data['victimCategory'] == 'Helicopters':
+                    kill_type = 'kill_helicopters'
+                elif data['victimCategory'] == 'Ships':
+                    kill_type = 'kill_ships'
+                elif data['victimCategory'] == 'Air Defence':
+                    kill_type = 'kill_sams'
+                elif data['victimCategory'] in ['Unarmed', 'Armor', 'Infantry', 'Fortification', 'Artillery',
+                                                'MissilesSS']:
+                    kill_type = 'kill_ground'
+                else:
+                    kill_type = 'kill_other'  # Static objects
+                if kill_type in self.EVENT_COUNTERS.keys():
+                    pilot: Player = server.get_player(id=data['arg1'])
+                    for crew_member in server.get_crew_members(pilot):
+                        self.count(server, crew_member.ucid, kill_type)
 
-                    # Victim is not an AI
-                    if data['arg4'] != -1:
-                        if data['arg1'] != -1:
-                            if data['arg1'] == data['arg4']:  # self kill
-                                death_type = 'self_kill'
-                            elif data['arg3'] == data['arg6']:  # killed by team member - no death counted
-                                death_type = 'teamdeath'
-                            # PVP
-                            elif data['killerCategory'] == 'Planes':
-                                death_type = 'deaths_pvp_planes'
-                            elif data['killerCategory'] == 'Helicopters':
-                                death_type = 'deaths_pvp_helicopters'
-                        elif data['killerCategory'] == 'Planes':
-                            death_type = 'deaths_planes'
-                        elif data['killerCategory'] == 'Helicopters':
-                            death_type = 'deaths_helicopters'
-                        elif data['killerCategory'] == 'Ships':
-                            death_type = 'deaths_ships'
-                        elif data['killerCategory'] == 'Air Defence':
-                            death_type = 'deaths_sams'
-                        elif data['killerCategory'] in ['Armor', 'Infantry' 'Fortification', 'Artillery',
-                                                        'MissilesSS']:
-                            death_type = 'deaths_ground'
-                        else:
-                            death_type = 'other'
-                        if death_type in self.SQL_EVENT_UPDATES.keys():
-                            pilot: Player = server.get_player(id=data['arg4'])
-                            for crew_member in server.get_crew_members(pilot):
-                                conn.execute(self.SQL_EVENT_UPDATES[death_type], (server.mission_id, crew_member.ucid))
+            # Victim is not an AI
+            if data['arg4'] != -1:
+                if data['arg1'] != -1:
+                    if data['arg1'] == data['arg4']:  # self kill
+                        death_type = 'self_kill'
+                    elif data['arg3'] == data['arg6']:  # killed by team member - no death counted
+                        death_type = 'teamdeath'
+                    # PVP
+                    elif data['killerCategory'] == 'Planes':
+                        death_type = 'deaths_pvp_planes'
+                    elif data['killerCategory'] == 'Helicopters':
+                        death_type = 'deaths_pvp_helicopters'
+                elif data['killerCategory'] == 'Planes':
+                    death_type = 'deaths_planes'
+                elif data['killerCategory'] == 'Helicopters':
+                    death_type = 'deaths_helicopters'
+                elif data['killerCategory'] == 'Ships':
+                    death_type = 'deaths_ships'
+                elif data['killerCategory'] == 'Air Defence':
+                    death_type = 'deaths_sams'
+                elif data['killerCategory'] in ['Armor', 'Infantry' 'Fortification', 'Artillery',
+                                                'MissilesSS']:
+                    death_type = 'deaths_ground'
+                else:
+                    death_type = 'other'
+                if death_type in self.EVENT_COUNTERS.keys():
+                    pilot: Player = server.get_player(id=data['arg4'])
+                    for crew_member in server.get_crew_members(pilot):
+                        self.count(server, crew_member.ucid, death_type)
         elif data['eventName'] in ['takeoff', 'landing', 'crash', 'pilot_death']:
             if data['arg1'] != -1:
-                if data['eventName'] in self.SQL_EVENT_UPDATES.keys():
-                    with self.pool.connection() as conn:
-                        with conn.transaction():
-                            player: Player = server.get_player(id=data['arg1'])
-                            if not player:
-                                return
-                            conn.execute(self.SQL_EVENT_UPDATES[data['eventName']],
-                                         (server.mission_id, player.ucid))
+                if data['eventName'] in self.EVENT_COUNTERS.keys():
+                    player: Player = server.get_player(id=data['arg1'])
+                    if not player:
+                        return
+                    self.count(server, player.ucid, data['eventName'])
         elif data['eventName'] == 'eject':
             if data['arg1'] != -1:
-                if data['eventName'] in self.SQL_EVENT_UPDATES.keys():
+                if data['eventName'] in self.EVENT_COUNTERS.keys():
                     # TODO: when DCS bug wih multicrew eject gets fixed, change this to single player only
                     pilot: Player = server.get_player(id=data['arg1'])
                     crew_members = server.get_crew_members(pilot)
                     if len(crew_members) == 1:
-                        with self.pool.connection() as conn:
-                            with conn.transaction():
-                                conn.execute(self.SQL_EVENT_UPDATES[data['eventName']],
-                                             (server.mission_id, crew_members[0].ucid))
+                        self.count(server, crew_members[0].ucid, data['eventName'])
         elif data['eventName'] == 'mission_end':
+            async with self.apool.connection() as conn:
+                async with self.transaction(conn, mission_id=server.mission_id):
+                    pass
             config = self.get_config(server)
             if 'highscore' in config:
                 await self.plugin.render_highscore(config['highscore'], server, True)
@@ -346,6 +397,7 @@ class UserStatisticsEventListener(EventListener):
                         discord_id = row[0]
                         member = DataObjectFactory().new('Member', node=self.node,
                                                          member=self.bot.guilds[0].get_member(discord_id))
+                        await member.load()
 
                         old_ucid = member.ucid if member.verified else None
                         if old_ucid:
@@ -367,3 +419,12 @@ class UserStatisticsEventListener(EventListener):
                             player.sendChatMessage('Your user has been linked.')
                         else:
                             player.sendChatMessage('Your user was linked already!')
+
+    @tasks.loop(seconds=10)
+    async def flush_counters(self):
+        try:
+            async with self.apool.connection() as conn:
+                async with self.transaction(conn):
+                    pass
+        except Exception as ex:
+            self.log.exception(ex)
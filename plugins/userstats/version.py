@@ -1 +1 @@
-__version__ = "3.1"
+__version__ = "3.3"
@@ -1,5 +1,5 @@
 import discord
-from core import DataObjectFactory, Member, Player, Server, Report
+from core import DataObjectFactory, Member, Player, Server, Report, ProfileCache
 from discord.ui import View, Button
 from services import DCSServerBot
 from typing import Union, Optional
@@ -17,12 +17,13 @@ class InfoView(View):
         self.server = server
         if isinstance(self.member, discord.Member):
             self._member: Member = DataObjectFactory().new('Member', node=self.bot.node, member=self.member)
-            self.ucid = self._member.ucid
         else:
             self.ucid = self.member
 
     async def render(self) -> discord.Embed:
         if isinstance(self.member, discord.Member):
+            await self._member.load()
+            self.ucid = self._member.ucid
             if self._member.verified:
                 button = Button(emoji="🔀")
                 button.callback = self.on_unlink
@@ -109,6 +110,7 @@ class InfoView(View):
         with self.bot.pool.connection() as conn:
             with conn.transaction():
                 conn.execute("UPDATE players SET watchlist = TRUE WHERE ucid = %s", (self.ucid, ))
+        ProfileCache().invalidate(self.ucid)
         await interaction.followup.send("User is now on the watchlist.", ephemeral=self.ephemeral)
         self.stop()
 
@@ -117,5 +119,6 @@ class InfoView(View):
         with self.bot.pool.connection() as conn:
             with conn.transaction():
                 conn.execute("UPDATE players SET watchlist = FALSE WHERE ucid = %s", (self.ucid, ))
+        ProfileCache().invalidate(self.ucid)
         await interaction.followup.send("User removed from the watchlist.", ephemeral=self.ephemeral)
         self.stop()
@@ -4,6 +4,7 @@ import argparse
 import asyncio
 import os
 import platform
+import sys
 import traceback
 
 from core import NodeImpl, ServiceRegistry, ServiceInstallationError, YAMLError, FatalException
@@ -29,64 +30,72 @@ class Main:
         else:
             autoupdate = self.node.locals.get('autoupdate', self.node.config.get('autoupdate', False))
 
-        if autoupdate:
-            cloud_drive = self.node.locals.get('cloud_drive', True)
-            if (cloud_drive and self.node.master) or not cloud_drive:
-                await self.node.upgrade()
-        elif await self.node.upgrade_pending():
-            self.log.warning("There is a new update for DCSServerBot available!")
+        with self.node.startup.measure('Update check'):
+            if autoupdate:
+                cloud_drive = self.node.locals.get('cloud_drive', True)
+                if (cloud_drive and self.node.master) or not cloud_drive:
+                    await self.node.upgrade()
+            elif await self.node.upgrade_pending():
+                self.log.warning("There is a new update for DCSServerBot available!")
 
-        await self.node.register()
-        async with ServiceRegistry(node=self.node) as registry:
-            if registry.services():
-                self.log.info("- Loading Services ...")
-            for name in registry.services().keys():
-                if not registry.can_run(name):
-                    continue
-                if name == 'Dashboard':
-                    if self.node.config.get('use_dashboard', True):
-                        self.log.info("  => Dashboard started.")
-                        dashboard = registry.new(name)
-                        asyncio.create_task(dashboard.start())
-                    continue
-                else:
-                    try:
-                        asyncio.create_task(registry.new(name).start())
-                        self.log.debug(f"  => {name} loaded.")
-                    except ServiceInstallationError as ex:
-                        self.log.error(f"  - {ex.__str__()}")
-                        self.log.info(f"  => {name} NOT loaded.")
-            if not self.node.master:
-                self.log.info("DCSServerBot AGENT started.")
-            try:
-                while True:
-                    # wait until the master changes
-                    while self.node.master == await self.node.check_master():
-                        await asyncio.sleep(1)
-                    # switch master
-                    self.node.master = not self.node.master
-                    if self.node.master:
-                        self.log.info("Taking over the Master node ...")
+        with self.node.startup.measure('Node registration'):
+            await self.node.register()
+        try:
+            async with ServiceRegistry(node=self.node) as registry:
+                if registry.services():
+                    self.log.info("- Loading Services ...")
+                for name in registry.services().keys():
+                    if not registry.can_run(name):
+                        continue
+                    if name == 'Dashboard':
                         if self.node.config.get('use_dashboard', True):
-                            await dashboard.stop()
-                        for name in registry.services().keys():
-                            if registry.master_only(name):
-                                try:
-                                    asyncio.create_task(registry.new(name).start())
-                                except ServiceInstallationError as ex:
-                                    self.log.error(f"  - {ex.__str__()}")
-                                    self.log.info(f"  => {name} NOT loaded.")
+                            self.log.info("  => Dashboard started.")
+                            dashboard = registry.new(name)
+                            asyncio.create_task(dashboard.start())
+                        continue
                     else:
-                        self.log.info("Second Master found, stepping back to Agent configuration.")
+                        try:
+                            asyncio.create_task(registry.new(name).start())
+                            self.log.debug(f"  => {name} loaded.")
+                        except ServiceInstallationError as ex:
+                            self.log.error(f"  - {ex.__str__()}")
+                            self.log.info(f"  => {name} NOT loaded.")
+                if not self.node.master:
+                    self.log.info("DCSServerBot AGENT started.")
+                    # on the master, the timings are reported when the bot is ready
+                    self.node.startup.report(self.log)
+                try:
+                    while True:
+                        # wait until the master changes
+                        while self.node.master == await self.node.check_master():
+                            await asyncio.sleep(1)
+                        # switch master
+                        self.node.master = not self.node.master
+                        if self.node.master:
+                            self.log.info("Taking over the Master node ...")
+                            if self.node.config.get('use_dashboard', True):
+                                await dashboard.stop()
+                            for name in registry.services().keys():
+                                if registry.master_only(name):
+                                    try:
+                                        asyncio.create_task(registry.new(name).start())
+                                    except ServiceInstallationError as ex:
+                                        self.log.error(f"  - {ex.__str__()}")
+                                        self.log.info(f"  => {name} NOT loaded.")
+                        else:
+                            self.log.info("Second Master found, stepping back to Agent configuration.")
+                            if self.node.config.get('use_dashboard', True):
+                                await dashboard.stop()
+                            for name in registry.services().keys():
+                                if registry.master_only(name):
+                                    await registry.get(name).stop()
                         if self.node.config.get('use_dashboard', True):
-                            await dashboard.stop()
-                        for name in registry.services().keys():
-                            if registry.master_only(name):
-                                await registry.get(name).stop()
-                    if self.node.config.get('use_dashboard', True):
-                        await dashboard.start()
-            finally:
-                await self.node.unregister()
+                            await dashboard.start()
+                finally:
+                    await self.node.unregister()
+        finally:
+            # the services flush their buffers when they are stopped, so the async pool has to be closed last
+            await self.node.close_db()
 
 
 if __name__ == "__main__":
@@ -101,6 +110,9 @@ if __name__ == "__main__":
     parser.add_argument('-n', '--node', help='Node name', default=platform.node())
     parser.add_argument('-x', '--noupdate', action='store_true', help='Do not autoupdate')
     args = parser.parse_args()
+    # psycopg's async mode does not work with the ProactorEventLoop
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     if os.path.exists('config/dcsserverbot.ini'):
         migrate(node=args.node)
     try:
@@ -8,3 +8,4 @@ from .backup import *
 from .ovgme import *
 from .music import *
 from .scheduler import *
+from .logtail import *
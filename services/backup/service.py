@@ -1,11 +1,18 @@
 import asyncio
+import gzip
+import hashlib
+import json
 import os
+import re
 import shlex
 import shutil
 import subprocess
+import threading
 import time
-from typing import TYPE_CHECKING
+import uuid
+from typing import TYPE_CHECKING, Optional
 
+from concurrent.futures import ThreadPoolExecutor
 from core import ServiceRegistry, Service, utils
 from datetime import datetime
 from discord.ext import tasks
@@ -16,11 +23,16 @@ if TYPE_CHECKING:
 
 __all__ = ["BackupService"]
 
+CHUNK_SIZE = 8 * 1024 * 1024
+
 
 @ServiceRegistry.register("Backup", plugin="backup")
 class BackupService(Service):
     def __init__(self, node, name: str):
         super().__init__(node, name)
+        # incremental backups run concurrently, but never together with the garbage collection of the chunks
+        self.chunk_lock = threading.Condition()
+        self.running_backups = 0
         if not self.locals:
             self.log.debug("  - No backup.yaml configured, skipping backup service.")
             return
@@ -49,6 +61,10 @@ class BackupService(Service):
         os.makedirs(directory, exist_ok=True)
         return directory
 
+    @property
+    def chunk_dir(self) -> str:
+        return os.path.join(os.path.expandvars(self.locals.get('target')), 'chunks')
+
     @staticmethod
     def zip_path(zf: ZipFile, base: str, path: str):
         for root, dirs, files in os.walk(os.path.join(base, path)):
@@ -59,6 +75,14 @@ class BackupService(Service):
         self.log.info("Backing up DCSServerBot ...")
         target = self.mkdir()
         config = self.locals['backups'].get('bot')
+        if config.get('incremental', False):
+            try:
+                self.backup_incremental('bot', os.path.abspath('.'), config.get('directories', ['config', 'reports']))
+                self.log.info("Backup of DCSServerBot complete.")
+                return True
+            except Exception:
+                self.log.error('Backup of DCSServerBot failed.', exc_info=True)
+                return False
         filename = "bot_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".zip"
         zf = ZipFile(os.path.join(target, filename), mode="w")
         try:
@@ -78,6 +102,15 @@ class BackupService(Service):
         rc = True
         for server_name, server in self.bus.servers.items():
             self.log.info(f'Backing up server "{server_name}" ...')
+            if config.get('incremental', False):
+                try:
+                    self.backup_incremental(server.instance.name, server.instance.home,
+                                            config.get('directories', ['Config', 'Missions', 'Scripts']))
+                    self.log.info(f'Backup of server "{server_name}" complete.')
+                except Exception:
+                    self.log.error(f'Backup of server "{server_name}" failed.', exc_info=True)
+                    rc = False
+                continue
             filename = f"{server.instance.name}_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".zip"
             zf = ZipFile(os.path.join(target, filename), mode="w")
             try:
@@ -92,6 +125,153 @@ class BackupService(Service):
                 zf.close()
         return rc
 
+    def store_chunk(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.chunk_dir, digest[:2], digest + '.gz')
+        # chunks are shared between all backups, so each chunk is only written once
+        if not self.touch_chunk(digest):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{uuid.uuid4()}.tmp"
+            with open(tmp, mode='wb') as file:
+                file.write(gzip.compress(data, compresslevel=6))
+            os.replace(tmp, path)
+        return digest
+
+    def touch_chunk(self, digest: str) -> bool:
+        # reused chunks get a new mtime, so that they count as recent for the garbage collection
+        try:
+            os.utime(os.path.join(self.chunk_dir, digest[:2], digest + '.gz'))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def backup_file(self, path: str) -> list[str]:
+        chunks = []
+        with open(path, mode='rb') as file:
+            while data := file.read(CHUNK_SIZE):
+                chunks.append(self.store_chunk(data))
+        return chunks
+
+    def get_manifests(self, name: Optional[str] = None) -> list[str]:
+        target = os.path.expandvars(self.locals.get('target'))
+        pattern = re.compile((re.escape(name) if name else '.+') + r'_\d{8}_\d{6}\.json$')
+        manifests = []
+        for directory in os.listdir(target):
+            path = os.path.join(target, directory)
+            if directory == 'chunks' or not os.path.isdir(path):
+                continue
+            manifests.extend(os.path.join(path, x) for x in os.listdir(path) if pattern.match(x))
+        # newest first
+        return sorted(manifests, key=lambda x: os.path.basename(x)[-20:], reverse=True)
+
+    def backup_incremental(self, name: str, root: str, directories: list[str]):
+        # blocks while the garbage collection is running
+        with self.chunk_lock:
+            self.running_backups += 1
+        try:
+            self._backup_incremental(name, root, directories)
+        finally:
+            with self.chunk_lock:
+                self.running_backups -= 1
+                self.chunk_lock.notify_all()
+
+    def _backup_incremental(self, name: str, root: str, directories: list[str]):
+        # files that did not change since the last backup (same size and mtime) are not read again
+        last_files = {}
+        manifests = self.get_manifests(name)
+        if manifests:
+            with open(manifests[0], mode='r', encoding='utf-8') as file:
+                last_files = json.load(file)['files']
+        files = {}
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=self.locals.get('workers', os.cpu_count())) as executor:
+            for directory in directories:
+                for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        relpath = os.path.relpath(path, root).replace(os.sep, '/')
+                        stat = os.stat(path)
+                        files[relpath] = {"size": stat.st_size, "mtime": stat.st_mtime}
+                        last = last_files.get(relpath)
+                        if last and last['size'] == stat.st_size and last['mtime'] == stat.st_mtime and all(
+                                self.touch_chunk(x) for x in last['chunks']):
+                            files[relpath]['chunks'] = last['chunks']
+                        else:
+                            jobs[relpath] = executor.submit(self.backup_file, path)
+            for relpath, job in jobs.items():
+                files[relpath]['chunks'] = job.result()
+        manifest = {
+            "name": name,
+            "node": self.node.name,
+            "root": root,
+            "created": datetime.now().isoformat(),
+            "files": files
+        }
+        filename = os.path.join(self.mkdir(), f"{name}_" + datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+        with open(filename, mode='w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        self.log.debug(f"- {len(jobs)} of {len(files)} files changed since the last backup of {name}.")
+
+    def restore_file(self, path: str, entry: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4()}.tmp"
+        with open(tmp, mode='wb') as file:
+            for chunk in entry['chunks']:
+                with open(os.path.join(self.chunk_dir, chunk[:2], chunk + '.gz'), mode='rb') as infile:
+                    file.write(gzip.decompress(infile.read()))
+        os.replace(tmp, path)
+        os.utime(path, (entry['mtime'], entry['mtime']))
+
+    def restore_incremental(self, manifest: str, target: Optional[str] = None) -> bool:
+        path = next((x for x in self.get_manifests() if os.path.basename(x) == os.path.basename(manifest)), None)
+        if not path:
+            self.log.error(f"Backup {manifest} not found.")
+            return False
+        with open(path, mode='r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        root = target or manifest['root']
+        self.log.info(f"Restoring {manifest['name']} from {os.path.basename(path)} into {root} ...")
+        try:
+            with ThreadPoolExecutor(max_workers=self.locals.get('workers', os.cpu_count())) as executor:
+                jobs = [
+                    executor.submit(self.restore_file, os.path.join(root, relpath), entry)
+                    for relpath, entry in manifest['files'].items()
+                ]
+                for job in jobs:
+                    job.result()
+            self.log.info(f"Restore of {manifest['name']} complete.")
+            return True
+        except Exception:
+            self.log.error(f"Restore of {manifest['name']} failed.", exc_info=True)
+            return False
+
+    async def restore(self, manifest: str, target: Optional[str] = None) -> bool:
+        return await asyncio.to_thread(self.restore_incremental, manifest, target)
+
+    def collect_garbage(self):
+        # wait for running backups and block new ones, so that all manifests are written while the chunks are collected
+        with self.chunk_lock:
+            self.chunk_lock.wait_for(lambda: self.running_backups == 0)
+            self._collect_garbage()
+
+    def _collect_garbage(self):
+        # remove all chunks that are not referenced by any manifest anymore
+        if not os.path.exists(self.chunk_dir):
+            return
+        referenced = set()
+        for manifest in self.get_manifests():
+            with open(manifest, mode='r', encoding='utf-8') as file:
+                for entry in json.load(file)['files'].values():
+                    referenced.update(entry['chunks'])
+        # only old chunks will be removed, to be on the safe side for chunks that are being written
+        limit = time.time() - 86400
+        for dirpath, _, filenames in os.walk(self.chunk_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if (filename.endswith('.tmp') or filename.split('.')[0] not in referenced) and \
+                        os.stat(path).st_mtime < limit:
+                    os.remove(path)
+
     def backup_database(self) -> bool:
         target = self.mkdir()
         config = self.locals['backups'].get('database')
@@ -146,11 +326,12 @@ class BackupService(Service):
             if not os.path.exists(path):
                 return
             now = time.time()
-            for f in [os.path.join(path, x) for x in os.listdir(path)]:
+            for f in [os.path.join(path, x) for x in os.listdir(path) if x != 'chunks']:
                 if os.stat(f).st_mtime < (now - int(self.locals['delete_after']) * 86400):
                     if os.path.isfile(f):
                         os.remove(f)
                     else:
                         shutil.rmtree(f)
+            await asyncio.to_thread(self.collect_garbage)
         except Exception as ex:
             self.log.exception(ex)
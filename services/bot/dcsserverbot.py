@@ -1,13 +1,18 @@
 import asyncio
 import discord
+import importlib
 import re
+import time
 
 from contextlib import closing
-from core import NodeImpl, ServiceRegistry, EventListener, Server, Channel, utils, Player, Status, FatalException
+from core import NodeImpl, ServiceRegistry, EventListener, Server, Channel, utils, Player, Status, FatalException, \
+    PlayerIndex
 from datetime import datetime, timezone
 from discord.ext import commands
 from typing import Optional, Union, Tuple, TYPE_CHECKING, Any, Iterable
 
+from .embeds import EmbedManager
+
 if TYPE_CHECKING:
     from ..servicebus import ServiceBus
 
@@ -22,6 +27,7 @@ class DCSServerBot(commands.Bot):
         self.sub_version: str = kwargs['sub_version']
         self.node: NodeImpl = kwargs['node']
         self.pool = self.node.pool
+        self.apool = self.node.apool
         self.log = self.node.log
         self.locals = kwargs['locals']
         self.plugins = self.node.plugins
@@ -30,8 +36,11 @@ class DCSServerBot(commands.Bot):
         self.audit_channel = None
         self.mission_stats = None
         self.member: Optional[discord.Member] = None
-        self.lock: asyncio.Lock = asyncio.Lock()
+        self.embeds = EmbedManager(self)
+        # normalized member names for the auto-matching, see on_member_xxx()
+        self.member_index = utils.MemberIndex()
         self.synced: bool = False
+        self.connect_start: Optional[float] = None
         self.tree.on_error = self.on_app_command_error
 
     async def start(self, token: str, *, reconnect: bool = True) -> None:
@@ -68,15 +77,54 @@ class DCSServerBot(commands.Bot):
     def servers(self) -> dict[str, Server]:
         return self.bus.servers
 
+    def get_load_order(self) -> list[list[str]]:
+        # plugins are loaded in waves, each plugin after the plugins it requires (see __requires__ in __init__.py)
+        requires: dict[str, set[str]] = {}
+        for plugin in [x.lower() for x in self.plugins]:
+            try:
+                module = importlib.import_module(f'plugins.{plugin}')
+                requires[plugin] = set(getattr(module, '__requires__', [])) & set(self.plugins) - {plugin}
+            except Exception:
+                # will be reported by load_plugin()
+                requires[plugin] = set()
+        # cloud registers the loaded plugins, so it is still loaded last
+        if 'cloud' in requires:
+            requires['cloud'] = set(requires.keys()) - {'cloud'}
+        waves: list[list[str]] = []
+        loaded: set[str] = set()
+        while requires:
+            wave = [plugin for plugin, deps in requires.items() if deps <= loaded]
+            if not wave:
+                self.log.warning(f"  - Circular plugin dependencies between: {', '.join(requires.keys())}")
+                waves.extend([plugin] for plugin in requires.keys())
+                break
+            waves.append(wave)
+            loaded.update(wave)
+            for plugin in wave:
+                del requires[plugin]
+        return waves
+
+    async def _load_plugin_timed(self, plugin: str) -> bool:
+        start = time.perf_counter()
+        try:
+            return await self.load_plugin(plugin)
+        finally:
+            self.node.startup.add(f'Plugin {plugin.title()}', time.perf_counter() - start)
+
     async def setup_hook(self) -> None:
         self.log.info('- Loading Plugins ...')
-        for plugin in self.plugins:
-            if not await self.load_plugin(plugin.lower()):
-                self.log.info(f'  => {plugin.title()} NOT loaded.')
+        with self.node.startup.measure('Plugins (total)'):
+            for wave in self.get_load_order():
+                # independent plugins are loaded concurrently, their database installations run in threads
+                results = await asyncio.gather(*[self._load_plugin_timed(plugin) for plugin in wave])
+                for plugin, result in zip(wave, results):
+                    if not result:
+                        self.log.info(f'  => {plugin.title()} NOT loaded.')
         # cleanup remote servers (if any)
         for key, value in self.bus.servers.copy().items():
             if value.is_remote:
                 del self.bus.servers[key]
+        self.connect_start = time.perf_counter()
 
     async def load_plugin(self, plugin: str) -> bool:
         try:
@@ -187,7 +235,11 @@ class DCSServerBot(commands.Bot):
     async def on_ready(self):
         try:
             await self.wait_until_ready()
+            # members might have changed while we were disconnected
+            self.member_index = utils.MemberIndex(x for x in self.get_all_members() if not x.bot)
             if not self.synced:
+                if self.connect_start:
+                    self.node.startup.add('Discord login', time.perf_counter() - self.connect_start)
                 self.log.info(f'- Logged in as {self.user.name} - {self.user.id}')
                 if len(self.guilds) > 1:
                     self.log.warning('  => Your bot can only be installed in ONE Discord server!')
@@ -214,14 +266,18 @@ class DCSServerBot(commands.Bot):
                         roles |= set([x.strip() for x in server.locals['coalitions']['red_role'].split(',')])
                         self.check_roles(roles)
                     await self.check_channels(server)
+                # build the player search index for the autocompletion upfront
+                asyncio.create_task(PlayerIndex().refresh(self.apool))
                 self.log.info('- Registering Discord Commands (this might take a bit) ...')
-                self.tree.copy_global_to(guild=self.guilds[0])
-                await self.tree.sync(guild=self.guilds[0])
+                with self.node.startup.measure('Discord command sync'):
+                    self.tree.copy_global_to(guild=self.guilds[0])
+                    await self.tree.sync(guild=self.guilds[0])
                 self.synced = True
                 self.log.info('- Discord Commands registered.')
                 if 'discord_status' in self.locals:
                     await self.change_presence(activity=discord.Game(name=self.locals['discord_status']))
                 self.log.info('DCSServerBot MASTER started, accepting commands.')
+                self.node.startup.report(self.log)
                 await self.audit(message="Discord Bot started.")
             else:
                 self.log.warning('- Discord connection re-established.')
@@ -231,6 +287,22 @@ class DCSServerBot(commands.Bot):
             self.log.exception(ex)
             raise
 
+    async def on_member_join(self, member: discord.Member):
+        if not member.bot:
+            self.member_index.add(member)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if not after.bot:
+            self.member_index.add(after)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        member = self.guilds[0].get_member(after.id) if self.guilds else None
+        if member and not member.bot:
+            self.member_index.add(member)
+
+    async def on_member_remove(self, member: discord.Member):
+        self.member_index.remove(member)
+
     async def on_command_error(self, ctx: commands.Context, err: Exception):
         if isinstance(err, commands.CommandNotFound):
             pass
@@ -378,7 +450,7 @@ class DCSServerBot(commands.Bot):
             member = self.get_member_by_ucid(data['ucid'])
             if member:
                 return member
-        return utils.match(data['name'], [x for x in self.get_all_members() if not x.bot])
+        return self.member_index.match(data['name'])
 
     def get_server(self, ctx: Union[discord.Interaction, discord.Message, str], *,
                    admin_only: Optional[bool] = False) -> Optional[Server]:
@@ -404,46 +476,16 @@ class DCSServerBot(commands.Bot):
         return None
 
     async def setEmbed(self, *, embed_name: str, embed: discord.Embed, channel_id: Union[Channel, int] = Channel.STATUS,
-                       file: Optional[discord.File] = None, server: Optional[Server] = None):
-        async with self.lock:
-            if server and isinstance(channel_id, Channel):
-                channel_id = int(server.channels.get(channel_id, -1))
-            else:
-                channel_id = int(channel_id)
-            channel = self.get_channel(channel_id)
-            if not channel and channel_id != -1:
-                channel = await self.fetch_channel(channel_id)
-            if not channel:
-                self.log.error(f"Channel {channel_id} not found, can't add or change an embed in there!")
-                return
-
-            with self.pool.connection() as conn:
-                # check if we have a message persisted already
-                row = conn.execute("""
-                    SELECT embed FROM message_persistence 
-                    WHERE server_name = %s AND embed_name = %s
-                """, (server.name if server else 'Master', embed_name)).fetchone()
-
-            message = None
-            if row:
-                try:
-                    message = await channel.fetch_message(row[0])
-                    if not file:
-                        await message.edit(embed=embed)
-                    else:
-                        await message.edit(embed=embed, attachments=[file])
-                except discord.errors.NotFound:
-                    message = None
-                except discord.errors.DiscordException as ex:
-                    self.log.warning(f"Error during update of embed {embed_name}: " + str(ex))
-                    return
-            if not row or not message:
-                message = await channel.send(embed=embed, file=file)
-                with self.pool.connection() as conn:
-                    with conn.transaction():
-                        conn.execute("""
-                            INSERT INTO message_persistence (server_name, embed_name, embed) 
-                            VALUES (%s, %s, %s) 
-                            ON CONFLICT (server_name, embed_name) 
-                            DO UPDATE SET embed=excluded.embed
-                        """, (server.name if server else 'Master', embed_name, message.id))
+                       file: Optional[discord.File] = None,
+                       server: Optional[Server] = None) -> Optional[discord.Message]:
+        if server and isinstance(channel_id, Channel):
+            channel_id = int(server.channels.get(channel_id, -1))
+        else:
+            channel_id = int(channel_id)
+        channel = self.get_channel(channel_id)
+        if not channel and channel_id != -1:
+            channel = await self.fetch_channel(channel_id)
+        if not channel:
+            self.log.error(f"Channel {channel_id} not found, can't add or change an embed in there!")
+            return
+        return await self.embeds.set(channel, server.name if server else 'Master', embed_name, embed, file)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import discord
+import time
+
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .dcsserverbot import DCSServerBot
+
+__all__ = ["EmbedManager"]
+
+
+@dataclass
+class EmbedUpdate:
+    embed: discord.Embed
+    file: Optional[discord.File] = None
+    futures: list[asyncio.Future] = field(default_factory=list)
+
+
+# Sends and updates the persistent embeds. Updates are serialized per channel. If an embed gets updated again,
+# before the former update was sent to Discord, only the latest update is sent (last write wins). Edits that would
+# not change the embed are skipped, and the edits per channel are throttled to stay below the Discord rate limits.
+class EmbedManager:
+    # Discord allows 5 message edits per 5 seconds per channel
+    RATE_LIMIT = 5
+    RATE_PERIOD = 5.0
+    # unchanged embeds are edited again after a while, to recreate them, if the message was deleted
+    MAX_AGE = 86400
+
+    def __init__(self, bot: DCSServerBot):
+        self.bot = bot
+        self.log = bot.log
+        self.message_ids: dict[tuple[str, str], int] = {}
+        self.messages: dict[tuple[str, str], discord.Message] = {}
+        self.embeds: dict[tuple[str, str], dict] = {}
+        self.updated: dict[tuple[str, str], float] = {}
+        self.pending: dict[int, OrderedDict[tuple[str, str], EmbedUpdate]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        self.requests: dict[int, deque[float]] = {}
+
+    async def set(self, channel: discord.TextChannel, server_name: str, embed_name: str, embed: discord.Embed,
+                  file: Optional[discord.File] = None) -> Optional[discord.Message]:
+        key = (server_name, embed_name)
+        pending = self.pending.setdefault(channel.id, OrderedDict())
+        update = pending.get(key)
+        if update:
+            update.embed = embed
+            update.file = file
+        else:
+            update = pending[key] = EmbedUpdate(embed=embed, file=file)
+        future = asyncio.get_running_loop().create_future()
+        update.futures.append(future)
+        if channel.id not in self.workers:
+            self.workers[channel.id] = asyncio.create_task(self._worker(channel))
+        return await future
+
+    async def _worker(self, channel: discord.TextChannel):
+        pending = self.pending[channel.id]
+        try:
+            while pending:
+                key, update = pending.popitem(last=False)
+                try:
+                    message = await self._send(channel, key, update)
+                    for future in update.futures:
+                        if not future.done():
+                            future.set_result(message)
+                except Exception as ex:
+                    for future in update.futures:
+                        if not future.done():
+                            future.set_exception(ex)
+        finally:
+            del self.workers[channel.id]
+            if not pending:
+                del self.pending[channel.id]
+
+    async def _throttle(self, channel_id: int):
+        requests = self.requests.setdefault(channel_id, deque(maxlen=self.RATE_LIMIT))
+        if len(requests) == self.RATE_LIMIT:
+            delay = requests[0] + self.RATE_PERIOD - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        requests.append(time.monotonic())
+
+    async def _get_message_id(self, key: tuple[str, str]) -> Optional[int]:
+        if key not in self.message_ids:
+            async with self.bot.apool.connection() as conn:
+                cursor = await conn.execute("""
+                    SELECT embed FROM message_persistence WHERE server_name = %s AND embed_name = %s
+                """, key)
+                row = await cursor.fetchone()
+            if not row:
+                return None
+            self.message_ids[key] = row[0]
+        return self.message_ids[key]
+
+    async def _send(self, channel: discord.TextChannel, key: tuple[str, str],
+                    update: EmbedUpdate) -> Optional[discord.Message]:
+        embed_dict = update.embed.to_dict()
+        message_id = await self._get_message_id(key)
+        message = self.messages.get(key)
+        if message and message.id == message_id and message.channel.id == channel.id and not update.file and \
+                self.embeds.get(key) == embed_dict and time.monotonic() - self.updated.get(key, 0) < self.MAX_AGE:
+            return message
+        if message_id:
+            try:
+                await self._throttle(channel.id)
+                # a partial message does not need to be fetched before it can be edited
+                partial = channel.get_partial_message(message_id)
+                if not update.file:
+                    message = await partial.edit(embed=update.embed)
+                else:
+                    message = await partial.edit(embed=update.embed, attachments=[update.file])
+                self.messages[key] = message
+                self.embeds[key] = embed_dict
+                self.updated[key] = time.monotonic()
+                return message
+            except discord.errors.NotFound:
+                # the message got deleted, so it will be sent again
+                self.messages.pop(key, None)
+                self.embeds.pop(key, None)
+            except discord.errors.DiscordException as ex:
+                self.log.warning(f"Error during update of embed {key[1]}: " + str(ex))
+                return None
+        await self._throttle(channel.id)
+        message = await channel.send(embed=update.embed, file=update.file)
+        async with self.bot.apool.connection() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO message_persistence (server_name, embed_name, embed)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (server_name, embed_name)
+                    DO UPDATE SET embed=excluded.embed
+                """, (key[0], key[1], message.id))
+        self.message_ids[key] = message.id
+        self.messages[key] = message
+        self.embeds[key] = embed_dict
+        self.updated[key] = time.monotonic()
+        return message
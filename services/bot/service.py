@@ -9,10 +9,10 @@ import shutil
 import zipfile
 
 from core import ServiceRegistry, Service, utils
+from core.report import Renderer
 from discord.ext import commands
 from discord.utils import MISSING
 from io import BytesIO
-from matplotlib import font_manager
 from typing import Optional, Union, TYPE_CHECKING
 
 from .dcsserverbot import DCSServerBot
@@ -57,6 +57,7 @@ class BotService(Service):
                 await asyncio.sleep(1)
             self.bot = self.init_bot()
             await self.install_fonts()
+            Renderer().start(self.locals.get('reports', {}))
             async with self.bot:
                 await self.bot.start(self.locals['token'], reconnect=reconnect)
         except PermissionError as ex:
@@ -72,6 +73,7 @@ class BotService(Service):
     async def stop(self):
         if self.bot:
             await self.bot.close()
+        Renderer().stop()
         await super().stop()
 
     async def alert(self, message: str, server: Optional[Server] = None, node: Optional[str] = None) -> None:
@@ -92,6 +94,8 @@ class BotService(Service):
     async def install_fonts(self):
         font = self.locals.get('reports', {}).get('cjk_font')
         if font:
+            from matplotlib import font_manager
+
             if not os.path.exists('fonts'):
                 os.makedirs('fonts')
 
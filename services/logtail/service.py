@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+
+from core import ServiceRegistry, Service, Instance
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Union
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from watchdog.observers import Observer
+from watchdog.observers.api import ObservedWatch
+
+__all__ = ["LogTailService"]
+
+LogCallback = Callable[[re.Match], Awaitable[None]]
+
+# named groups are turned into non-capturing ones for the combined pattern, as their names might clash
+NAMED_GROUP = re.compile(r'(?<!\\)((?:\\\\)*)\(\?P<\w+>')
+# patterns referring to their own groups can't be combined, as the group numbers shift
+GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?P=|\(\?\(')
+
+
+@dataclass
+class LogHandler:
+    pattern: re.Pattern
+    callback: LogCallback
+    # True, if the pattern is part of the combined pre-filter of its follower
+    prefiltered: bool = False
+
+    def group_free(self) -> Optional[str]:
+        if self.pattern.flags != re.UNICODE or GROUP_REFERENCE.search(self.pattern.pattern):
+            return None
+        pattern = NAMED_GROUP.sub(r'\1(?:', self.pattern.pattern)
+        try:
+            re.compile(pattern)
+        except re.error:
+            return None
+        return pattern
+
+
+class LogFileEventHandler(FileSystemEventHandler):
+    def __init__(self, follower: LogFollower):
+        self.follower = follower
+
+    def on_any_event(self, event: FileSystemEvent):
+        if os.path.basename(event.src_path).lower() == 'dcs.log':
+            # watchdog events are raised in the observer thread
+            self.follower.loop.call_soon_threadsafe(self.follower.event.set)
+
+
+@dataclass
+class LogFollower:
+    path: str
+    loop: asyncio.AbstractEventLoop
+    handlers: list[LogHandler] = field(default_factory=list)
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    watch: Optional[ObservedWatch] = None
+    # group-free copies of all patterns without special flags are combined into one pre-filter, so that most
+    # lines only need a single search
+    combined: Optional[re.Pattern] = None
+    file_id: Optional[tuple[int, int]] = None
+    offset: int = -1
+    remainder: bytes = b''
+    pending: set[asyncio.Task] = field(default_factory=set)
+    lines: int = 0
+    matches: int = 0
+    last_read: float = 0
+    lag: int = 0
+
+    def compile(self):
+        simple = {}
+        for handler in self.handlers:
+            handler.prefiltered = False
+            pattern = handler.group_free()
+            if pattern is not None:
+                simple[id(handler)] = pattern
+        self.combined = None
+        if not simple:
+            return
+        try:
+            self.combined = re.compile('|'.join(f'(?:{x})' for x in simple.values()))
+        except re.error:
+            # fall back to searching each pattern on its own
+            return
+        for handler in self.handlers:
+            handler.prefiltered = id(handler) in simple
+
+    def read(self) -> list[str]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.offset = 0
+            return []
+        file_id = (stat.st_dev, stat.st_ino)
+        if self.offset == -1:
+            # when we are started with an existing logfile, only new lines are processed
+            self.offset = stat.st_size
+            self.file_id = file_id
+            return []
+        elif file_id != self.file_id or stat.st_size < self.offset:
+            # the logfile got rotated or truncated
+            self.offset = 0
+            self.remainder = b''
+        self.file_id = file_id
+        if stat.st_size == self.offset:
+            self.lag = 0
+            return []
+        with open(self.path, mode='rb') as file:
+            file.seek(self.offset)
+            data = self.remainder + file.read()
+            self.offset = file.tell()
+        self.last_read = time.time()
+        self.lag = max(stat.st_size - self.offset, 0)
+        lines = data.split(b'\n')
+        self.remainder = lines.pop()
+        return [x.decode('utf-8', errors='ignore').rstrip('\r') for x in lines]
+
+    def dispatch(self, line: str):
+        self.lines += 1
+        prefilter = None
+        for handler in self.handlers:
+            if handler.prefiltered:
+                if prefilter is None:
+                    prefilter = self.combined.search(line) is not None
+                if not prefilter:
+                    continue
+            match = handler.pattern.search(line)
+            if match:
+                self.matches += 1
+                task = asyncio.create_task(handler.callback(match))
+                self.pending.add(task)
+                task.add_done_callback(self.pending.discard)
+
+
+# Follows the dcs.log of every instance on this node that has handlers registered. Extensions register a regular
+# expression and an async callback, which is called with the match for every new line in dcs.log that matches.
+@ServiceRegistry.register("LogTail")
+class LogTailService(Service):
+    def __init__(self, node, name: str):
+        super().__init__(node, name)
+        self.followers: dict[str, LogFollower] = {}
+        self.observer: Optional[Observer] = None
+        self.poll_interval = 1.0
+
+    async def start(self, *args, **kwargs):
+        await super().start()
+        self.observer = Observer()
+        self.observer.start()
+
+    async def stop(self, *args, **kwargs):
+        for follower in self.followers.values():
+            follower.task.cancel()
+        self.followers.clear()
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+        await super().stop()
+
+    def register(self, instance: Instance, pattern: Union[str, re.Pattern], callback: LogCallback) -> LogHandler:
+        follower = self.followers.get(instance.name)
+        if not follower:
+            path = os.path.join(instance.home, 'Logs', 'dcs.log')
+            follower = LogFollower(path=path, loop=asyncio.get_running_loop())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self.observer:
+                follower.watch = self.observer.schedule(LogFileEventHandler(follower), os.path.dirname(path),
+                                                        recursive=False)
+            follower.read()
+            follower.task = asyncio.create_task(self.follow(follower))
+            self.followers[instance.name] = follower
+        handler = LogHandler(pattern=re.compile(pattern) if isinstance(pattern, str) else pattern, callback=callback)
+        follower.handlers.append(handler)
+        follower.compile()
+        return handler
+
+    def unregister(self, instance: Instance, handler: LogHandler):
+        follower = self.followers.get(instance.name)
+        if not follower or handler not in follower.handlers:
+            return
+        follower.handlers.remove(handler)
+        follower.compile()
+        if not follower.handlers:
+            follower.task.cancel()
+            del self.followers[instance.name]
+            if self.observer and follower.watch:
+                self.observer.unschedule(follower.watch)
+
+    async def follow(self, follower: LogFollower):
+        while True:
+            try:
+                # wait for a change event, but poll anyway, as not every filesystem reports appends to open files
+                await asyncio.wait_for(follower.event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            follower.event.clear()
+            try:
+                for line in await asyncio.to_thread(follower.read):
+                    follower.dispatch(line)
+            except Exception as ex:
+                self.log.exception(ex)
+
+    def get_metrics(self) -> dict[str, dict]:
+        return {
+            name: {
+                "handlers": len(follower.handlers),
+                "lines": follower.lines,
+                "matches": follower.matches,
+                "backlog": len(follower.pending),
+                "lag": follower.lag,
+                "last_read": follower.last_read
+            } for name, follower in self.followers.items()
+        }
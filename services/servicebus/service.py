@@ -1,17 +1,22 @@
 from __future__ import annotations
 import asyncio
-import concurrent
 import inspect
 import json
+import logging
 import psycopg
+import select
+import socket
+import time
 import uuid
 
 from _operator import attrgetter
+from bisect import bisect_left
+from collections import deque, defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from contextlib import closing
+from contextlib import closing, suppress
 from copy import deepcopy
 from core import Server, DataObjectFactory, Status, ServerImpl, Autoexec, ServerProxy, EventListener, \
-    InstanceProxy, NodeProxy, Mission, Node, utils
+    InstanceProxy, NodeProxy, Mission, Node, ProfileCache, utils
 from core.services.base import Service
 from core.services.registry import ServiceRegistry
 from datetime import datetime, timedelta, timezone
@@ -19,9 +24,13 @@ from discord.ext import tasks
 from enum import Enum
 from psycopg.rows import dict_row
 from psycopg.types.json import Json
-from queue import Queue
-from socketserver import BaseRequestHandler, ThreadingUDPServer
-from typing import Tuple, Callable, Optional, cast, TYPE_CHECKING, Union, Any
+from typing import Optional, TYPE_CHECKING, Union, Any, cast
+
+# orjson is optional, but much faster
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 if TYPE_CHECKING:
     from services import DCSServerBot
@@ -30,6 +39,155 @@ __all__ = [
     "ServiceBus"
 ]
 
+# name of the postgres notification channel that wakes up the intercom readers
+INTERCOM_CHANNEL = 'intercom'
+# number of intercom messages to be read with a single statement
+INTERCOM_BATCH_SIZE = 100
+# messages that will be dropped first, if a server queue runs full
+NON_CRITICAL_COMMANDS = ['getMissionUpdate', 'perfmon']
+NON_CRITICAL_EVENTS = ['S_EVENT_SHOT', 'S_EVENT_HIT', 'S_EVENT_SHOOTING_START', 'S_EVENT_SHOOTING_END']
+# commands that change the server or player state, all listeners have to be in sync for them
+SYNC_COMMANDS = [
+    'registerDCSServer', 'onMissionLoadBegin', 'onMissionLoadEnd', 'onSimulationStart', 'onSimulationStop',
+    'onSimulationPause', 'onSimulationResume', 'onPlayerConnect', 'onPlayerStart', 'onPlayerStop', 'onPlayerChangeSlot'
+]
+# onGameEvent subtypes that change the player state (e.g. player.active), they are handled like SYNC_COMMANDS
+SYNC_GAME_EVENTS = ['connect', 'disconnect', 'change_slot', 'mission_end']
+# upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf')]
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket that contains the quantile
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            total += count
+            if total >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+            "buckets": dict(zip([str(x) for x in LATENCY_BUCKETS], self.buckets))
+        }
+
+
+class ServerQueue:
+    """Bounded message queue of a DCS server. On overflow, the oldest non-critical messages are dropped."""
+
+    def __init__(self, server_name: str, maxsize: int):
+        self.server_name = server_name
+        self.maxsize = maxsize
+        # entries are [data, received, alive, droppable]
+        self.entries: deque[list] = deque()
+        self.droppable: deque[list] = deque()
+        self.size = 0
+        self.unfinished = 0
+        self.not_empty = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.finished.set()
+        # metrics
+        self.received: dict[str, int] = defaultdict(int)
+        self.processed: dict[str, int] = defaultdict(int)
+        self.dropped: dict[str, int] = defaultdict(int)
+        self.lag = 0.0
+        self.max_lag = 0.0
+        # one ordered lane per event listener
+        self.lanes: dict[EventListener, asyncio.Queue] = dict()
+        self.lane_tasks: dict[EventListener, asyncio.Task] = dict()
+
+    @staticmethod
+    def is_droppable(data: dict) -> bool:
+        command = data.get('command')
+        return command in NON_CRITICAL_COMMANDS or (command == 'onMissionEvent' and
+                                                    data.get('eventName') in NON_CRITICAL_EVENTS)
+
+    def _drop(self, entry: list):
+        entry[2] = False
+        self.size -= 1
+        self.dropped[entry[0].get('command')] += 1
+        self.task_done()
+
+    def put(self, data: dict):
+        droppable = self.is_droppable(data)
+        self.received[data.get('command')] += 1
+        if self.size >= self.maxsize:
+            if self.droppable:
+                self._drop(self.droppable.popleft())
+            elif droppable:
+                self.dropped[data.get('command')] += 1
+                return
+            # critical messages are never dropped
+        entry = [data, time.monotonic(), True, droppable]
+        self.entries.append(entry)
+        if droppable:
+            self.droppable.append(entry)
+        self.size += 1
+        self.unfinished += 1
+        self.finished.clear()
+        self.not_empty.set()
+
+    async def get(self) -> dict:
+        while True:
+            while not self.entries:
+                self.not_empty.clear()
+                await self.not_empty.wait()
+            entry = self.entries.popleft()
+            # skip dropped messages
+            if not entry[2]:
+                continue
+            if entry[3]:
+                self.droppable.popleft()
+            self.size -= 1
+            self.lag = time.monotonic() - entry[1]
+            self.max_lag = max(self.max_lag, self.lag)
+            return entry[0]
+
+    def task_done(self):
+        self.unfinished -= 1
+        if self.unfinished <= 0:
+            self.unfinished = 0
+            self.finished.set()
+
+    async def join(self):
+        await self.finished.wait()
+
+
+class UDPProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, bus: ServiceBus):
+        self.bus = bus
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        try:
+            self.bus.handle_datagram(data)
+        except Exception as ex:
+            self.bus.log.exception(ex)
+
+    def error_received(self, exc: Exception) -> None:
+        self.bus.log.debug(f"UDP error received: {exc}")
+
 
 @ServiceRegistry.register("ServiceBus")
 class ServiceBus(Service):
@@ -40,14 +198,24 @@ class ServiceBus(Service):
         self.version = self.node.bot_version
         self.listeners: dict[str, asyncio.Future] = dict()
         self.eventListeners: list[EventListener] = []
+        # command => listeners that implement it
+        self.routing: dict[str, list[EventListener]] = dict()
+        self.latency: dict[tuple[str, str], LatencyHistogram] = defaultdict(LatencyHistogram)
         self.servers: dict[str, Server] = dict()
-        self.udp_server = None
+        self.udp_transport: Optional[asyncio.DatagramTransport] = None
+        self.message_queue: dict[str, ServerQueue] = dict()
+        self.queue_tasks: dict[str, asyncio.Task] = dict()
+        self.queue_size: int = self.node.locals.get('udp_queue_size', 2000)
         self.executor = None
         if self.node.locals['DCS'].get('desanitize', True):
             if not self.node.locals['DCS'].get('cloud', False) or self.master:
                 utils.desanitize(self)
         self.loop = asyncio.get_event_loop()
         self.intercom.add_exception_type(psycopg.DatabaseError)
+        # push based intercom (LISTEN / NOTIFY), the polling is only used as a fallback then
+        self.intercom_notify: bool = self.node.locals.get('intercom_notify', True)
+        self.intercom_event = asyncio.Event()
+        self.intercom_listening = False
 
     async def start(self):
         await super().start()
@@ -62,6 +230,11 @@ class ServiceBus(Service):
                         conn.execute("UPDATE intercom SET node = 'Master' WHERE node = %s", (self.node.name, ))
             self.executor = ThreadPoolExecutor(thread_name_prefix='ServiceBus', max_workers=20)
             await self.start_udp_listener()
+            if self.intercom_notify:
+                self.intercom_listening = True
+                self.executor.submit(self.intercom_listener)
+                # wait for notifications and only poll every couple of seconds as a fallback
+                self.intercom.change_interval(seconds=0)
             await self.init_servers()
             if self.master:
                 self.bot = ServiceRegistry.get("Bot").bot
@@ -80,17 +253,28 @@ class ServiceBus(Service):
                     }
                 })
             self.intercom.start()
+            self.report_metrics.start()
         except Exception as ex:
             self.log.exception(ex)
 
     async def stop(self):
         self.intercom.cancel()
+        self.intercom_listening = False
         self.log.debug('- Intercom stopped.')
-        if self.udp_server:
+        self.report_metrics.cancel()
+        if self.udp_transport:
+            self.udp_transport.close()
             self.log.debug("- Processing unprocessed messages ...")
-            await asyncio.to_thread(self.udp_server.shutdown)
+            for queue in self.message_queue.values():
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(queue.join(), timeout=10)
+                    await asyncio.wait_for(asyncio.gather(*[x.join() for x in queue.lanes.values()]), timeout=10)
+                for task in queue.lane_tasks.values():
+                    task.cancel()
+            for task in self.queue_tasks.values():
+                task.cancel()
             self.log.debug("- All messages processed.")
-            self.udp_server.server_close()
+        await ProfileCache().flush()
         self.log.debug('- Listener stopped.')
         if self.executor:
             self.executor.shutdown(wait=True)
@@ -120,9 +304,16 @@ class ServiceBus(Service):
     def register_eventListener(self, listener: EventListener):
         self.log.debug(f'  - Registering EventListener {type(listener).__name__}')
         self.eventListeners.append(listener)
+        self.routing.clear()
 
     def unregister_eventListener(self, listener: EventListener):
         self.eventListeners.remove(listener)
+        self.routing.clear()
+        for queue in self.message_queue.values():
+            queue.lanes.pop(listener, None)
+            task = queue.lane_tasks.pop(listener, None)
+            if task:
+                task.cancel()
         self.log.debug(f'  - EventListener {type(listener).__name__} unregistered.')
 
     async def init_servers(self):
@@ -214,7 +405,7 @@ class ServiceBus(Service):
             if server.node.name == node:
                 del self.servers[server.name]
 
-    def register_server(self, data: dict) -> bool:
+    async def register_server(self, data: dict) -> bool:
         server_name = data['server_name']
         # check for protocol incompatibilities
         if data['hook_version'] != self.version:
@@ -228,7 +419,8 @@ class ServiceBus(Service):
         server: ServerImpl = cast(ServerImpl, self.servers[server_name])
         # set the PID
         if not server.process:
-            server.process = utils.find_process("DCS_server.exe|DCS.exe", server.instance.name)
+            server.process = await asyncio.to_thread(utils.find_process, "DCS_server.exe|DCS.exe",
+                                                     server.instance.name)
         server.dcs_version = data['dcs_version']
         # if we are an agent, initialize the server
         if not self.master:
@@ -242,47 +434,48 @@ class ServiceBus(Service):
         # validate server ports
         dcs_ports: dict[int, str] = dict()
         webgui_ports: dict[int, str] = dict()
-        for server in self.servers.values():
+        for _server in self.servers.values():
             # only check ports of local servers
-            if server.is_remote or server.status == Status.SHUTDOWN:
+            if _server.is_remote or _server.status == Status.SHUTDOWN:
                 continue
-            dcs_port = int(server.settings.get('port', 10308))
+            dcs_port = int(_server.settings.get('port', 10308))
             if dcs_port in dcs_ports:
-                self.log.error(f'Server "{server.name}" shares its DCS port with server '
+                self.log.error(f'Server "{_server.name}" shares its DCS port with server '
                                f'"{dcs_ports[dcs_port]}"! Registration aborted.')
                 return False
             else:
-                dcs_ports[dcs_port] = server.name
-            autoexec = Autoexec(server.instance)
+                dcs_ports[dcs_port] = _server.name
+            autoexec = Autoexec(_server.instance)
             webgui_port = autoexec.webgui_port or 8088
             if webgui_port in webgui_ports:
-                self.log.error(f'Server "{server.name}" shares its webgui_port with server '
+                self.log.error(f'Server "{_server.name}" shares its webgui_port with server '
                                f'"{webgui_ports[webgui_port]}"! Registration aborted.')
                 return False
             else:
-                webgui_ports[webgui_port] = server.name
+                webgui_ports[webgui_port] = _server.name
         # check for DSMC
         if server.status == Status.RUNNING and data.get('dsmc_enabled', False) and 'DSMC' not in server.extensions:
             self.log.warning("  => DSMC is enabled for this server but DSMC extension is not loaded!")
             self.log.warning("     You need to configure DSMC on your own to prevent issues with the mission list.")
 
         # update the database and check for server name changes
-        with self.pool.connection() as conn:
-            with closing(conn.cursor()) as cursor:
-                cursor.execute(
-                    'SELECT server_name FROM instances WHERE node=%s AND port=%s AND server_name IS NOT NULL',
-                    (self.node.name, data['port'])
-                )
-                if cursor.rowcount == 1:
-                    _server_name = cursor.fetchone()[0]
-                    if _server_name != server_name:
-                        if utils.findDCSInstances(_server_name) and not self.servers.get(_server_name):
-                            self.log.info(f'Auto-renaming server "{_server_name}" to "{server_name}"')
-                            asyncio.run(server.rename(server_name))
-                        else:
-                            self.log.warning(f'Registration of server "{server_name}" aborted due to conflict.')
-                            del self.servers[server_name]
-                            return False
+        async with self.apool.connection() as conn:
+            cursor = await conn.execute(
+                'SELECT server_name FROM instances WHERE node=%s AND port=%s AND server_name IS NOT NULL',
+                (self.node.name, data['port'])
+            )
+            rows = await cursor.fetchall()
+        if len(rows) == 1:
+            _server_name = rows[0][0]
+            if _server_name != server_name:
+                if (await asyncio.to_thread(utils.findDCSInstances, _server_name)) and \
+                        not self.servers.get(_server_name):
+                    self.log.info(f'Auto-renaming server "{_server_name}" to "{server_name}"')
+                    await server.rename(server_name)
+                else:
+                    self.log.warning(f'Registration of server "{server_name}" aborted due to conflict.')
+                    del self.servers[server_name]
+                    return False
         self.log.info(f'  => Local DCS-Server "{server_name}" registered.')
         return True
 
@@ -290,10 +483,12 @@ class ServiceBus(Service):
         self.servers[new_name] = server
         if server.name in self.servers:
             del self.servers[server.name]
-        if server.name in self.udp_server.message_queue:
-            self.udp_server.message_queue[server.name].put({})
-            self.udp_server.message_queue[new_name] = Queue()
-            self.executor.submit(self.udp_server.process, new_name)
+        # the queue and its worker keep running under the new name
+        if server.name in self.message_queue:
+            queue = self.message_queue.pop(server.name)
+            queue.server_name = new_name
+            self.message_queue[new_name] = queue
+            self.queue_tasks[new_name] = self.queue_tasks.pop(server.name)
 
     def ban(self, ucid: str, banned_by: str, reason: str = 'n/a', days: Optional[int] = None):
         if days:
@@ -309,6 +504,7 @@ class ServiceBus(Service):
                     VALUES (%s, %s, %s, %s) 
                     ON CONFLICT DO NOTHING
                 """, (ucid, banned_by, reason, until))
+        ProfileCache().invalidate(ucid)
         for server in self.servers.values():
             if server.status not in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
                 continue
@@ -326,6 +522,7 @@ class ServiceBus(Service):
         with self.pool.connection() as conn:
             with conn.transaction():
                 conn.execute("DELETE FROM bans WHERE ucid = %s", (ucid, ))
+        ProfileCache().invalidate(ucid)
         for server in self.servers.values():
             if server.status not in [Status.PAUSED, Status.RUNNING, Status.STOPPED]:
                 continue
@@ -376,15 +573,17 @@ class ServiceBus(Service):
             if not server.locals.get('channels'):
                 server.locals['channels'] = channels
             # add eventlistener queue
-            if server.name not in self.udp_server.message_queue:
-                self.udp_server.message_queue[server.name] = Queue()
-                self.executor.submit(self.udp_server.process, server.name)
+            self.add_queue(server.name)
             self.log.info(f"  => DCS-Server \"{server.name}\" from Node {server.node.name} registered.")
         else:
             # IP might have changed, so update it
             server.node.public_ip = public_ip
         server.status = Status(status)
 
+    @property
+    def intercom_target(self) -> str:
+        return "Master" if self.master else self.node.name
+
     def send_to_node(self, data: dict, *, node: Optional[Union[Node, str]] = None):
         if isinstance(node, Node):
             node = node.name
@@ -396,12 +595,13 @@ class ServiceBus(Service):
                     with conn.transaction():
                         conn.execute("INSERT INTO intercom (node, data, priority) VALUES (%s, %s, %s)",
                                      (node, Json(data), priority))
+                        conn.execute("SELECT pg_notify(%s, %s)", (INTERCOM_CHANNEL, node))
             elif data['command'] != 'rpc':
                 server_name = data['server_name']
-                if server_name not in self.udp_server.message_queue:
+                if server_name not in self.message_queue:
                     self.log.debug(f"Message received for unregistered server {server_name} - ignoring.")
                 else:
-                    self.udp_server.message_queue[server_name].put(data)
+                    self.message_queue[server_name].put(data)
             else:
                 asyncio.create_task(self.handle_rpc(data))
         else:
@@ -410,6 +610,7 @@ class ServiceBus(Service):
                 with conn.transaction():
                     conn.execute("INSERT INTO intercom (node, data, priority) VALUES ('Master', %s, %s)",
                                  (Json(data), priority))
+                    conn.execute("SELECT pg_notify(%s, 'Master')", (INTERCOM_CHANNEL, ))
                     self.log.debug(f"{self.node.name}->MASTER: {json.dumps(data)}")
 
     async def send_to_node_sync(self, message: dict, timeout: Optional[int] = 30.0, *,
@@ -483,7 +684,7 @@ class ServiceBus(Service):
     async def handle_master(self, data: dict):
         self.log.debug(f"{data['node']}->MASTER: {json.dumps(data)}")
         server_name = data['server_name']
-        if server_name not in self.udp_server.message_queue:
+        if server_name not in self.message_queue:
             self.log.debug(f"Intercom: message ignored, no server {server_name} registered.")
             return
         # support sync responses though intercom
@@ -497,7 +698,7 @@ class ServiceBus(Service):
                 self.loop.call_soon_threadsafe(f.set_result, data)
             if data['command'] not in ['registerDCSServer', 'getMissionUpdate']:
                 return
-        self.udp_server.message_queue[server_name].put(data)
+        self.message_queue[server_name].put(data)
 
     async def handle_agent(self, data: dict):
         self.log.debug(f"MASTER->{self.node.name}: {json.dumps(data)}")
@@ -509,17 +710,51 @@ class ServiceBus(Service):
             server: Server = self.servers[server_name]
             server.send_to_dcs(data)
 
+    def intercom_listener(self):
+        url = self.node.config.get("database", self.node.locals.get('database'))['url']
+
+        def on_notify(notify: psycopg.Notify):
+            if notify.payload == self.intercom_target:
+                self.loop.call_soon_threadsafe(self.intercom_event.set)
+
+        while self.intercom_listening:
+            try:
+                with psycopg.connect(url, autocommit=True) as conn:
+                    conn.add_notify_handler(on_notify)
+                    conn.execute(f"LISTEN {INTERCOM_CHANNEL}")
+                    # read everything that might have been sent while we were not listening
+                    self.loop.call_soon_threadsafe(self.intercom_event.set)
+                    while self.intercom_listening:
+                        # wait for data on the socket, notifications are dispatched when the next statement runs
+                        if select.select([conn], [], [], 1.0)[0]:
+                            conn.execute("SELECT 1")
+            except psycopg.OperationalError as ex:
+                self.log.warning(f"Intercom: connection lost ({ex}), reconnecting ...")
+                time.sleep(5)
+            except Exception as ex:
+                self.log.exception(ex)
+                time.sleep(5)
+
     @tasks.loop(seconds=1)
     async def intercom(self):
+        if self.intercom_notify:
+            # polling is only a fallback in case we missed a notification
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.intercom_event.wait(), timeout=self.node.locals.get('intercom_poll', 5))
+            self.intercom_event.clear()
         with self.pool.connection() as conn:
             with conn.transaction():
                 while True:
-                    # we read until there is no new data, then we wait for the next call (after 1 s)
-                    idx = 0
-                    for idx, row in enumerate(conn.execute("""
-                        SELECT id, data FROM intercom WHERE node = %s ORDER BY priority desc, id LIMIT 10
-                    """, ("Master" if self.master else self.node.name, )).fetchall()):
-                        data = row[1]
+                    # read and delete the messages in batches until there is no new data
+                    rows = conn.execute("""
+                        DELETE FROM intercom WHERE id IN (
+                            SELECT id FROM intercom WHERE node = %s 
+                            ORDER BY priority DESC, id LIMIT %s 
+                            FOR UPDATE SKIP LOCKED
+                        ) RETURNING id, data, priority
+                    """, (self.intercom_target, INTERCOM_BATCH_SIZE)).fetchall()
+                    # RETURNING does not keep the order of the sub-select
+                    for _, data, _ in sorted(rows, key=lambda x: (-x[2], x[0])):
                         try:
                             if data['command'] == 'rpc':
                                 asyncio.create_task(self.handle_rpc(data))
@@ -529,8 +764,7 @@ class ServiceBus(Service):
                                 asyncio.create_task(self.handle_agent(data))
                         except Exception as ex:
                             self.log.exception(ex)
-                        conn.execute("DELETE FROM intercom WHERE id = %s", (row[0], ))
-                    if idx < 10:
+                    if len(rows) < INTERCOM_BATCH_SIZE:
                         break
 
     async def rpc(self, obj: object, data: dict) -> Optional[dict]:
@@ -559,100 +793,158 @@ class ServiceBus(Service):
             for key, value in data['params'].items():
                 setattr(obj, key, value)
 
-    async def start_udp_listener(self):
-        class RequestHandler(BaseRequestHandler):
+    def add_queue(self, server_name: str):
+        if server_name not in self.message_queue:
+            queue = ServerQueue(server_name, self.queue_size)
+            self.message_queue[server_name] = queue
+            self.queue_tasks[server_name] = asyncio.create_task(self.process(queue))
 
-            def handle(derived):
-                if not derived.request or not derived.request[0]:
-                    self.log.warning(f"Empty request received on port {self.node.listen_port} - ignoring.")
-                    return
-                data: dict = json.loads(derived.request[0].strip())
-                # ignore messages not containing server names
-                if 'server_name' not in data:
-                    self.log.warning('Message without server_name received: {}'.format(data))
+    def handle_datagram(self, raw: bytes):
+        raw = raw.strip()
+        if not raw:
+            self.log.warning(f"Empty request received on port {self.node.listen_port} - ignoring.")
+            return
+        data: dict = json_loads(raw)
+        # ignore messages not containing server names
+        if 'server_name' not in data:
+            self.log.warning('Message without server_name received: {}'.format(data))
+            return
+        server_name = data['server_name']
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug('{}->HOST: {}'.format(server_name, json.dumps(data)))
+        server = self.servers.get(server_name)
+        if not server:
+            self.log.debug(f"Command {data['command']} for unregistered server {server_name} received, ignoring.")
+            return
+        if 'channel' in data and data['channel'].startswith('sync-'):
+            if data['channel'] in server.listeners:
+                f = server.listeners.get(data['channel'])
+                if f and not f.done():
+                    f.set_result(data)
+                if data['command'] not in ['registerDCSServer', 'getMissionUpdate']:
                     return
-                server_name = data['server_name']
-                self.log.debug('{}->HOST: {}'.format(server_name, json.dumps(data)))
-                server = self.servers.get(server_name)
+        self.add_queue(server.name)
+        self.message_queue[server.name].put(data)
+
+    async def process(self, queue: ServerQueue):
+        while True:
+            data = await queue.get()
+            try:
+                server: Server = self.servers.get(queue.server_name)
                 if not server:
+                    continue
+                server.last_seen = datetime.now(timezone.utc)
+                command = data['command']
+                if command == 'registerDCSServer':
+                    if not server.is_remote:
+                        if not await self.register_server(data):
+                            self.log.error(f"Error while registering server {server.name}.")
+                            continue
+                        if not self.master:
+                            self.log.debug(f"Registering server {server.name} on Master node ...")
+                elif server.status == Status.UNREGISTERED:
                     self.log.debug(
-                        f"Command {data['command']} for unregistered server {server_name} received, ignoring.")
-                    return
-                if 'channel' in data and data['channel'].startswith('sync-'):
-                    if data['channel'] in server.listeners:
-                        f = server.listeners.get(data['channel'])
-                        if f and not f.done():
-                            self.loop.call_soon_threadsafe(f.set_result, data)
-                        if data['command'] not in ['registerDCSServer', 'getMissionUpdate']:
-                            return
-                udp_server: MyThreadingUDPServer = cast(MyThreadingUDPServer, derived.server)
-                if server.name not in udp_server.message_queue:
-                    udp_server.message_queue[server.name] = Queue()
-                    self.executor.submit(udp_server.process, server.name)
-                udp_server.message_queue[server.name].put(data)
-
-        class MyThreadingUDPServer(ThreadingUDPServer):
-            def __init__(derived, server_address: Tuple[str, int], request_handler: Callable[..., BaseRequestHandler]):
-                try:
-                    # enable reuse, in case the restart was too fast and the port was still in TIME_WAIT
-                    MyThreadingUDPServer.allow_reuse_address = True
-                    MyThreadingUDPServer.max_packet_size = 65504
-                    derived.message_queue: dict[str, Queue[dict]] = {}
-                    super().__init__(server_address, request_handler)
-                except Exception as ex:
-                    self.log.exception(ex)
+                        f"Command {command} for unregistered server {server.name} received, ignoring.")
+                    continue
+                if self.master:
+                    await self.dispatch(queue, server, command, data)
+                else:
+                    await asyncio.to_thread(self.send_to_node, data)
+                queue.processed[command] += 1
+            except Exception as ex:
+                self.log.exception(ex)
+            finally:
+                queue.task_done()
+
+    def get_listeners(self, command: str) -> list[EventListener]:
+        listeners = self.routing.get(command)
+        if listeners is None:
+            listeners = self.routing[command] = [x for x in self.eventListeners if x.has_event(command)]
+        return listeners
+
+    async def dispatch(self, queue: ServerQueue, server: Server, command: str, data: dict):
+        listeners = self.get_listeners(command)
+        if not listeners:
+            return
+        # all listeners share the same read-only copy of the message
+        data = utils.freeze(data)
+        if command in SYNC_COMMANDS or (command == 'onGameEvent' and data.get('eventName') in SYNC_GAME_EVENTS):
+            # wait for all pending events of this server, then run the listeners concurrently
+            await asyncio.gather(*[lane.join() for lane in queue.lanes.values()])
+            await asyncio.gather(*[self.call_listener(listener, command, server, data) for listener in listeners])
+        else:
+            # each listener processes the events of a server in order, but independent of the other listeners
+            for listener in listeners:
+                lane = queue.lanes.get(listener)
+                if not lane:
+                    lane = queue.lanes[listener] = asyncio.Queue(maxsize=self.queue_size)
+                    queue.lane_tasks[listener] = asyncio.create_task(self.process_lane(lane, listener))
+                await lane.put((command, server, data))
+
+    async def process_lane(self, lane: asyncio.Queue, listener: EventListener):
+        while True:
+            command, server, data = await lane.get()
+            try:
+                await self.call_listener(listener, command, server, data)
+            finally:
+                lane.task_done()
+
+    async def call_listener(self, listener: EventListener, command: str, server: Server, data: dict):
+        start = time.perf_counter()
+        try:
+            await listener.processEvent(command, server, data)
+        finally:
+            self.latency[(type(listener).__name__, command)].observe(time.perf_counter() - start)
 
-            def process(derived, server_name: str):
-                data: dict = derived.message_queue[server_name].get()
-                while data:
-                    server: Server = self.servers.get(server_name)
-                    if not server:
-                        return
-                    try:
-                        server.last_seen = datetime.now(timezone.utc)
-                        command = data['command']
-                        if command == 'registerDCSServer':
-                            if not server.is_remote:
-                                if not self.register_server(data):
-                                    self.log.error(f"Error while registering server {server.name}.")
-                                    return
-                                if not self.master:
-                                    self.log.debug(f"Registering server {server.name} on Master node ...")
-                        elif server.status == Status.UNREGISTERED:
-                            self.log.debug(
-                                f"Command {command} for unregistered server {server.name} received, ignoring.")
-                            continue
-                        if self.master:
-                            concurrent.futures.wait(
-                                [
-                                    asyncio.run_coroutine_threadsafe(
-                                        listener.processEvent(command, server, deepcopy(data)), self.loop
-                                    )
-                                    for listener in self.eventListeners
-                                    if listener.has_event(command)
-                                ]
-                            )
-                        else:
-                            self.send_to_node(data)
-                    except Exception as ex:
-                        self.log.exception(ex)
-                    finally:
-                        derived.message_queue[server.name].task_done()
-                        data = derived.message_queue[server.name].get()
-                del derived.message_queue[server_name]
-
-            def shutdown(derived):
-                super().shutdown()
-                try:
-                    for server_name, queue in derived.message_queue.items():
-                        if not queue.empty():
-                            queue.join()
-                        queue.put({})
-                except Exception as ex:
-                    self.log.exception(ex)
+    def get_metrics(self) -> dict[str, dict]:
+        return {
+            "servers": {
+                server_name: {
+                    "depth": queue.size,
+                    "pending": {type(k).__name__: v.qsize() for k, v in queue.lanes.items() if v.qsize()},
+                    "lag": queue.lag,
+                    "max_lag": queue.max_lag,
+                    "received": dict(queue.received),
+                    "processed": dict(queue.processed),
+                    "dropped": dict(queue.dropped)
+                } for server_name, queue in self.message_queue.items()
+            },
+            "latency": {
+                f"{listener}.{command}": histogram.to_dict()
+                for (listener, command), histogram in self.latency.items()
+            }
+        }
+
+    @tasks.loop(minutes=1)
+    async def report_metrics(self):
+        metrics = self.get_metrics()
+        for server_name, server_metrics in metrics['servers'].items():
+            queue = self.message_queue[server_name]
+            dropped = sum(server_metrics['dropped'].values())
+            if dropped:
+                self.log.warning(f"Server {server_name}: {dropped} messages dropped due to an overloaded queue: "
+                                 f"{server_metrics['dropped']}")
+            self.log.debug(f"Server {server_name}: queue depth={server_metrics['depth']}, "
+                           f"pending={server_metrics['pending']}, max lag={server_metrics['max_lag']:.3f}s, "
+                           f"received={sum(server_metrics['received'].values())}/min, "
+                           f"processed={sum(server_metrics['processed'].values())}/min")
+            # counters are per reporting interval
+            queue.received.clear()
+            queue.processed.clear()
+            queue.dropped.clear()
+            queue.max_lag = 0.0
+        slowest = sorted(metrics['latency'].items(), key=lambda x: x[1]['p95'], reverse=True)[:5]
+        for name, latency in slowest:
+            self.log.debug(f"Latency {name}: count={latency['count']}, p50={latency['p50']:.3f}s, "
+                           f"p95={latency['p95']:.3f}s, p99={latency['p99']:.3f}s, max={latency['max']:.3f}s")
+        self.latency.clear()
 
+    async def start_udp_listener(self):
         host = self.node.listen_address
         port = self.node.listen_port
-        self.udp_server = MyThreadingUDPServer((host, port), RequestHandler)
-        self.executor.submit(self.udp_server.serve_forever)
+        self.udp_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: UDPProtocol(self), local_addr=(host, port), family=socket.AF_INET)
+        # give the kernel some room for bursts
+        with suppress(OSError):
+            self.udp_transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
         self.log.debug('  - Listener started on interface {} port {} accepting commands.'.format(host, port))